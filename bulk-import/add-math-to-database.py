@@ -3,13 +3,11 @@
 Add Math questions directly to questions-database.json
 """
 
-import json
 import csv
-from pathlib import Path
+from db_format import load_database, save_database
 
 # Load existing database
-with open('questions-database.json', 'r', encoding='utf-8') as f:
-    all_questions = json.load(f)
+all_questions = load_database('questions-database.json')
 
 # Load math questions CSV
 math_csv = 'bulk-import/math-module1-questions.csv'
@@ -91,8 +89,7 @@ for q in math_questions[:3]:
 all_questions.extend(math_questions)
 
 # Save
-with open('questions-database.json', 'w', encoding='utf-8') as f:
-    json.dump(all_questions, f, indent=2, ensure_ascii=False)
+save_database(all_questions, 'questions-database.json')
 
 print(f"\n✅ Added {len(math_questions)} Math questions to database!")
 print(f"📊 Total questions now: {len(all_questions)}")
@@ -4,7 +4,7 @@ Quick script to add missing question texts
 Edit the MISSING_QUESTIONS dictionary below with your question texts
 """
 
-import json
+from db_format import load_database, save_database
 
 # ============================================================================
 # EDIT THESE - Add your question texts here:
@@ -20,8 +20,7 @@ MISSING_QUESTIONS = {
 # ============================================================================
 
 # Load database
-with open('questions-database.json', 'r') as f:
-    db = json.load(f)
+db = load_database('questions-database.json')
 
 # Update questions
 updated = []
@@ -39,8 +38,7 @@ for q in db:
 
 # Save
 if updated:
-    with open('questions-database.json', 'w') as f:
-        json.dump(db, f, indent=2, ensure_ascii=False)
+    save_database(db, 'questions-database.json')
     print(f"\n✅ Updated {len(updated)} questions: {updated}")
 else:
     print("\n⚠️  No questions updated. Edit the MISSING_QUESTIONS dictionary first!")
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Answer keys from SAT PDFs: answer lines, answer tables, or OCR of the table
+
+fast-import read "1. A" lines from the last 3 pages, and
+extract-answer-key-asiav6.py OCR'd the first image of each of the last 10
+pages and ran three overlapping regexes over every line. Both now go through
+read_answer_key(), which works page by page:
+
+    1. key pages are found in the page text the importer already has: pages
+       with "Answers" / "Answer Key" from first_page on (by default the last
+       10 pages). Only when there are none, pages without a text layer are
+       tried instead (image-only keys)
+    2. "1. A" lines under "<Math | Reading and Writing> Module N Answers"
+    3. otherwise the page's word boxes are read as a table: a question number
+       and the answer right of it on the same row belong to the nearest
+       module heading above them in the same column (without headings, the
+       next module starts wherever the numbering restarts at 1)
+    4. a page with no usable text is rasterized - only the area of its largest
+       image, where the table is - OCR'd once, and the word boxes read as in 3
+
+    answer_key, sources = read_answer_key(doc)                    # {module: {q_num: 'A' | '5780'}}
+    answer_key, sources = read_answer_key(doc, pages.text, first_page=26)
+    sources                                                       # [(page_num, 'lines' | 'table' | 'ocr', answers)]
+
+OCR needs pytesseract and the tesseract binary; without them image-only key
+pages are skipped (and show up in sources with 0 answers).
+
+Usage:
+    python3 bulk-import/answer_key.py <pdf> [out.json]
+"""
+
+import json
+import re
+import shutil
+import sys
+from collections import namedtuple
+
+import fitz  # PyMuPDF
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+MODULE_ORDER = ('Reading and Writing Module 1', 'Reading and Writing Module 2', 'Math Module 1', 'Math Module 2')
+
+KEY_PAGE = re.compile(r'Answers|Answer Key')
+ANSWER_LINE = re.compile(r'^(\d+)\.\s+(.+)$')
+QUESTION_NUMBER = re.compile(r'^(\d{1,2})[.)]?$')
+ANSWER = re.compile(r'^(?:[A-D]|-?\d*\.?\d+(?:/\d+)?)$')
+SUBJECT = re.compile(r'^(?:Math|Reading|Writing)', re.IGNORECASE)
+
+KEY_SEARCH_PAGES = 10
+
+# Rendering scale for OCR (3 = 216 dpi) and tesseract's mode: one block of text
+OCR_ZOOM = 3
+OCR_CONFIG = '--psm 6'
+
+Word = namedtuple('Word', 'x0 y0 x1 y1 text')
+
+
+def heading_module(text):
+    """Module a key heading names ('Math Module 1 Answers' -> 'Math Module 1'), or None"""
+    match = re.search(r'Module\s*([12])', text, re.IGNORECASE)
+    if not match:
+        return None
+    if re.search(r'Math', text, re.IGNORECASE):
+        return f"Math Module {match.group(1)}"
+    if re.search(r'Reading|Writing', text, re.IGNORECASE):
+        return f"Reading and Writing Module {match.group(1)}"
+    return None
+
+
+def parse_lines(lines):
+    """Answers from "1. A" lines, each under the last module heading above it"""
+    answers = {}
+    module = None
+    for line in lines:
+        module = heading_module(line) or module
+        match = ANSWER_LINE.match(line.strip())
+        if module and match:
+            answers.setdefault(module, {})[int(match.group(1))] = match.group(2).strip()
+    return answers
+
+
+def rows(words):
+    """Words grouped into rows by their vertical centre, each row left to right"""
+    grouped = []
+    for word in sorted(words, key=lambda w: ((w.y0 + w.y1) / 2, w.x0)):
+        center = (word.y0 + word.y1) / 2
+        if grouped and abs(center - grouped[-1][0]) <= (word.y1 - word.y0) / 2:
+            grouped[-1][1].append(word)
+        else:
+            grouped.append((center, [word]))
+    return [sorted(row, key=lambda w: w.x0) for _, row in grouped]
+
+
+def parse_table(words):
+    """Answers from word boxes laid out as a table"""
+    headings = []   # (x centre, y, module)
+    pairs = []      # (x centre, y, x0, question number, answer)
+    height = 0
+    for row in rows(words):
+        subject = None
+        i = 0
+        while i < len(row):
+            word = row[i]
+            height = max(height, word.y1 - word.y0)
+            following = row[i + 1] if i + 1 < len(row) else None
+            if SUBJECT.match(word.text) and subject is None:
+                subject = word
+            elif subject is not None and word.text.lower().startswith('module'):
+                # "Module 1", or "Module1" as one word
+                end = word if word.text[6:] else following
+                module = heading_module(f"{subject.text} Module {end.text[-1] if end else ''}")
+                if module:
+                    headings.append(((subject.x0 + end.x1) / 2, word.y0, module))
+                    i += end is following
+                subject = None
+            elif following is not None and QUESTION_NUMBER.match(word.text) and ANSWER.match(following.text) \
+                    and following.x0 - word.x1 < 4 * (word.y1 - word.y0):
+                q_num = int(QUESTION_NUMBER.match(word.text).group(1))
+                pairs.append(((word.x0 + following.x1) / 2, word.y0, word.x0, q_num, following.text))
+                i += 1
+            i += 1
+
+    answers = {}
+    if headings:
+        for x, y, _, q_num, answer in pairs:
+            above = [h for h in headings if h[1] < y]
+            if not above:
+                continue
+            # The closest column, then the lowest heading in it
+            nearest = min(abs(h[0] - x) for h in above)
+            column = [h for h in above if abs(h[0] - x) <= nearest + 3 * height]
+            module = max(column, key=lambda h: h[1])[2]
+            answers.setdefault(module, {})[q_num] = answer
+        return answers
+
+    # No headings: read column by column, a new module wherever numbering restarts
+    columns = []
+    for pair in sorted(pairs, key=lambda p: p[2]):
+        if columns and pair[2] - columns[-1][-1][2] <= 2 * height:
+            columns[-1].append(pair)
+        else:
+            columns.append([pair])
+    module_index = 0
+    last_q = 0
+    for column in columns:
+        for _, _, _, q_num, answer in sorted(column, key=lambda p: p[1]):
+            if q_num <= last_q:
+                module_index += 1
+            if module_index >= len(MODULE_ORDER):
+                return answers
+            answers.setdefault(MODULE_ORDER[module_index], {})[q_num] = answer
+            last_q = q_num
+    return answers
+
+
+def page_words(page):
+    return [Word(*w[:5]) for w in page.get_text('words')]
+
+
+def ocr_words(page):
+    """Word boxes of a page without text: OCR of just its largest image (the table), in page coordinates"""
+    if pytesseract is None or not shutil.which('tesseract'):
+        return []
+    from PIL import Image
+
+    clip = page.rect
+    rects = [rect for image in page.get_images(full=True) for rect in page.get_image_rects(image[0])]
+    if rects:
+        clip = max(rects, key=lambda r: r.width * r.height) & page.rect
+    pix = page.get_pixmap(matrix=fitz.Matrix(OCR_ZOOM, OCR_ZOOM), clip=clip, alpha=False)
+    image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    data = pytesseract.image_to_data(image, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+
+    words = []
+    for text, left, top, width, height in zip(data['text'], data['left'], data['top'],
+                                              data['width'], data['height']):
+        if text.strip():
+            x0, y0 = clip.x0 + left / OCR_ZOOM, clip.y0 + top / OCR_ZOOM
+            words.append(Word(x0, y0, x0 + width / OCR_ZOOM, y0 + height / OCR_ZOOM, text.strip()))
+    return words
+
+
+def find_key_pages(page_count, page_text, first_page=None):
+    """Pages with a key heading from first_page on, or else the ones with no text (image-only keys)"""
+    first_page = max(0, page_count - KEY_SEARCH_PAGES) if first_page is None else first_page
+    pages = range(first_page, page_count)
+    key_pages = [page_num for page_num in pages if KEY_PAGE.search(page_text(page_num))]
+    if key_pages:
+        return key_pages
+    return [page_num for page_num in pages if not page_text(page_num).strip()]
+
+
+def read_answer_key(doc, page_text=None, first_page=None):
+    """{module: {question number: answer}} and [(page, how it was read, answers found)]"""
+    page_text = page_text or (lambda page_num: doc[page_num].get_text())
+    answer_key = {}
+    sources = []
+
+    for page_num in find_key_pages(len(doc), page_text, first_page):
+        answers, method = parse_lines(page_text(page_num).split('\n')), 'lines'
+        if not answers:
+            answers, method = parse_table(page_words(doc[page_num])), 'table'
+        if not answers and doc[page_num].get_images():
+            answers, method = parse_table(ocr_words(doc[page_num])), 'ocr'
+
+        for module, module_answers in answers.items():
+            answer_key.setdefault(module, {}).update(module_answers)
+        sources.append((page_num, method, sum(len(a) for a in answers.values())))
+
+    # Same module order whichever way the key was laid out
+    order = {name: i for i, name in enumerate(MODULE_ORDER)}
+    answer_key = {module: dict(sorted(answer_key[module].items()))
+                  for module in sorted(answer_key, key=order.get)}
+    return answer_key, sources
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 bulk-import/answer_key.py <pdf> [out.json]")
+        sys.exit(1)
+
+    doc = fitz.open(sys.argv[1])
+    answer_key, sources = read_answer_key(doc)
+    doc.close()
+
+    for page_num, method, count in sources:
+        print(f"   📄 Page {page_num + 1}: {count} answers ({method})")
+    for module, answers in answer_key.items():
+        print(f"   ✓ {module}: {len(answers)} answers")
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w', encoding='utf-8') as f:
+            json.dump(answer_key, f, indent=2)
+        print(f"   📄 Written to {sys.argv[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+📦 BATCH SAT TEST IMPORTER
+Import several PDFs at once, with ONE database write at the end.
+
+Usage:
+    python3 bulk-import/batch-import.py <manifest.json> [--workers N] [--skip-failed] [--dry-run]
+
+Manifest (see bulk-import/batch-manifest.json):
+    [
+      {"pdf": "bulk-import/202503asiav2.pdf", "name": "2025-03 Asia Test 2",
+       "date": "2025-03", "region": "Asia", "number": 2},
+      ...
+    ]
+
+What it does:
+    ✅ Extracts every PDF in parallel (one worker process per PDF)
+    ✅ Validates all of them (modules, question counts, choices, answer key)
+    ✅ Merges them into the database like fast-import: a test that's already in
+       it is updated in place, and new questions get one contiguous block of
+       IDs, in manifest order
+    ✅ Writes the database once - either everything goes in or nothing does
+    ✅ Prints a per-PDF timing and accuracy summary
+
+--skip-failed commits the PDFs that passed and leaves out the ones that didn't
+(by default any failure aborts the whole batch). --dry-run writes a changeset
+(questions-database.changes.json) to review and apply later instead of the
+database - see changeset.py.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from db_format import DRY_RUN_ENV, dry_run_path, load_database, save_database
+from image_store import ImageStore
+from import_state import IMPORT_POLICIES
+from merge_engine import merge_questions
+
+DB_PATH = Path('questions-database.json')
+
+
+def load_importer_class():
+    """fast-import.py has a dash in its name, so load it by path"""
+    spec = importlib.util.spec_from_file_location("fast_import", Path(__file__).parent / "fast-import.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.FastSATImporter
+
+
+def make_importer(job):
+    FastSATImporter = load_importer_class()
+    return FastSATImporter(job['pdf'], job['name'], job['date'], job['region'], int(job['number']), workers=1)
+
+
+def extract_job(job):
+    """Worker: run extraction steps 1-6 for one PDF and return plain data"""
+    start = time.perf_counter()
+    try:
+        importer = make_importer(job)
+        importer.extract()
+        problems, stats = importer.validate()
+        return {
+            'job': job,
+            # Missing modules are fatal; count mismatches are only reported
+            'ok': stats['questions'] > 0 and not any(p.endswith('not found') for p in problems),
+            'modules': importer.modules,
+            'answer_key': importer.answer_key,
+            'image_refs': importer.image_refs,
+            'problems': problems,
+            'stats': stats,
+            'stages': importer.stage_report,
+            'pages': len(importer.doc),
+            'seconds': time.perf_counter() - start,
+        }
+    except Exception as e:
+        return {'job': job, 'ok': False, 'problems': [f"extraction failed: {e}"],
+                'stats': {}, 'stages': [], 'pages': 0, 'seconds': time.perf_counter() - start}
+
+
+def merge_results(db, results, image_store):
+    """Merge the questions of every extracted PDF into db, as fast-import does for one
+
+    Returns the MergeResult, the importers (for cleanup) and each PDF's
+    (import state, fingerprints) to save once the database is written.
+    """
+    next_id = max([q['id'] for q in db], default=0) + 1
+    new_questions = []
+    importers = []
+    states = []
+
+    for r in results:
+        importer = make_importer(r['job'])
+        importer.image_store = image_store
+        importer.modules = r['modules']
+        importer.answer_key = r['answer_key']
+        importer.image_refs = r['image_refs']
+        state, fingerprints, changed = importer.changed_questions(db)
+        questions = importer.build_questions(next_id + len(new_questions), only=changed)
+        new_questions.extend(questions)
+        importers.append(importer)
+        states.append((state, fingerprints))
+
+    return merge_questions(db, new_questions, IMPORT_POLICIES, next_id=next_id), importers, states
+
+
+def load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+    for i, job in enumerate(jobs):
+        missing = [k for k in ('pdf', 'name', 'date', 'region', 'number') if k not in job]
+        if missing:
+            raise ValueError(f"Manifest entry {i + 1} is missing {', '.join(missing)}")
+        if not Path(job['pdf']).exists():
+            raise ValueError(f"PDF not found: {job['pdf']}")
+    return jobs
+
+
+def percent(found, expected):
+    return f"{100 * found / expected:5.1f}%" if expected else "   - "
+
+
+def print_summary(results):
+    print("\n📊 Per-PDF summary:")
+    print(f"   {'PDF':<28} {'pages':>5} {'time':>7} {'s/page':>7} {'questions':>10} {'choices':>8} {'key':>7}")
+    for r in results:
+        stats = r['stats']
+        name = Path(r['job']['pdf']).name[:28]
+        per_page = r['seconds'] / r['pages'] if r['pages'] else 0
+        questions = f"{stats.get('questions', 0)}/{stats.get('expected_questions', 0)}"
+        print(f"   {name:<28} {r['pages']:>5} {r['seconds']:>6.1f}s {per_page:>7.3f} {questions:>10} "
+              f"{percent(stats.get('choices_found', 0), stats.get('choices_expected', 0)):>8} "
+              f"{percent(stats.get('answers_found', 0), stats.get('questions', 0)):>7}")
+        for problem in r['problems']:
+            print(f"      ⚠️  {problem}")
+
+
+def main():
+    args = sys.argv[1:]
+    workers = None
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    skip_failed = '--skip-failed' in args
+    if '--dry-run' in args:
+        # save_database() and ImageStore pick this up
+        os.environ.setdefault(DRY_RUN_ENV, '1')
+    args = [a for a in args if a not in ('--skip-failed', '--dry-run')]
+
+    if not args:
+        print("Usage: python3 bulk-import/batch-import.py <manifest.json> [--workers N] [--skip-failed] [--dry-run]")
+        sys.exit(1)
+
+    try:
+        jobs = load_manifest(args[0])
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print("=" * 80)
+    print(f"📦 BATCH SAT IMPORTER - {len(jobs)} PDFs")
+    print("=" * 80)
+
+    # Step 1: extract all PDFs concurrently (results kept in manifest order)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or min(len(jobs), 8)) as pool:
+        results = list(pool.map(extract_job, jobs))
+    extract_seconds = time.perf_counter() - start
+
+    # Step 2: validate
+    print_summary(results)
+    failed = [r for r in results if not r['ok']]
+    if failed and not skip_failed:
+        print(f"\n❌ {len(failed)} PDF(s) failed - nothing was written. Use --skip-failed to import the rest.")
+        sys.exit(1)
+    accepted = [r for r in results if r['ok']]
+
+    # Step 3: one merge, one ID block, one write
+    print("\n💾 Committing to database...")
+    db = load_database(DB_PATH)
+    image_store = ImageStore()
+    result, importers, states = merge_results(db, accepted, image_store)
+
+    # A dry run only writes a changeset, and the next real run must redo it
+    if result.changed:
+        image_store.save()
+        save_database(result.db, DB_PATH, snapshot_label=f"batch-import: {len(accepted)} PDFs")
+    if dry_run_path(DB_PATH) is None:
+        for state, fingerprints in states:
+            state.save(fingerprints)
+    result.print_report()
+
+    for importer in importers:
+        importer.cleanup()
+
+    print("\n" + "=" * 80)
+    print("✅ BATCH IMPORT COMPLETE!")
+    print(f"   PDFs imported: {len(accepted)}/{len(jobs)}")
+    ids = [q['id'] for q in result.inserted]
+    print(f"   Questions added: {len(ids)}" + (f" (IDs {ids[0]}-{ids[-1]})" if ids else ""))
+    print(f"   Questions updated: {len(result.updated)}")
+    print(f"   Extraction time: {extract_seconds:.1f}s, total: {time.perf_counter() - start:.1f}s")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Choice parsing scaling benchmark
+
+Times the old per-letter regex choice parsing and A)...D) stem stripping (kept
+here as the reference) against choice_tokenizer.split_choices on inputs that
+grow from 1K to 256K characters:
+    passage      a long reading passage followed by four choices
+    many-a       "A) " over and over with no B), C), D) to finish it
+    whitespace   choice D followed by long runs of blank lines
+    no-choices   "A) x B) y C) z" repeated, never a D)
+    digits       choice D is one very long number
+
+Old and new must return the same stem and choices; a mismatch is reported.
+Sizes grow 4x and the old code is at least quadratic on the adversarial
+inputs, so once it would take longer than --limit seconds (default 2) on the
+next size, the bigger sizes skip it.
+
+Usage:
+    python3 bulk-import/bench-choices.py [--limit SECONDS]
+"""
+
+import re
+import sys
+import time
+
+from choice_tokenizer import split_choices
+
+SIZES = [1_000, 4_000, 16_000, 64_000, 256_000]
+
+
+def old_strip_choices(text):
+    """fast-import's remove_answer_choices_from_text before choice_tokenizer"""
+    if not text:
+        return text
+    text_upper = text.upper()
+    a_positions = []
+    pos = 0
+    while True:
+        pos = text_upper.find('A)', pos)
+        if pos == -1:
+            break
+        a_positions.append(pos)
+        pos += 1
+
+    for a_pos in reversed(a_positions):
+        remaining = text_upper[a_pos:]
+        b_pos = remaining.find('B)')
+        if b_pos == -1:
+            continue
+        c_pos = remaining.find('C)', b_pos)
+        if c_pos == -1:
+            continue
+        d_pos = remaining.find('D)', c_pos)
+        if d_pos == -1:
+            continue
+        if d_pos < 2000:
+            return text[:a_pos].strip()
+
+    match = re.search(r'\s*A\)\s+.*?B\)\s+.*?C\)\s+.*?D\)\s+.*?$', text, re.DOTALL | re.IGNORECASE)
+    if match:
+        return text[:match.start()].strip()
+    return text.strip()
+
+
+def old_parse_choices(question_text):
+    """fast-import's per-letter choice regexes before choice_tokenizer"""
+    choices = []
+    for letter, next_letters in (('A', 'BCD'), ('B', 'CD'), ('C', 'D'), ('D', '')):
+        if next_letters:
+            next_pattern = '|'.join(f'{l}\\)' for l in next_letters)
+            choice_pattern = rf'{letter}\)\s+(.*?)(?=\s*(?:{next_pattern})|\Z)'
+        else:
+            choice_pattern = rf'{letter}\)\s+(.*?)(?=\Z|\n\s*\d+\s*\n|\n\s*Module\s+)'
+        choice_match = re.search(choice_pattern, question_text, re.DOTALL | re.MULTILINE)
+        if choice_match:
+            choice_text = ' '.join(choice_match.group(1).strip().split())
+            match = re.search(r'\d+\s+[a-z]\s*=\s*', choice_text)
+            if match:
+                choice_text = choice_text[:match.start()].strip()
+            choices.append(re.sub(r'\s+\d+\s*$', '', choice_text).strip())
+    return choices if len(choices) == 4 else None
+
+
+def old_split_choices(text):
+    return old_strip_choices(text), old_parse_choices(text) if text else None
+
+
+def repeat_to(unit, size):
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+INPUTS = {
+    'passage': lambda n: repeat_to("The committee reviewed the proposal, and the results were mixed. ", n)
+    + "\nWhich choice best states the main idea?\nA) alpha\nB) beta\nC) gamma\nD) delta\n",
+    'many-a': lambda n: "Which choice completes the text? " + repeat_to("A) ", n),
+    'whitespace': lambda n: "Which choice? A) one B) two C) three D) four" + repeat_to(" \n", n) + "x",
+    'no-choices': lambda n: repeat_to("A) x B) y C) z ", n),
+    'digits': lambda n: "Solve for x. A) 1 B) 2 C) 3 D) " + "7" * n,
+}
+
+
+def timed(func, text):
+    start = time.perf_counter()
+    result = func(text)
+    return result, time.perf_counter() - start
+
+
+def main():
+    args = sys.argv[1:]
+    limit = 2.0
+    if '--limit' in args:
+        limit = float(args[args.index('--limit') + 1])
+
+    print("\n📏 Choice parsing: old regexes vs. choice_tokenizer")
+    print(f"   {'input':<12} {'chars':>8} {'old':>10} {'new':>10} {'speedup':>9}")
+    mismatches = 0
+
+    for name, make in INPUTS.items():
+        skip_old = False
+        for size in SIZES:
+            text = make(size)
+            new_result, new_seconds = timed(split_choices, text)
+
+            if skip_old:
+                print(f"   {name:<12} {len(text):>8} {'skipped':>10} {new_seconds * 1000:>8.2f}ms {'-':>9}")
+                continue
+
+            old_result, old_seconds = timed(old_split_choices, text)
+            if old_result != new_result:
+                mismatches += 1
+                print(f"   ❌ {name} ({len(text)} chars): results differ")
+            skip_old = old_seconds * 16 > limit
+            print(f"   {name:<12} {len(text):>8} {old_seconds * 1000:>8.2f}ms {new_seconds * 1000:>8.2f}ms "
+                  f"{old_seconds / max(new_seconds, 1e-9):>8.1f}x")
+
+    if mismatches:
+        print(f"\n❌ {mismatches} input(s) parsed differently")
+        sys.exit(1)
+    print("\n✅ Same stems and choices on every input")
+
+
+if __name__ == "__main__":
+    main()
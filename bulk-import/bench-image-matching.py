@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Image matching accuracy and timing
+
+Runs fast-import's extraction (steps 1-6, nothing is written) on PDFs that are
+already in the database and compares which questions got images with the
+curated questions-database.json:
+    - accuracy: same kind of image (none / single / image choices)
+    - precision and recall of "this question has an image"
+    - time spent in the image matching step
+
+Usage:
+    python3 bulk-import/bench-image-matching.py [manifest.json]   # default: bulk-import/batch-manifest.json
+"""
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+from db_format import load_database
+from ground_truth import image_kind
+
+DEFAULT_MANIFEST = Path("bulk-import/batch-manifest.json")
+
+
+def load_importer_class():
+    spec = importlib.util.spec_from_file_location("fast_import", Path(__file__).parent / "fast-import.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.FastSATImporter
+
+
+def score(importer, db):
+    """Compare one importer's matches with the database entries of the same test"""
+    truth = {(q['module'], q['questionNumber']): image_kind(q)
+             for q in db if q.get('testId') == importer.test_id}
+
+    counts = {'questions': 0, 'correct': 0, 'tp': 0, 'fp': 0, 'fn': 0}
+    for module_name, module in importer.modules.items():
+        for q_num, question in module['questions'].items():
+            expected = truth.get((module_name, q_num))
+            if expected is None:
+                continue
+            got = question.get('image_type', 'none')
+            counts['questions'] += 1
+            counts['correct'] += got == expected
+            counts['tp'] += got != 'none' and expected != 'none'
+            counts['fp'] += got != 'none' and expected == 'none'
+            counts['fn'] += got == 'none' and expected != 'none'
+    return counts
+
+
+def ratio(a, b):
+    return f"{100 * a / b:5.1f}%" if b else "   - "
+
+
+def main():
+    manifest = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MANIFEST
+    with open(manifest, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+
+    db = load_database()
+    FastSATImporter = load_importer_class()
+    rows = []
+
+    for job in jobs:
+        importer = FastSATImporter(job['pdf'], job['name'], job['date'], job['region'], int(job['number']),
+                                   checkpoints=False)
+        importer.extract()
+        match_seconds = sum(r['seconds'] for r in importer.stage_report if r['stage'] == 'match images')
+        rows.append((Path(job['pdf']).name, score(importer, db), match_seconds))
+        importer.doc.close()
+
+    print("\n📏 Image matching vs. questions-database.json:")
+    print(f"   {'PDF':<28} {'questions':>9} {'accuracy':>9} {'precision':>10} {'recall':>8} {'match time':>11}")
+    total = {'questions': 0, 'correct': 0, 'tp': 0, 'fp': 0, 'fn': 0}
+    for name, counts, seconds in rows:
+        for key in total:
+            total[key] += counts[key]
+        print(f"   {name[:28]:<28} {counts['questions']:>9} {ratio(counts['correct'], counts['questions']):>9} "
+              f"{ratio(counts['tp'], counts['tp'] + counts['fp']):>10} {ratio(counts['tp'], counts['tp'] + counts['fn']):>8} "
+              f"{seconds * 1000:>9.1f}ms")
+    print(f"   {'TOTAL':<28} {total['questions']:>9} {ratio(total['correct'], total['questions']):>9} "
+          f"{ratio(total['tp'], total['tp'] + total['fp']):>10} {ratio(total['tp'], total['tp'] + total['fn']):>8} "
+          f"{sum(r[2] for r in rows) * 1000:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
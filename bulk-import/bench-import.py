@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+📏 IMPORT BENCHMARK + ACCURACY REGRESSION SUITE
+
+Runs fast-import's extraction (steps 1-6, nothing is written) on every PDF in
+a manifest and records, per PDF:
+    speed     total and per-page time, time per stage
+    accuracy  questions found per module, text choices found, answer key
+              match rate and image assignment, scored against ground_truth.py
+    re-import questions that end up in the database twice when the PDF is
+              imported twice with batch-import's merge (into a copy of the
+              database, images into a throwaway store) - must be 0
+
+Results are written as JSON. Compared with a saved baseline, any stage that got
+slower or any accuracy number that dropped is reported as a regression (and
+the exit code is 1), as is any re-import duplicate, so speed and correctness are checked together.
+
+Usage:
+    python3 bulk-import/bench-import.py [manifest.json] [--output results.json]
+                                        [--baseline baseline.json] [--save-baseline]
+
+    manifest   default bulk-import/batch-manifest.json
+    baseline   default bulk-import/bench-baseline.json
+"""
+
+import importlib.util
+import json
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from db_format import load_database
+from ground_truth import GroundTruth, expected_questions
+from image_store import STAGED_LINKS, ImageStore
+from merge_engine import question_key
+
+DEFAULT_MANIFEST = Path("bulk-import/batch-manifest.json")
+DEFAULT_BASELINE = Path("bulk-import/bench-baseline.json")
+
+# A stage is slower if it takes 25% longer AND at least 50 ms more
+TIME_TOLERANCE = 1.25
+TIME_MIN_DELTA = 0.05
+# Accuracy may move by half a percentage point (rounding) before it counts
+ACCURACY_TOLERANCE = 0.005
+
+
+def load_script(name, module_name):
+    spec = importlib.util.spec_from_file_location(module_name, Path(__file__).parent / name)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_importer_class():
+    return load_script("fast-import.py", "fast_import").FastSATImporter
+
+
+def rate(found, expected):
+    return round(found / expected, 4) if expected else None
+
+
+def score(importer, truth):
+    """Accuracy of one importer's extraction against ground truth"""
+    test_id = importer.test_id
+    counts = {'questions': 0, 'expected_questions': 0, 'choices': 0, 'expected_choices': 0,
+              'answers': 0, 'expected_answers': 0, 'images': 0, 'expected_images': 0}
+    modules = {}
+
+    for module_name in ('Reading and Writing Module 1', 'Reading and Writing Module 2',
+                        'Math Module 1', 'Math Module 2'):
+        questions = importer.modules.get(module_name, {}).get('questions', {})
+        answers = importer.answer_key.get(module_name, {})
+        expected = expected_questions(module_name)
+        found = sum(1 for q_num in questions if 1 <= q_num <= expected)
+        modules[module_name] = f"{found}/{expected}"
+        counts['questions'] += found
+        counts['expected_questions'] += expected
+
+        for q_num in range(1, expected + 1):
+            question = questions.get(q_num)
+
+            if truth.has_text_choices(test_id, module_name, q_num):
+                counts['expected_choices'] += 1
+                counts['choices'] += bool(question and len(question.get('choices') or []) == 4)
+
+            expected_answer = truth.answer(test_id, module_name, q_num)
+            if expected_answer is not None:
+                counts['expected_answers'] += 1
+                counts['answers'] += str(answers.get(q_num, '')).strip().upper() == expected_answer
+
+            expected_kind = truth.image_kind(test_id, module_name, q_num)
+            if expected_kind is not None:
+                counts['expected_images'] += 1
+                counts['images'] += bool(question) and question.get('image_type', 'none') == expected_kind
+
+    return {
+        'modules': modules,
+        'question_rate': rate(counts['questions'], counts['expected_questions']),
+        'choice_rate': rate(counts['choices'], counts['expected_choices']),
+        'answer_rate': rate(counts['answers'], counts['expected_answers']),
+        'image_rate': rate(counts['images'], counts['expected_images']),
+        'counts': counts,
+    }
+
+
+def duplicate_keys(db, test_id):
+    counts = Counter(question_key(q) for q in db if q.get('testId') == test_id)
+    return sum(n - 1 for n in counts.values())
+
+
+def reimport_duplicates(importer, job, db):
+    """Import the extracted PDF twice with batch-import's merge; questions that got in twice"""
+    batch = load_script("batch-import.py", "batch_import")
+    extracted = {'job': job, 'modules': importer.modules, 'answer_key': importer.answer_key,
+                 'image_refs': importer.image_refs}
+    # The throwaway store stages its links in the process-wide STAGED_LINKS; put
+    # them back afterwards so a later dry run's changeset doesn't pick them up
+    staged = list(STAGED_LINKS)
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            store = ImageStore(root, dry_run=True)
+            first, importers, _ = batch.merge_results(db, [extracted], store)
+            second, more, _ = batch.merge_results(first.db, [extracted], store)
+            for other in importers + more:
+                other.cleanup()
+    finally:
+        STAGED_LINKS[:] = staged
+    return len(second.inserted) + duplicate_keys(second.db, importer.test_id) - duplicate_keys(db, importer.test_id)
+
+
+def bench_pdf(FastSATImporter, job, truth, db):
+    # Every stage is timed, so none may be restored from a checkpoint
+    importer = FastSATImporter(job['pdf'], job['name'], job['date'], job['region'], int(job['number']),
+                               checkpoints=False)
+    start = time.perf_counter()
+    importer.extract()
+    seconds = time.perf_counter() - start
+    pages = len(importer.doc)
+
+    stages = {}
+    for row in importer.stage_report:
+        stages[row['stage']] = round(stages.get(row['stage'], 0) + row['seconds'], 4)
+
+    result = {
+        'pages': pages,
+        'seconds': round(seconds, 4),
+        'seconds_per_page': round(seconds / pages, 4) if pages else None,
+        'stages': stages,
+        'accuracy': score(importer, truth),
+        'reimport_duplicates': reimport_duplicates(importer, job, db),
+    }
+    importer.doc.close()
+    return result
+
+
+def compare(results, baseline):
+    """Regressions of results against baseline, as printable lines"""
+    regressions = [f"{pdf}: {r['reimport_duplicates']} questions duplicated by importing it twice"
+                   for pdf, r in results['pdfs'].items() if r.get('reimport_duplicates')]
+    for pdf, old in baseline.get('pdfs', {}).items():
+        new = results['pdfs'].get(pdf)
+        if new is None:
+            regressions.append(f"{pdf}: missing from this run")
+            continue
+
+        for stage, old_seconds in old['stages'].items():
+            new_seconds = new['stages'].get(stage)
+            if new_seconds is not None and new_seconds > old_seconds * TIME_TOLERANCE \
+                    and new_seconds - old_seconds > TIME_MIN_DELTA:
+                regressions.append(f"{pdf}: '{stage}' {old_seconds:.2f}s -> {new_seconds:.2f}s")
+
+        for metric in ('question_rate', 'choice_rate', 'answer_rate', 'image_rate'):
+            old_value = old['accuracy'].get(metric)
+            new_value = new['accuracy'].get(metric)
+            if old_value is not None and (new_value is None or new_value < old_value - ACCURACY_TOLERANCE):
+                regressions.append(f"{pdf}: {metric} {old_value:.1%} -> "
+                                   f"{'-' if new_value is None else format(new_value, '.1%')}")
+    return regressions
+
+
+def pct(value):
+    return f"{value:6.1%}" if value is not None else "     -"
+
+
+def print_results(results):
+    print("\n📏 Import benchmark:")
+    print(f"   {'PDF':<28} {'pages':>5} {'time':>7} {'s/page':>7} {'questions':>9} {'choices':>8} "
+          f"{'answers':>8} {'images':>7}")
+    for pdf, r in results['pdfs'].items():
+        a = r['accuracy']
+        print(f"   {pdf[:28]:<28} {r['pages']:>5} {r['seconds']:>6.2f}s {r['seconds_per_page']:>7.3f} "
+              f"{pct(a['question_rate']):>9} {pct(a['choice_rate']):>8} {pct(a['answer_rate']):>8} "
+              f"{pct(a['image_rate']):>7}")
+        print(f"      {', '.join(f'{m}: {n}' for m, n in a['modules'].items())}")
+
+    slowest = {}
+    for r in results['pdfs'].values():
+        for stage, seconds in r['stages'].items():
+            slowest[stage] = slowest.get(stage, 0) + seconds
+    print("\n⏱️  Time per stage (all PDFs):")
+    for stage, seconds in sorted(slowest.items(), key=lambda item: -item[1]):
+        print(f"   {stage:<40} {seconds:>7.2f}s")
+
+
+def main():
+    args = sys.argv[1:]
+    output = baseline_path = None
+    if '--output' in args:
+        i = args.index('--output')
+        output = Path(args[i + 1])
+        del args[i:i + 2]
+    if '--baseline' in args:
+        i = args.index('--baseline')
+        baseline_path = Path(args[i + 1])
+        del args[i:i + 2]
+    save_baseline = '--save-baseline' in args
+    args = [a for a in args if a != '--save-baseline']
+    baseline_path = baseline_path or DEFAULT_BASELINE
+
+    manifest = Path(args[0]) if args else DEFAULT_MANIFEST
+    with open(manifest, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+
+    db = load_database()
+    truth = GroundTruth(db)
+    FastSATImporter = load_importer_class()
+    results = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'pdfs': {}}
+    for job in jobs:
+        results['pdfs'][Path(job['pdf']).name] = bench_pdf(FastSATImporter, job, truth, db)
+
+    print_results(results)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {output}")
+
+    if save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📌 Baseline saved to {baseline_path}")
+        return
+
+    baseline = {}
+    if baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    else:
+        print(f"\nℹ️  No baseline at {baseline_path} - run with --save-baseline to create one")
+
+    regressions = compare(results, baseline)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) vs {baseline_path}:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print(f"\n✅ No regressions vs {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for the question database
+
+Compares encode/decode time and payload size for every codec db_format
+can use here (stdlib json, orjson, msgpack) on:
+    - the real questions-database.json
+    - synthetic databases built by cloning real questions (default 50,000)
+
+Usage:
+    python3 bulk-import/bench-serialization.py [db-file] [synthetic-size ...]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import db_format
+
+REPEATS = 5
+
+
+def build_codecs():
+    """Every (name, encode, decode) pair available in this environment"""
+    codecs = [
+        ('json pretty (old)',
+         lambda d: json.dumps(d, indent=2, ensure_ascii=False).encode('utf-8'),
+         lambda b: json.loads(b.decode('utf-8'))),
+        ('json compact',
+         lambda d: json.dumps(d, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+         lambda b: json.loads(b.decode('utf-8'))),
+    ]
+    if db_format.orjson is not None:
+        codecs.append(('orjson compact', db_format.orjson.dumps, db_format.orjson.loads))
+    if db_format.msgpack is not None:
+        codecs.append(('msgpack',
+                       lambda d: db_format.msgpack.packb(d, use_bin_type=True),
+                       lambda b: db_format.msgpack.unpackb(b, raw=False)))
+    return codecs
+
+
+def synthetic_database(base, size):
+    """Clone real questions until the database has `size` entries"""
+    db = []
+    for i in range(size):
+        q = dict(base[i % len(base)])
+        q['id'] = i + 1
+        q['testId'] = f"synthetic{i // 98}"
+        db.append(q)
+    return db
+
+
+def best_time(fn, arg):
+    """Best wall time over REPEATS runs, in milliseconds"""
+    best = None
+    result = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(arg)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench(label, db, codecs):
+    print(f"\n📊 {label}: {len(db):,} questions")
+    print(f"   {'codec':<20} {'bytes':>14} {'encode ms':>11} {'decode ms':>11}")
+    for name, encode, decode in codecs:
+        encode_ms, payload = best_time(encode, db)
+        decode_ms, _ = best_time(decode, payload)
+        print(f"   {name:<20} {len(payload):>14,} {encode_ms:>11.1f} {decode_ms:>11.1f}")
+
+
+def main():
+    db_path = Path(sys.argv[1]) if len(sys.argv) > 1 else db_format.DB_PATH
+    sizes = [int(arg) for arg in sys.argv[2:]] or [50000]
+
+    real_db = db_format.load_database(db_path)
+    if not real_db:
+        print(f"❌ Error: no questions found in {db_path}")
+        sys.exit(1)
+
+    codecs = build_codecs()
+    print("=" * 80)
+    print("⏱️  QUESTION DATABASE SERIALIZATION BENCHMARK")
+    print(f"   Codecs: {', '.join(name for name, _, _ in codecs)}")
+    print("=" * 80)
+
+    bench(f"Real database ({db_path})", real_db, codecs)
+    for size in sizes:
+        bench("Synthetic database", synthetic_database(real_db, size), codecs)
+
+
+if __name__ == "__main__":
+    main()
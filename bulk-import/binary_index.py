@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Read-only binary index of the question database
+
+questions-database.json is exported to questions-database.idx, which server
+workers mmap instead of each parsing (and keeping) their own copy of the
+JSON. The OS page cache shares the file between workers, opening it is
+instant, and a question is only decoded when it is actually requested.
+
+Layout (little-endian):
+    header        MAGIC, version, record size, counts and section offsets
+    records       one fixed-width record per question, in database order:
+                  presence bits, int fields, (offset, length) per string field
+                  and one (offset, length) JSON blob for everything else
+    tests         per testId: (offset, length) of the name, first member, count
+    members       record numbers grouped by test (u32)
+    heap          UTF-8 strings, each distinct string stored once
+
+Usage:
+    python3 bulk-import/binary_index.py export [db-file]
+    python3 bulk-import/binary_index.py show <testId> [db-file]
+"""
+
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+from db_format import DB_PATH, load_database, write_bytes_atomic
+
+MAGIC = b'SATQ'
+VERSION = 1
+
+INT_FIELDS = ('id', 'questionNumber', 'totalQuestions', 'testNumber')
+STRING_FIELDS = ('testId', 'testName', 'module', 'date', 'region', 'subject', 'questionType',
+                 'questionText', 'prompt', 'difficulty', 'topic', 'explanation', 'imageUrl')
+
+HEADER = struct.Struct('<4sHHIIIIIII')
+RECORD = struct.Struct('<I' + 'i' * len(INT_FIELDS) + 'II' * (len(STRING_FIELDS) + 1))
+TEST = struct.Struct('<IIII')
+MEMBER = struct.Struct('<I')
+
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def index_path(db_path=DB_PATH):
+    return Path(db_path).with_suffix('.idx')
+
+
+class HeapWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = {}
+
+    def add(self, text):
+        encoded = text.encode('utf-8')
+        if encoded not in self.offsets:
+            self.offsets[encoded] = len(self.data)
+            self.data += encoded
+        return self.offsets[encoded], len(encoded)
+
+
+def encode(db):
+    """Serialize a question list into the index format"""
+    heap = HeapWriter()
+    records = bytearray()
+    members_by_test = {}
+
+    for record_no, q in enumerate(db):
+        presence = 0
+        ints = []
+        strings = []
+        extra = {}
+
+        for bit, field in enumerate(INT_FIELDS):
+            value = q.get(field)
+            if field in q and type(value) is int and INT_MIN <= value <= INT_MAX:
+                presence |= 1 << bit
+                ints.append(value)
+            else:
+                ints.append(0)
+
+        for bit, field in enumerate(STRING_FIELDS, start=len(INT_FIELDS)):
+            value = q.get(field)
+            if field in q and isinstance(value, str):
+                presence |= 1 << bit
+                strings.extend(heap.add(value))
+            else:
+                strings.extend((0, 0))
+
+        for field, value in q.items():
+            known = field in INT_FIELDS or field in STRING_FIELDS
+            if not known or not (presence >> (INT_FIELDS + STRING_FIELDS).index(field)) & 1:
+                extra[field] = value
+        blob = json.dumps(extra, ensure_ascii=False, separators=(',', ':')) if extra else ''
+        strings.extend(heap.add(blob))
+
+        records += RECORD.pack(presence, *ints, *strings)
+        members_by_test.setdefault(str(q.get('testId', '')), []).append(record_no)
+
+    tests = bytearray()
+    members = bytearray()
+    member_count = 0
+    for test_id in sorted(members_by_test):
+        offset, length = heap.add(test_id)
+        tests += TEST.pack(offset, length, member_count, len(members_by_test[test_id]))
+        for record_no in members_by_test[test_id]:
+            members += MEMBER.pack(record_no)
+        member_count += len(members_by_test[test_id])
+
+    records_off = HEADER.size
+    tests_off = records_off + len(records)
+    members_off = tests_off + len(tests)
+    heap_off = members_off + len(members)
+
+    header = HEADER.pack(MAGIC, VERSION, RECORD.size, len(db), len(members_by_test),
+                         records_off, tests_off, members_off, heap_off, len(heap.data))
+    return header + bytes(records) + bytes(tests) + bytes(members) + bytes(heap.data)
+
+
+def export(db, path):
+    write_bytes_atomic(path, encode(db))
+
+
+class BinaryIndex:
+    """mmap-backed, read-only view of an exported index"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, record_size, self.count, self.test_count,
+         self.records_off, self.tests_off, self.members_off,
+         self.heap_off, self.heap_len) = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{self.path} is not a version {VERSION} question index")
+
+        self.tests = {}
+        for i in range(self.test_count):
+            offset, length, first, count = TEST.unpack_from(self.buf, self.tests_off + i * TEST.size)
+            self.tests[self.string(offset, length)] = (first, count)
+
+        self._ids = None
+
+    def close(self):
+        self.buf.close()
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for record_no in range(self.count):
+            yield self.question(record_no)
+
+    def string(self, offset, length):
+        start = self.heap_off + offset
+        return self.buf[start:start + length].decode('utf-8')
+
+    def question(self, record_no):
+        """Decode one question back into the dict stored in the JSON database"""
+        values = RECORD.unpack_from(self.buf, self.records_off + record_no * RECORD.size)
+        presence = values[0]
+        q = {}
+
+        for bit, field in enumerate(INT_FIELDS):
+            if presence >> bit & 1:
+                q[field] = values[1 + bit]
+
+        base = 1 + len(INT_FIELDS)
+        for i, field in enumerate(STRING_FIELDS):
+            if presence >> (len(INT_FIELDS) + i) & 1:
+                q[field] = self.string(values[base + 2 * i], values[base + 2 * i + 1])
+
+        extra_off, extra_len = values[-2], values[-1]
+        if extra_len:
+            q.update(json.loads(self.string(extra_off, extra_len)))
+        return q
+
+    def test_ids(self):
+        return list(self.tests)
+
+    def questions_for_test(self, test_id):
+        first, count = self.tests.get(test_id, (0, 0))
+        result = []
+        for i in range(first, first + count):
+            record_no, = MEMBER.unpack_from(self.buf, self.members_off + i * MEMBER.size)
+            result.append(self.question(record_no))
+        return result
+
+    def questions_by_id(self, ids):
+        """Questions whose id is in `ids`, in database order"""
+        if self._ids is None:
+            id_bit = 1 << INT_FIELDS.index('id')
+            self._ids = {}
+            for record_no in range(self.count):
+                values = RECORD.unpack_from(self.buf, self.records_off + record_no * RECORD.size)
+                if values[0] & id_bit:
+                    self._ids[str(values[1])] = record_no
+        wanted = sorted(self._ids[key] for key in ids if key in self._ids)
+        return [self.question(record_no) for record_no in wanted]
+
+
+def ensure_index(db_path=DB_PATH):
+    """Path to an up-to-date index, re-exporting it if the database is newer"""
+    db_path = Path(db_path)
+    idx = index_path(db_path)
+    if not idx.exists() or idx.stat().st_mtime < db_path.stat().st_mtime:
+        export(load_database(db_path), idx)
+    return idx
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('export', 'show'):
+        print("Usage: python3 bulk-import/binary_index.py <export|show> [args]")
+        sys.exit(1)
+
+    if sys.argv[1] == 'export':
+        db_path = Path(sys.argv[2]) if len(sys.argv) > 2 else DB_PATH
+        db = load_database(db_path)
+        idx = index_path(db_path)
+        export(db, idx)
+        check = BinaryIndex(idx)
+        assert list(check) == db, "index round-trip mismatch"
+        print(f"✅ Exported {len(db)} questions in {check.test_count} tests to {idx} "
+              f"({idx.stat().st_size:,} bytes)")
+    else:
+        if len(sys.argv) < 3:
+            print("Usage: python3 bulk-import/binary_index.py show <testId> [db-file]")
+            sys.exit(1)
+        db_path = Path(sys.argv[3]) if len(sys.argv) > 3 else DB_PATH
+        index = BinaryIndex(ensure_index(db_path))
+        for q in index.questions_for_test(sys.argv[2]):
+            print(f"   #{q.get('id')} {q.get('module')} Q{q.get('questionNumber')}: {q.get('questionText', '')[:60]}")
+
+
+if __name__ == "__main__":
+    main()
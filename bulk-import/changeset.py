@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Database changesets: preview what a writer would do, apply it later
+
+Run any script that saves questions-database.json in dry-run mode and, instead
+of rewriting the database, save_database() stores what would change:
+
+    inserts   new questions
+    updates   per question, every field that changes: {field: {'old', 'new'}}
+    deletes   questions that would disappear
+    images    image store links the run would create (the blobs are already
+              stored; nothing is linked or served until the changeset is applied)
+
+    QUESTIONS_DB_DRY_RUN=1 python3 bulk-import/merge-usv1-updates.py    # -> questions-database.changes.json
+    QUESTIONS_DB_DRY_RUN=usv1.json python3 bulk-import/...              # -> usv1.json
+    python3 bulk-import/fast-import.py ... --dry-run                    # same, for the importers
+
+The changeset is plain JSON, so it can be reviewed, diffed or passed around.
+Applying it loads the database once, applies every change by id and saves once
+(revision log, snapshot and index hooks included). If the database changed
+since the changeset was made, every touched field must still hold its old
+value, otherwise nothing is applied (unless --force). Inserts whose id was
+taken since get the next free id; inserts of a question the database already
+has (same test, module and number) are never applied, not even with --force.
+
+The image blobs a dry run stored are pinned until the changeset is applied or
+discarded, so `image_store.py gc` doesn't delete them in between.
+
+Usage:
+    python3 bulk-import/changeset.py show <changes.json>
+    python3 bulk-import/changeset.py apply <changes.json> [--force] [db-file]
+    python3 bulk-import/changeset.py discard <changes.json>
+    python3 bulk-import/changeset.py diff <old-db> <new-db> [changes.json]
+"""
+
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+from db_format import DB_PATH, dumps, load_database, loads, save_database, write_bytes_atomic
+
+_MISSING = object()
+
+
+def file_sha256(path):
+    path = Path(path)
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else None
+
+
+def key_of(q):
+    return [q.get('testId'), q.get('module'), q.get('questionNumber')]
+
+
+class Changeset:
+    def __init__(self, label=''):
+        self.label = label
+        self.created = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.base = {}          # path, sha256 and size of the database it was made against
+        self.inserts = []
+        self.updates = []       # {'id', 'key', 'fields': {field: {'old', 'new'}}}
+        self.deletes = []       # {'id', 'key'}
+        self.images = []        # {'logical', 'sha256', 'ext'}
+        self.renumbered = {}    # insert id -> id it was applied under
+        self.path = None        # file it was loaded from; its image pins go once applied
+
+    @classmethod
+    def diff(cls, old_db, new_db, label=''):
+        """Changes that turn old_db into new_db, matched by id"""
+        changes = cls(label)
+        old_by_id = {q.get('id'): q for q in old_db}
+        seen = set()
+
+        for q in new_db:
+            q_id = q.get('id')
+            seen.add(q_id)
+            old = old_by_id.get(q_id)
+            if old is None:
+                changes.inserts.append(q)
+                continue
+            if old == q:
+                continue
+            fields = {}
+            for field in old.keys() | q.keys():
+                before, after = old.get(field, _MISSING), q.get(field, _MISSING)
+                if before != after:
+                    fields[field] = {k: v for k, v in (('old', before), ('new', after)) if v is not _MISSING}
+            changes.updates.append({'id': q_id, 'key': key_of(q), 'fields': fields})
+
+        for q_id, old in old_by_id.items():
+            if q_id not in seen:
+                changes.deletes.append({'id': q_id, 'key': key_of(old)})
+        return changes
+
+    @property
+    def empty(self):
+        return not (self.inserts or self.updates or self.deletes or self.images)
+
+    def to_dict(self):
+        return {'label': self.label, 'created': self.created, 'base': self.base, 'inserts': self.inserts,
+                'updates': self.updates, 'deletes': self.deletes, 'images': self.images}
+
+    def save(self, path):
+        write_bytes_atomic(path, dumps(self.to_dict(), 'review'))
+
+    @classmethod
+    def load(cls, path):
+        data = loads(Path(path).read_bytes())
+        changes = cls(data.get('label', ''))
+        changes.created = data.get('created', '')
+        changes.base = data.get('base', {})
+        changes.inserts = data.get('inserts', [])
+        changes.updates = data.get('updates', [])
+        changes.deletes = data.get('deletes', [])
+        changes.images = data.get('images', [])
+        changes.path = Path(path)
+        return changes
+
+    def print_preview(self, limit=20):
+        print(f"📋 Changeset{f' ({self.label})' if self.label else ''}: {len(self.inserts)} inserts, "
+              f"{len(self.updates)} updates, {len(self.deletes)} deletes, {len(self.images)} images")
+        for q in self.inserts[:limit]:
+            print(f"   + #{q.get('id')} {' '.join(map(str, key_of(q)))}")
+        for update in self.updates[:limit]:
+            print(f"   ~ #{update['id']} {' '.join(map(str, update['key']))}")
+            for field, diff in sorted(update['fields'].items()):
+                print(f"       {field}: {str(diff.get('old', '-'))[:50]!r} -> {str(diff.get('new', '-'))[:50]!r}")
+        for delete in self.deletes[:limit]:
+            print(f"   - #{delete['id']} {' '.join(map(str, delete['key']))}")
+        for image in self.images[:limit]:
+            print(f"   🖼️  {image['logical']}")
+        hidden = sum(max(0, len(items) - limit) for items in (self.inserts, self.updates, self.deletes, self.images))
+        if hidden:
+            print(f"   ... and {hidden} more")
+
+    def conflicts(self, db):
+        """Changes that no longer fit db (it changed since the changeset was made)"""
+        by_id = {q.get('id'): q for q in db}
+        problems = []
+        for update in self.updates:
+            current = by_id.get(update['id'])
+            if current is None:
+                problems.append(f"update #{update['id']}: question is gone")
+                continue
+            for field, diff in update['fields'].items():
+                if current.get(field, _MISSING) != diff.get('old', _MISSING):
+                    problems.append(f"update #{update['id']}: {field} was changed since")
+        for delete in self.deletes:
+            if delete['id'] not in by_id:
+                problems.append(f"delete #{delete['id']}: question is gone")
+        return problems
+
+    def duplicates(self, db):
+        """Inserts of questions db already has - applying them would add a second copy"""
+        by_key = {tuple(key_of(q)): q for q in db if all(key_of(q))}
+        problems = []
+        for q in self.inserts:
+            existing = by_key.get(tuple(key_of(q)))
+            if existing is not None:
+                problems.append(f"insert #{q.get('id')}: {' '.join(map(str, key_of(q)))} "
+                                f"is already #{existing.get('id')}")
+        return problems
+
+    def renumber_inserts(self, db):
+        """Give inserts whose id is taken in db the next free ids; returns {old id: new id}"""
+        taken = {q.get('id') for q in db}
+        next_id = max([q.get('id') or 0 for q in db] + [q.get('id') or 0 for q in self.inserts]) + 1
+        renumbered = {}
+        inserts = []
+        for q in self.inserts:
+            if q.get('id') in taken:
+                renumbered[q.get('id')] = next_id
+                q = dict(q, id=next_id)
+                next_id += 1
+            taken.add(q.get('id'))
+            inserts.append(q)
+        self.inserts = inserts
+        return renumbered
+
+    def apply_to(self, db):
+        """db with every change applied (a new list)"""
+        deleted = {delete['id'] for delete in self.deletes}
+        updates = {update['id']: update['fields'] for update in self.updates}
+        result = []
+        for q in db:
+            q_id = q.get('id')
+            if q_id in deleted:
+                continue
+            if q_id in updates:
+                q = dict(q)
+                for field, diff in updates[q_id].items():
+                    if 'new' in diff:
+                        q[field] = diff['new']
+                    else:
+                        q.pop(field, None)
+            result.append(q)
+        result.extend(self.inserts)
+        return result
+
+    def apply(self, db_path=DB_PATH, force=False):
+        """Apply to the database in one save; returns the problems that stopped it (if any)"""
+        db_path = Path(db_path)
+        db = load_database(db_path)
+        if self.base.get('sha256') != file_sha256(db_path):
+            # --force overrides edited fields, never duplicate questions
+            problems = self.duplicates(db)
+            if problems:
+                return problems
+            problems = self.conflicts(db)
+            if problems and not force:
+                return problems
+            self.renumbered = self.renumber_inserts(db)
+
+        # Imported here because image_store builds on db_format, like this module
+        from image_store import ImageStore
+        store = ImageStore(dry_run=False)
+        if self.images:
+            for image in self.images:
+                store.link(image['logical'], image['sha256'], image['ext'])
+            store.save()
+
+        save_database(self.apply_to(db), db_path, snapshot_label=f"changeset: {self.label}", changes=False)
+        if self.images and self.path is not None:
+            store.unpin(self.path)
+        return []
+
+
+def discard(path):
+    """Delete a changeset and release the image blobs it pinned"""
+    from image_store import ImageStore
+
+    ImageStore(dry_run=True).unpin(path)
+    Path(path).unlink()
+
+
+def write_changeset(db, db_path, out_path, label=''):
+    """save_database() in dry-run mode: store the changes instead of the database"""
+    from image_store import STAGED_LINKS, ImageStore
+
+    changes = Changeset.diff(load_database(db_path), db, label)
+    changes.base = {'path': str(db_path), 'sha256': file_sha256(db_path)}
+    changes.images = list(STAGED_LINKS)
+    changes.save(out_path)
+    if changes.images:
+        ImageStore(dry_run=True).pin(out_path, changes.images)
+    print(f"\n🔎 Dry run - {db_path} not written")
+    changes.print_preview()
+    print(f"   📄 Changeset written to {out_path} (apply: python3 bulk-import/changeset.py apply {out_path})")
+    return changes
+
+
+def main():
+    commands = ('show', 'apply', 'discard', 'diff')
+    if len(sys.argv) < 3 or sys.argv[1] not in commands:
+        print(f"Usage: python3 bulk-import/changeset.py <{'|'.join(commands)}> <changes.json | old-db new-db> [args]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    args = sys.argv[2:]
+    if command == 'show':
+        Changeset.load(args[0]).print_preview(limit=10 ** 9)
+
+    elif command == 'apply':
+        force = '--force' in args
+        args = [a for a in args if a != '--force']
+        db_path = Path(args[1]) if len(args) > 1 else DB_PATH
+        changes = Changeset.load(args[0])
+        start = time.perf_counter()
+        problems = changes.apply(db_path, force)
+        if problems:
+            print(f"❌ {db_path} changed since the changeset was made - nothing applied:")
+            for problem in problems[:20]:
+                print(f"   {problem}")
+            if not any(p.startswith('insert') for p in problems):
+                print("   (--force applies it anyway)")
+            sys.exit(1)
+        for old_id, new_id in changes.renumbered.items():
+            print(f"   🔢 #{old_id} was taken - inserted as #{new_id}")
+        print(f"✅ Applied {len(changes.inserts)} inserts, {len(changes.updates)} updates, "
+              f"{len(changes.deletes)} deletes, {len(changes.images)} images "
+              f"in {time.perf_counter() - start:.2f}s")
+
+    elif command == 'discard':
+        discard(args[0])
+        print(f"🗑️  Discarded {args[0]}")
+
+    else:
+        changes = Changeset.diff(load_database(args[0]), load_database(args[1]), f"{args[0]} -> {args[1]}")
+        changes.base = {'path': args[0], 'sha256': file_sha256(args[0])}
+        changes.print_preview()
+        if len(args) > 2:
+            changes.save(args[2])
+            print(f"   📄 Changeset written to {args[2]}")
+
+
+if __name__ == "__main__":
+    main()
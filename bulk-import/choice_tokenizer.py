@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Single-pass answer choice tokenizer
+
+Finds every choice marker ("A)" ... "D)") in one left-to-right scan, then
+answers both questions the importers ask from that one marker list:
+
+    stem, choices = split_choices(text)    # "Which ... ?", ['alpha', 'beta', 'gamma', 'delta']
+    strip_choices(text)                     # just the stem
+    parse_choices(text)                     # just the 4 choices, or None
+    count_markers(text)                     # how many A)-D) markers
+
+It replaces per-letter regexes with lazy DOTALL spans and lookaheads (one
+full rescan per letter, per question) and the A)...D) search that re-sliced
+the text at every "A)" - quadratic on long passages with many markers.
+Every step here is linear in the length of the text; see bench-choices.py.
+"""
+
+import re
+from collections import namedtuple
+
+# Choice markers are matched case-insensitively for stem stripping (as before)
+# and case-sensitively for parsing choices
+MARKER_LETTERS = 'ABCDabcd'
+
+# A question-number line or module header ends choice D. Each whitespace run
+# that holds a line break is tried once, from its first line break, so long
+# runs of blank lines stay linear.
+LINE_BREAK = re.compile(r'\n\s*')
+STOP_LINE = re.compile(r'\d+\s*\n|Module\s')
+
+Marker = namedtuple('Marker', 'pos end letter spaced')
+
+# Choices are cut before a trailing math equation from the next question ("1 s = ").
+# Starting only at the first digit of a number keeps long digit runs linear.
+EQUATION = re.compile(r'(?<!\d)\d+\s+[a-z]\s*=\s*')
+TRAILING_NUMBER = re.compile(r'\s+\d+\s*$')
+WHITESPACE = re.compile(r'\s*')
+
+MAX_CHOICES_SPAN = 2000  # characters from A) to D)
+
+
+class Tokens:
+    def __init__(self, text):
+        self.text = text
+        self.markers = []   # Marker per A)-D) / a)-d)
+
+        # str.find skips plain text at C speed; only ")" costs a Python step
+        pos = text.find(')', 1)
+        while pos != -1:
+            letter = text[pos - 1]
+            if letter in MARKER_LETTERS:
+                self.markers.append(Marker(pos - 1, pos + 1, letter, text[pos + 1:pos + 2].isspace()))
+            pos = text.find(')', pos + 1)
+
+    def stem_end(self):
+        """Where the choices start: the last A) followed by B), C), D) in order"""
+        # Walking backwards, carry the chain end (position of D) for the
+        # nearest D, C->D and B->C->D to the right
+        d = cd = bcd = None
+        for marker in reversed(self.markers):
+            letter = marker.letter.upper()
+            if letter == 'D':
+                d = marker.pos
+            elif letter == 'C':
+                cd = d
+            elif letter == 'B':
+                bcd = cd
+            elif bcd is not None and bcd - marker.pos < MAX_CHOICES_SPAN:
+                return marker.pos
+
+        # Far-apart choices: the first A) whose B), C), D) follow, each followed by whitespace
+        waiting_for = 'A'
+        start = None
+        for marker in self.markers:
+            if marker.spaced and marker.letter.upper() == waiting_for:
+                if waiting_for == 'A':
+                    start = marker.pos
+                if waiting_for == 'D':
+                    return start
+                waiting_for = chr(ord(waiting_for) + 1)
+        return None
+
+    def stop(self, start):
+        """Where choice D ends: the next number line or module header, or the end of the text"""
+        for match in LINE_BREAK.finditer(self.text, start):
+            if STOP_LINE.match(self.text, match.end()):
+                return match.start()
+        return len(self.text)
+
+    def choices(self):
+        """The 4 choices (first "A) " ... first "D) "), or None if one is missing"""
+        firsts = {}
+        for i, marker in enumerate(self.markers):
+            if marker.letter in 'ABCD' and marker.spaced and marker.letter not in firsts:
+                firsts[marker.letter] = i
+        if len(firsts) < 4:
+            return None
+
+        choices = []
+        for letter in 'ABCD':
+            i = firsts[letter]
+            # The choice starts after the whitespace that follows its marker
+            start = WHITESPACE.match(self.text, self.markers[i].end).end()
+            end = len(self.text)
+            if letter == 'D':
+                end = self.stop(start)
+            else:
+                # Ends at the next marker of a later letter
+                for marker in self.markers[i + 1:]:
+                    if marker.letter in 'ABCD' and marker.letter > letter and marker.pos >= start:
+                        end = marker.pos
+                        break
+            choices.append(clean_choice(self.text[start:end]))
+        return choices
+
+
+def clean_choice(choice_text):
+    choice_text = ' '.join(choice_text.split())
+    match = EQUATION.search(choice_text)
+    if match:
+        choice_text = choice_text[:match.start()].strip()
+    return TRAILING_NUMBER.sub('', choice_text).strip()
+
+
+def split_choices(text):
+    """(stem, choices) - choices is None unless all 4 were found"""
+    if not text:
+        return text, None
+    tokens = Tokens(text)
+    end = tokens.stem_end()
+    stem = text[:end].strip() if end is not None else text.strip()
+    return stem, tokens.choices()
+
+
+def strip_choices(text):
+    """Question text without the embedded A) B) C) D) choices"""
+    return split_choices(text)[0]
+
+
+def parse_choices(text):
+    if not text:
+        return None
+    return Tokens(text).choices()
+
+
+def count_markers(text):
+    return sum(text.count(f'{letter})') for letter in 'ABCD')
@@ -6,6 +6,7 @@ Since PDF is image-based, creates placeholder structure based on standard SAT fo
 
 import json
 from pathlib import Path
+from db_format import load_database, save_database
 
 def create_asiav6_structure():
     """Create question structure for Asia v6"""
@@ -53,8 +54,7 @@ def create_asiav6_structure():
     
     # Read existing database
     db_path = Path("questions-database.json")
-    with open(db_path, 'r', encoding='utf-8') as f:
-        database = json.load(f)
+    database = load_database(db_path)
     
     # Find next ID
     max_id = max((q.get('id', 0) for q in database), default=0)
@@ -128,8 +128,7 @@ def create_asiav6_structure():
     database.extend(questions)
     
     # Save database
-    with open(db_path, 'w', encoding='utf-8') as f:
-        json.dump(database, f, indent=2, ensure_ascii=False)
+    save_database(database, db_path)
     
     print(f"\n✅ Created {len(questions)} placeholder questions")
     print(f"   Added to questions-database.json")
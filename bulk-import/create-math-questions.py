@@ -1,116 +1,40 @@
 #!/usr/bin/env python3
 """
 Create Math Module 1 questions from PDF and match with images
+
+Questions, choices and images come from extraction_engine.py, which finds
+Math Module 1 from its header and matches images by where they are on the
+page instead of a hand-written page -> question table.
 """
 
-import fitz
-import re
 import json
 import csv
 from pathlib import Path
+from extraction_engine import ExtractionEngine
+
+PDF_PATH = 'bulk-import/202503asiav1 (1).pdf'
+MODULE = 'Math Module 1'
+IMAGE_FOLDER = Path('bulk-import/images')
 
 def extract_math_questions():
-    """Extract all Math Module 1 questions"""
-    pdf_path = 'bulk-import/202503asiav1 (1).pdf'
-    doc = fitz.open(pdf_path)
-    
-    # Math Module 1 is on pages 19-26
-    all_text = ""
-    for page_num in range(18, min(26, len(doc))):
-        page = doc[page_num]
-        all_text += page.get_text() + "\n"
-    
-    doc.close()
-    
-    # Parse questions - they're numbered 1-22
-    questions = []
-    
-    # Split by question numbers
-    # Questions start with just a number on its own line
-    lines = all_text.split('\n')
-    
-    current_q = None
-    q_text_lines = []
-    
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        
-        # Check if this line starts a new question (just a number 1-22)
-        q_match = re.match(r'^(\d+)$', stripped)
-        if q_match:
-            q_num = int(q_match.group(1))
-            if 1 <= q_num <= 22:
-                # Save previous question
-                if current_q is not None:
-                    questions.append(current_q)
-                
-                # Start new question
-                current_q = {
-                    'number': q_num,
-                    'text': '',
-                    'choices': [],
-                    'page': None  # Will determine from images
-                }
-                q_text_lines = []
-                continue
-        
-        # If we're in a question, collect text
-        if current_q is not None:
-            # Check if this is a choice (A), B), C), D))
-            choice_match = re.match(r'^([A-D])\)\s*(.+)$', stripped)
-            if choice_match:
-                current_q['choices'].append(choice_match.group(2).strip())
-            elif stripped and not stripped.startswith('Math Module') and 'QUESTIONS' not in stripped:
-                q_text_lines.append(stripped)
-    
-    # Add last question
-    if current_q is not None:
-        questions.append(current_q)
-    
-    # Match with images based on page numbers
-    images_folder = Path('bulk-import/images')
-    images = list(images_folder.glob('*.png'))
-    
-    # Page mapping: Based on what we saw
-    # Page 20 = Questions 1-2
-    # Page 22 = Question 3
-    # Page 23 = Questions 4-7
-    # Page 24 = Questions 8-9
-    # Page 25 = Question 10
-    # Page 26 = Questions 11-22
-    
-    page_to_q = {
-        20: [1, 2],
-        22: [3],
-        23: [4, 5, 6, 7],
-        24: [8, 9],
-        25: [10],
-        26: list(range(11, 23))
-    }
-    
-    # Match images to questions
-    for img in images:
-        match = re.search(r'page(\d+)_img(\d+)', img.name)
-        if match:
-            page = int(match.group(1))
-            img_num = int(match.group(2))
-            
-            if page in page_to_q:
-                q_nums = page_to_q[page]
-                # Assign to first question on that page for now
-                # User can adjust
-                for q in questions:
-                    if q['number'] in q_nums:
-                        if 'images' not in q:
-                            q['images'] = []
-                        q['images'].append({
-                            'filename': img.name,
-                            'path': str(img),
-                            'img_num': img_num
-                        })
-                        break
-    
-    return questions
+    """Extract all Math Module 1 questions, writing the images they use"""
+    engine = ExtractionEngine(PDF_PATH)
+    questions = engine.extract([MODULE]).get(MODULE, {}).get('questions', {})
+    
+    # Images go where import.py looks for them
+    sink = engine.image_sink()
+    for q_num, q in questions.items():
+        images = []
+        for idx, name in enumerate(q['images']):
+            suffix = f"option{'ABCD'[idx]}" if q['image_type'] == 'choices' else 'graph'
+            url = sink.place(engine.image_refs[name], IMAGE_FOLDER / f"q{q_num}-{suffix}")
+            if url:
+                images.append({'filename': Path(url).name, 'path': url, 'img_num': idx + 1})
+        q['images'] = images
+    sink.store.save()
+    engine.close()
+    
+    return [questions[q_num] for q_num in sorted(questions)]
 
 def create_csv_rows(questions):
     """Create CSV rows for import"""
@@ -120,11 +44,10 @@ def create_csv_rows(questions):
         # Clean up question text
         text = q['text'].strip()
         if not text:
-            # Try to reconstruct from choices context
             text = "Math question " + str(q['number'])
         
         # Get choices
-        choices = q['choices']
+        choices = list(q['choices'])
         while len(choices) < 4:
             choices.append('')
         
@@ -132,22 +55,21 @@ def create_csv_rows(questions):
         image_name = ''
         image_choices = []
         
-        if 'images' in q and q['images']:
-            if len(q['images']) == 4:
-                # Math question with 4 graph choices
-                image_choices = [img['filename'] for img in sorted(q['images'], key=lambda x: x['img_num'])]
-            elif len(q['images']) == 1:
-                # Single image (graph/chart)
-                image_name = f"q{q['number']}-graph.png"
+        if q['image_type'] == 'choices':
+            # Math question with 4 graph choices
+            image_choices = [img['filename'] for img in q['images']]
+        elif q['images']:
+            # Single image (graph/chart)
+            image_name = q['images'][0]['filename']
         
         row = {
             'question_number': q['number'],
             'question_text': text[:500],  # Limit length
             'prompt': '',
-            'choice_a': choices[0] if len(choices) > 0 else '',
-            'choice_b': choices[1] if len(choices) > 1 else '',
-            'choice_c': choices[2] if len(choices) > 2 else '',
-            'choice_d': choices[3] if len(choices) > 3 else '',
+            'choice_a': choices[0],
+            'choice_b': choices[1],
+            'choice_c': choices[2],
+            'choice_d': choices[3],
             'correct_answer': '',  # Fill manually
             'explanation': '',  # Fill manually
             'image_name': image_name,
@@ -183,7 +105,7 @@ def main():
         print(f"\nQuestion {q['number']}:")
         print(f"  Text: {q['text'][:80]}...")
         print(f"  Choices: {len(q['choices'])}")
-        if 'images' in q:
+        if q['images']:
             print(f"  Images: {len(q['images'])}")
     
     # Create CSV rows
@@ -213,4 +135,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
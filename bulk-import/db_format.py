@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Question database serialization
+
+One place that knows how questions-database.json is written and read:
+    compact  - minified JSON, what the server ships to browsers (default)
+    review   - indent=2 JSON, only for eyeballing diffs
+    msgpack  - binary sidecar, only when the msgpack package is installed
+
+orjson is used automatically for compact JSON when it is installed;
+the output is byte-for-byte valid JSON either way.
+
+Setting QUESTIONS_DB_DRY_RUN (to 1 or a file name) makes save_database() write
+a changeset of what would change instead of the database - see changeset.py.
+
+save_database() holds database_lock() while it writes the database and the
+files derived from it (revision log, binary index), so server workers wait for
+them instead of each rebuilding them.
+
+Usage:
+    python3 bulk-import/db_format.py compact [db-file]
+    python3 bulk-import/db_format.py review [db-file] [out-file]
+    python3 bulk-import/db_format.py msgpack [db-file]
+"""
+
+import json
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+DB_PATH = Path("questions-database.json")
+FORMATS = ('compact', 'review', 'msgpack')
+DRY_RUN_ENV = 'QUESTIONS_DB_DRY_RUN'
+
+
+def dumps(data, fmt='compact'):
+    """Encode data to bytes in the given format"""
+    if fmt == 'compact':
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if fmt == 'review':
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed (pip install msgpack)")
+        return msgpack.packb(data, use_bin_type=True)
+    raise ValueError(f"Unknown format: {fmt}")
+
+
+def loads(raw, fmt=None):
+    """Decode bytes produced by dumps(); JSON flavours are auto-detected"""
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed (pip install msgpack)")
+        return msgpack.unpackb(raw, raw=False)
+    if orjson is not None:
+        return orjson.loads(raw)
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8')
+    return json.loads(raw)
+
+
+def write_bytes_atomic(path, payload):
+    """Write payload next to path and rename over it, so readers never see half a file"""
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def load_database(path=DB_PATH):
+    """Load the question list, or [] if the file does not exist yet"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    fmt = 'msgpack' if path.suffix == '.msgpack' else None
+    with open(path, 'rb') as f:
+        return loads(f.read(), fmt)
+
+
+def changes_path(db_path=DB_PATH):
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.stem + '.changes.json')
+
+
+def dry_run_path(db_path=DB_PATH):
+    """Where a dry run writes its changeset, or None when writes are real"""
+    value = os.environ.get(DRY_RUN_ENV)
+    if not value or value == '0':
+        return None
+    return changes_path(db_path) if value == '1' else Path(value)
+
+
+@contextmanager
+def database_lock(path=DB_PATH):
+    """Exclusive lock (<db>.lock) on the database and its derived files, across processes"""
+    if fcntl is None:
+        yield
+        return
+    path = Path(path)
+    with open(path.with_name(path.stem + '.lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def save_database(db, path=DB_PATH, fmt='compact', track_changes=True, snapshot_label=None, changes=None):
+    """Save the question list; served files should stay compact
+
+    changes: a path to write a changeset to instead (dry run), False to always
+    write; by default QUESTIONS_DB_DRY_RUN decides
+    """
+    if changes is None:
+        changes = dry_run_path(path)
+    if changes:
+        from changeset import write_changeset
+        write_changeset(db, path, changes, snapshot_label or Path(sys.argv[0]).name)
+        return
+
+    if fmt != 'compact' or not track_changes:
+        write_bytes_atomic(path, dumps(db, fmt))
+        return
+
+    # Imported here because these modules build on this one
+    from question_store import record_changes
+    from snapshots import take_snapshot
+    from binary_index import export, index_path
+    with database_lock(path):
+        write_bytes_atomic(path, dumps(db, fmt))
+        record_changes(db, path)
+        take_snapshot(db, path, snapshot_label or Path(sys.argv[0]).name)
+        export(db, index_path(path))
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in FORMATS:
+        print("Usage: python3 bulk-import/db_format.py <compact|review|msgpack> [db-file] [out-file]")
+        sys.exit(1)
+
+    fmt = sys.argv[1]
+    db_path = Path(sys.argv[2]) if len(sys.argv) > 2 else DB_PATH
+    db = load_database(db_path)
+
+    if fmt == 'compact':
+        out_path = db_path
+    elif fmt == 'review':
+        out_path = Path(sys.argv[3]) if len(sys.argv) > 3 else db_path.with_suffix('.review.json')
+    else:
+        out_path = db_path.with_suffix('.msgpack')
+
+    save_database(db, out_path, fmt)
+    print(f"✅ Wrote {len(db)} questions to {out_path} ({fmt}, {out_path.stat().st_size:,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
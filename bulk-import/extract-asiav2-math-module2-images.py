@@ -4,10 +4,8 @@ Extract and match images for asiav2 Math Module 2 questions
 """
 
 import fitz  # PyMuPDF
-import json
-import re
 from pathlib import Path
-import shutil
+from db_format import load_database
 
 def extract_math_module2_images():
     pdf_path = 'bulk-import/202503asiav2.pdf'
@@ -15,8 +13,7 @@ def extract_math_module2_images():
     output_folder.mkdir(parents=True, exist_ok=True)
     
     # Load questions database to find Math Module 2 questions
-    with open('questions-database.json', 'r', encoding='utf-8') as f:
-        questions = json.load(f)
+    questions = load_database('questions-database.json')
     
     # Filter for asiav2 Math Module 2 questions
     math_module2_questions = [
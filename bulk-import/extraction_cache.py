@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of per-page PDF extraction results
+
+Every importer and fix-up script used to re-open the same PDFs and re-run
+get_text() on every page. Results are now stored once per
+
+    (page content hash, extractor, extractor version)
+
+under bulk-import/.cache/, so the second run of any script reads them back in
+milliseconds. A page's content hash covers its drawing commands (form XObjects
+included), font programs and image data, so a corrected reprint only
+re-extracts the pages that changed. Image refs hold the PDF's own xref numbers
+and are cached per PDF SHA-256 instead. Bumping an extractor's version
+invalidates just that extractor's entries. fast-import's stage checkpoints
+live next to a PDF's entries (see stage_checkpoints.py), so `clear` removes
+them too.
+
+    cache = ExtractionCache(pdf_path)
+    cache.get('text', 3)          # str, same as doc[3].get_text()
+    cache.get('layout', 3)        # [page_layout.Line, ...]
+    cache.get('ocr', 3)           # the same, OCR'd (pages without a text layer)
+    cache.get('images', 3)        # image refs: xref, rect, ...
+    cache.get('thumbnail', 3)     # small PNG of the page
+    cache.texts()                 # every page's text, in order
+    cache.page_hashes             # content hash of every page
+
+    cached_map_pages(pdf_path, 'layout', workers=4)   # misses run in parallel
+
+Usage:
+    python3 bulk-import/extraction_cache.py warm <pdf> [...]
+    python3 bulk-import/extraction_cache.py stats
+    python3 bulk-import/extraction_cache.py clear
+"""
+
+import hashlib
+import shutil
+import sys
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from db_format import dumps, loads, write_bytes_atomic
+from image_store import sha256_file
+from page_layout import Line, page_lines, page_ocr_lines
+from parallel_extract import FITZ_LOCK, map_pages, page_text, page_image_refs
+
+CACHE_ROOT = Path("bulk-import/.cache")
+THUMBNAIL_SCALE = 0.25
+
+# Bump whenever page_hash() changes, so info.json's stored hashes are redone
+PAGE_HASH_VERSION = 3
+
+_MISSING = object()
+
+
+def font_digest(doc, xref):
+    """Digest of a font's program and ToUnicode map - the same font in another file gets the same one"""
+    _, ext, _, program = doc.extract_font(xref)
+    digest = hashlib.sha256(ext.encode('utf-8'))
+    digest.update(program or b'')
+    kind, value = doc.xref_get_key(xref, 'ToUnicode')
+    if kind == 'xref':
+        digest.update(doc.xref_stream_raw(int(value.split()[0])))
+    return digest.digest()
+
+
+def page_hash(doc, page_num, fonts=None):
+    """Content hash of one page: size, drawing commands (its own and its form XObjects'), fonts and image data
+
+    fonts: xref -> font_digest(), shared between the pages of one document
+    """
+    fonts = {} if fonts is None else fonts
+    page = doc[page_num]
+    digest = hashlib.sha256(repr(tuple(page.rect)).encode('utf-8'))
+    digest.update(page.read_contents())
+    # Text and vector art drawn through `Do` live in form XObjects, nested ones included
+    for xref, name, _, bbox in page.get_xobjects():
+        digest.update(f"{name}|{tuple(bbox)}|{doc.xref_get_key(xref, 'Matrix')[1]}".encode('utf-8'))
+        digest.update(hashlib.sha256(doc.xref_stream_raw(xref)).digest())
+    for font in page.get_fonts():
+        # (xref, ext, type, basefont, name, encoding) - xrefs differ between files,
+        # and a fixed reprint can keep a font's name but change its glyphs
+        if font[0] not in fonts:
+            fonts[font[0]] = font_digest(doc, font[0])
+        digest.update(f"{font[3]}|{font[4]}|{font[5]}".encode('utf-8'))
+        digest.update(fonts[font[0]])
+    for image in page.get_images():
+        digest.update(hashlib.sha256(doc.xref_stream_raw(image[0])).digest())
+    return digest.hexdigest()
+
+
+def page_thumbnail(doc, page_num):
+    pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(THUMBNAIL_SCALE, THUMBNAIL_SCALE))
+    return pix.tobytes('png')
+
+
+def encode_images(refs):
+    return dumps(refs)
+
+
+def decode_images(raw):
+    refs = loads(raw)
+    for ref in refs:
+        if ref.get('rect'):
+            ref['rect'] = tuple(ref['rect'])
+    return refs
+
+
+# kind -> (version, job, file extension, encode, decode)
+# Bump a version whenever its job's output changes.
+EXTRACTORS = {
+    'text': (1, page_text, '.txt', lambda text: text.encode('utf-8'), lambda raw: raw.decode('utf-8')),
+    'layout': (1, page_lines, '.json', lambda lines: dumps([list(line) for line in lines]),
+               lambda raw: [Line(*row) for row in loads(raw)]),
+    'ocr': (1, page_ocr_lines, '.json', lambda lines: dumps([list(line) for line in lines]),
+            lambda raw: [Line(*row) for row in loads(raw)]),
+    'images': (1, page_image_refs, '.json', encode_images, decode_images),
+    'thumbnail': (1, page_thumbnail, '.png', lambda png: png, lambda raw: raw),
+}
+
+# Results that depend only on the page itself, shared by every PDF containing it
+PAGE_CONTENT_KINDS = ('text', 'layout', 'ocr', 'thumbnail')
+
+
+class ExtractionCache:
+    def __init__(self, pdf_path, root=CACHE_ROOT):
+        self.pdf_path = str(pdf_path)
+        self.sha256 = sha256_file(pdf_path)
+        self.root = Path(root) / self.sha256[:2] / self.sha256
+        self.pages_root = Path(root) / "pages"
+        self._doc = None
+        self._info = None
+
+        # Counters for reports
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def doc(self):
+        if self._doc is None:
+            self._doc = fitz.open(self.pdf_path)
+        return self._doc
+
+    def close(self):
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+    @property
+    def info(self):
+        """Page count and page hashes, worked out once per PDF"""
+        if self._info is None:
+            info_path = self.root / "info.json"
+            if info_path.exists():
+                self._info = loads(info_path.read_bytes())
+            if not self._info or self._info.get('page_hash_version') != PAGE_HASH_VERSION:
+                fonts = {}
+                with FITZ_LOCK:
+                    hashes = [page_hash(self.doc, page_num, fonts) for page_num in range(len(self.doc))]
+                self._info = {'pdf': Path(self.pdf_path).name, 'pages': len(hashes),
+                              'page_hash_version': PAGE_HASH_VERSION, 'page_hashes': hashes}
+                self.root.mkdir(parents=True, exist_ok=True)
+                write_bytes_atomic(info_path, dumps(self._info))
+        return self._info
+
+    @property
+    def page_count(self):
+        return self.info['pages']
+
+    @property
+    def page_hashes(self):
+        return self.info['page_hashes']
+
+    def path(self, kind, page_num):
+        version, _, ext, _, _ = EXTRACTORS[kind]
+        if kind in PAGE_CONTENT_KINDS:
+            digest = self.page_hashes[page_num]
+            return self.pages_root / digest[:2] / digest / f"{kind}-v{version}{ext}"
+        return self.root / f"{kind}-v{version}" / f"{page_num:04d}{ext}"
+
+    def load(self, kind, page_num):
+        """Cached value, or _MISSING"""
+        path = self.path(kind, page_num)
+        if not path.exists():
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        return EXTRACTORS[kind][4](path.read_bytes())
+
+    def store(self, kind, page_num, value):
+        path = self.path(kind, page_num)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(path, EXTRACTORS[kind][3](value))
+
+    def get(self, kind, page_num):
+        value = self.load(kind, page_num)
+        if value is _MISSING:
+            with FITZ_LOCK:
+                value = EXTRACTORS[kind][1](self.doc, page_num)
+            self.store(kind, page_num, value)
+        return value
+
+    def texts(self, pages=None):
+        return cached_map_pages(self.pdf_path, 'text', pages, cache=self)
+
+
+def cached_map_pages(pdf_path, kind, pages=None, workers=None, cache=None):
+    """map_pages() for a cached extractor: hits come from disk, misses run in the pool"""
+    cache = cache or ExtractionCache(pdf_path)
+    pages = list(range(cache.page_count)) if pages is None else list(pages)
+
+    results = {page_num: cache.load(kind, page_num) for page_num in pages}
+    missing = [page_num for page_num, value in results.items() if value is _MISSING]
+    if missing:
+        job = EXTRACTORS[kind][1]
+        for page_num, value in zip(missing, map_pages(pdf_path, job, pages=missing, workers=workers)):
+            cache.store(kind, page_num, value)
+            results[page_num] = value
+    return [results[page_num] for page_num in pages]
+
+
+def main():
+    commands = ('warm', 'stats', 'clear')
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print(f"Usage: python3 bulk-import/extraction_cache.py <{'|'.join(commands)}> [args]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == 'warm':
+        for pdf_path in sys.argv[2:]:
+            cache = ExtractionCache(pdf_path)
+            # OCR is slow and only needed for pages without text; the engine fills it in on demand
+            for kind in EXTRACTORS:
+                if kind != 'ocr':
+                    cached_map_pages(pdf_path, kind, cache=cache)
+            print(f"🔥 {pdf_path}: {cache.page_count} pages cached ({cache.hits} entries already were)")
+            cache.close()
+
+    elif command == 'stats':
+        if not CACHE_ROOT.exists():
+            print("✓ Cache is empty")
+            return
+        for info_path in sorted(CACHE_ROOT.glob('*/*/info.json')):
+            info = loads(info_path.read_bytes())
+            files = [p for p in info_path.parent.rglob('*') if p.is_file()]
+            size = sum(p.stat().st_size for p in files)
+            kinds = sorted(p.name for p in info_path.parent.iterdir() if p.is_dir())
+            print(f"   {info['pdf']:<28} {info['pages']:>4} pages  {size / 1024:>8.1f} KB  {', '.join(kinds)}")
+        pages_root = CACHE_ROOT / "pages"
+        if pages_root.exists():
+            files = [p for p in pages_root.rglob('*') if p.is_file()]
+            size = sum(p.stat().st_size for p in files)
+            count = sum(1 for _ in pages_root.glob('*/*'))
+            print(f"   {'(page content, shared)':<28} {count:>4} pages  {size / 1024:>8.1f} KB")
+
+    else:
+        if CACHE_ROOT.exists():
+            shutil.rmtree(CACHE_ROOT)
+        print("🧹 Extraction cache cleared")
+
+
+if __name__ == "__main__":
+    main()
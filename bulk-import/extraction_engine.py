@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+One extraction engine for every PDF layout
+
+fast-import.py, auto-import-pdf.py, extract-asiav6.py and the Math Module 1
+CSV scripts each opened the PDF, scanned its pages for question numbers and
+pulled out images their own way, with hard-coded page ranges such as
+range(18, 26). They now share an ExtractionEngine: page data comes from the
+extraction cache (misses are extracted in parallel), modules are found from
+their headers, and a layout strategy decides how pages turn into questions:
+
+    'text'        PDFs with a text layer (the practice test PDFs)
+    'image-only'  scans: pages without text are OCR'd, then read like 'text'
+    'bluebook'    screenshots of the Bluebook app, one question per page; the
+                  question number comes from "Question 3 of 27" and the app's
+                  chrome (timer, "Mark for Review", ...) is dropped
+
+    engine = ExtractionEngine(pdf_path)               # layout='auto' picks one
+    modules = engine.extract()                        # steps 1 and 3-6 in one call
+    modules['Math Module 1']['questions'][3]          # text, choices, image_type, images
+    answer_key, sources = engine.answer_key(modules)
+
+    # or step by step, as fast-import.py does to checkpoint each step
+    engine.read_pages()
+    modules = engine.detect_modules()
+    questions, regions = engine.module_questions(modules['Math Module 1'])
+    engine.choices(regions[3])                        # ['...', '...', '...', '...'] or None
+    images_by_page, image_refs = engine.find_images()
+    engine.match_images(modules, regions_by_module, images_by_page)
+
+    sink = engine.image_sink()                        # write only the images questions use
+    sink.place(engine.image_refs['p21_img1'], "images/2025-03/asiav1/math-q2")
+
+A new layout is a TextLayout subclass in LAYOUTS: it says whether pages need
+OCR, which lines are chrome, and how a module's lines split into questions.
+"""
+
+import re
+from collections import defaultdict
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from answer_key import KEY_PAGE, read_answer_key
+from choice_tokenizer import count_markers, parse_choices, strip_choices
+from extraction_cache import ExtractionCache, cached_map_pages
+from image_matching import match_images
+from image_sink import ImageSink
+from image_store import ImageStore
+from page_cache import NUMBER_LINE, PageCache
+from page_layout import layout_text, ocr_available, segment_module
+from parallel_extract import FITZ_LOCK
+
+# In the order they're imported and stored
+MODULE_NAMES = ('Reading and Writing Module 1', 'Reading and Writing Module 2', 'Math Module 1', 'Math Module 2')
+
+# Any module header, in one pass over a page's text
+MODULE_HEADER = re.compile('|'.join(re.escape(name) for name in MODULE_NAMES))
+
+MAX_QUESTIONS = {'Reading': 27, 'Math': 22}
+
+# Pages without text a layout is guessed from
+LAYOUT_SAMPLE_PAGES = 3
+
+
+class TextLayout:
+    """PDFs with a text layer: numbered question boxes, headers like "Math Module 1" """
+    name = 'text'
+    ocr = False
+
+    # Pages at the end of the PDF after the last module (the answer key)
+    trailing_pages = 2
+
+    def module_headers(self, text):
+        return set(MODULE_HEADER.findall(text))
+
+    def is_chrome(self, text):
+        """Navigation text that is not part of any question"""
+        return 'CONTINUE' in text or 'QUESTIONS' in text
+
+    def line_text(self, text):
+        return text
+
+    def keeps_image(self, ref, page_rect):
+        return True
+
+    def segment(self, layout, module_name, start_page, end_page, max_q):
+        return segment_module(layout, module_name, start_page, end_page, max_q)
+
+
+class ImageOnlyLayout(TextLayout):
+    """Scanned PDFs: the OCR'd lines are read like a text layer"""
+    name = 'image-only'
+    ocr = True
+
+    # An image covering this much of its page is the scan itself, not a figure
+    SCAN_COVERAGE = 0.6
+
+    def keeps_image(self, ref, page_rect):
+        if not ref.get('rect'):
+            return True
+        x0, y0, x1, y1 = ref['rect']
+        page_area = (page_rect[2] - page_rect[0]) * (page_rect[3] - page_rect[1])
+        return (x1 - x0) * (y1 - y0) < self.SCAN_COVERAGE * page_area
+
+
+class BluebookLayout(ImageOnlyLayout):
+    """Screenshots of the Bluebook app: one question per page, "Question 3 of 27" in the footer"""
+    name = 'bluebook'
+    trailing_pages = 0
+
+    HEADER = re.compile(r'Section\s*\d\s*,?\s*Module\s*([12])\s*:?\s*(Reading and Writing|Math)', re.IGNORECASE)
+    POSITION = re.compile(r'Question\s+(\d+)\s+of\s+\d+', re.IGNORECASE)
+    NUMBER_BOX = re.compile(r'^(\d{1,2})(?:\s+Mark for Review)?$', re.IGNORECASE)
+    CHROME = re.compile(r'^\d{1,2}:\d{2}$|Mark for Review|Question\s+\d+\s+of\s+\d+|Section\s*\d\s*,?\s*Module'
+                        r'|^(?:Directions|Hide|Highlights(?: & Notes)?|Notes|More|Back|Next|Calculator'
+                        r'|Reference|Annotate)$', re.IGNORECASE)
+    # Choice bubbles as OCR reads them: "(A) text", "A. text", "Ⓐ text"
+    BUBBLE = re.compile(r'^\s*(?:\(([A-D])\)|([A-D])[.)]|([ⒶⒷⒸⒹ]))\s*')
+
+    def module_headers(self, text):
+        found = super().module_headers(text)
+        for number, subject in self.HEADER.findall(text):
+            subject = 'Math' if subject.lower() == 'math' else 'Reading and Writing'
+            found.add(f"{subject} Module {number}")
+        return found
+
+    def is_chrome(self, text):
+        return super().is_chrome(text) or bool(self.CHROME.search(text.strip()))
+
+    def line_text(self, text):
+        match = self.BUBBLE.match(text)
+        if not match:
+            return text
+        letter = match.group(1) or match.group(2) or 'ABCD'['ⒶⒷⒸⒹ'.index(match.group(3))]
+        return f"{letter}) {text[match.end():]}"
+
+    def question_number(self, lines, max_q):
+        """The page's question number: from the footer, else the numbered box at the top"""
+        for line in lines:
+            match = self.POSITION.search(line.text)
+            if match and 1 <= int(match.group(1)) <= max_q:
+                return int(match.group(1))
+        for line in lines:
+            match = self.NUMBER_BOX.match(line.text.strip())
+            if match and 1 <= int(match.group(1)) <= max_q:
+                return int(match.group(1))
+        return None
+
+    def segment(self, layout, module_name, start_page, end_page, max_q):
+        """One region per question; a page without a number continues the question before it"""
+        regions = {}
+        current = None
+        for page_num in range(start_page, end_page + 1):
+            lines = layout[page_num]
+            text = layout_text(lines)
+            # Every screenshot shows its module in the header; stop at another module or the key
+            headers = self.module_headers(text)
+            if (headers and module_name not in headers) or KEY_PAGE.search(text):
+                break
+
+            q_num = self.question_number(lines, max_q)
+            if q_num is not None and q_num not in regions:
+                current = {'number': q_num, 'page': page_num, 'lines': [], 'boxes': {}}
+                regions[q_num] = current
+            if current is None:
+                continue
+
+            for line in lines:
+                stripped = line.text.strip()
+                if not stripped or self.is_chrome(stripped) or stripped == str(current['number']):
+                    continue
+                current['lines'].append((page_num, line))
+                box = current['boxes'].setdefault(page_num, [line.y0, line.y1])
+                box[0] = min(box[0], line.y0)
+                box[1] = max(box[1], line.y1)
+            current['boxes'].setdefault(page_num, [0.0, 0.0])
+        return regions
+
+
+# name -> strategy
+LAYOUTS = {layout.name: layout for layout in (TextLayout(), ImageOnlyLayout(), BluebookLayout())}
+
+
+class ExtractionEngine:
+    def __init__(self, pdf_path, layout='auto', workers=None, cache=None):
+        if layout != 'auto' and layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout {layout!r} (one of: auto, {', '.join(LAYOUTS)})")
+
+        self.pdf_path = str(pdf_path)
+        self.workers = workers
+        self.doc = fitz.open(pdf_path)
+        self.pages = PageCache(self.doc)
+        self.cache = cache or ExtractionCache(pdf_path)
+        self.strategy = None if layout == 'auto' else LAYOUTS[layout]
+
+        # Filled in by read_pages() / extract()
+        self.layout = []   # per page: text lines with their boxes
+        self.regions = {}  # module -> {question number: region of the page}
+        self.images_by_page = defaultdict(list)
+        self.image_refs = {}
+
+    def close(self):
+        self.doc.close()
+        self.cache.close()
+
+    def detect_layout(self):
+        """'text' when most pages have text, else 'bluebook' or 'image-only' from what OCR finds"""
+        blank = [page_num for page_num, lines in enumerate(self.layout) if not lines]
+        if len(blank) * 2 <= len(self.layout):
+            return 'text'
+        self.require_ocr(blank)
+        sample = cached_map_pages(self.pdf_path, 'ocr', blank[:LAYOUT_SAMPLE_PAGES], cache=self.cache)
+        bluebook = LAYOUTS['bluebook']
+        if any(bluebook.HEADER.search(text) or bluebook.POSITION.search(text)
+               for text in map(layout_text, sample)):
+            return 'bluebook'
+        return 'image-only'
+
+    def require_ocr(self, blank):
+        if not ocr_available():
+            raise RuntimeError(f"{Path(self.pdf_path).name}: {len(blank)} pages have no text and "
+                               f"OCR needs pytesseract and tesseract (pip install pytesseract)")
+
+    def read_pages(self):
+        """Every page's lines and their positions - from the extraction cache, or in parallel"""
+        self.layout = cached_map_pages(self.pdf_path, 'layout', workers=self.workers, cache=self.cache)
+        if self.strategy is None:
+            self.strategy = LAYOUTS[self.detect_layout()]
+
+        # Only pages without a text layer are OCR'd
+        blank = [page_num for page_num, lines in enumerate(self.layout) if not lines]
+        if self.strategy.ocr and blank:
+            self.require_ocr(blank)
+            ocr = cached_map_pages(self.pdf_path, 'ocr', blank, workers=self.workers, cache=self.cache)
+            for page_num, lines in zip(blank, ocr):
+                self.layout[page_num] = lines
+        self.pages.prefill([layout_text(lines) for lines in self.layout])
+
+    def detect_modules(self):
+        """{module name: {'name', 'start_page', 'end_page', 'subject'}} in the order they start"""
+        modules = {}
+
+        # Page by page, stopping as soon as every module's first page is known.
+        # read_pages() already holds every page's text, so stopping early only
+        # saves the header search on the remaining pages, not memory.
+        for page_num in range(len(self.layout)):
+            found = self.strategy.module_headers(self.pages.text(page_num))
+            for module_name in MODULE_NAMES:
+                if module_name in found and module_name not in modules:
+                    modules[module_name] = {
+                        'name': module_name,
+                        'start_page': page_num,
+                        'end_page': None,
+                        'subject': 'Math' if 'Math' in module_name else 'Reading'
+                    }
+            if len(modules) == len(MODULE_NAMES):
+                break
+
+        # Set end pages
+        module_list = sorted(modules.values(), key=lambda m: m['start_page'])
+        for i, module in enumerate(module_list):
+            if i < len(module_list) - 1:
+                next_module_start = module_list[i + 1]['start_page']
+                # The module's last question may sit on the next module's first page
+                # (e.g. question 27 above the Math Module 1 header)
+                max_q = MAX_QUESTIONS[module['subject']]
+                last_on_next_page = any(NUMBER_LINE.match(stripped) and int(stripped) == max_q
+                                        for stripped in self.pages.stripped(next_module_start))
+                module['end_page'] = next_module_start if last_on_next_page else next_module_start - 1
+            else:
+                # Last module ends before the answer key
+                module['end_page'] = len(self.layout) - 1 - self.strategy.trailing_pages
+        return modules
+
+    def module_questions(self, module):
+        """({question number: {'number', 'page', 'text'}}, {question number: region}) of one module"""
+        max_q = MAX_QUESTIONS[module['subject']]
+        regions = self.strategy.segment(self.layout, module['name'], module['start_page'], module['end_page'], max_q)
+
+        questions = {}
+        for q_num, region in regions.items():
+            text = ' '.join(self.region_lines(region)).strip()
+            # Remove embedded answer choices, then extra whitespace
+            text = ' '.join(strip_choices(text).split()).strip()
+            questions[q_num] = {'number': q_num, 'page': region['page'], 'text': text}
+        return questions, regions
+
+    def region_lines(self, region):
+        """A question's lines, without navigation text"""
+        return [self.strategy.line_text(line.text.strip()) for _, line in region['lines']
+                if line.text.strip() and not self.strategy.is_chrome(line.text)]
+
+    def choices(self, region):
+        """The 4 answer choices of a question region, or None"""
+        if not region:
+            return None
+
+        # The question's region, up to the end of the page where its 4th choice appears
+        question_text_parts = []
+        markers = 0
+        for page_num in sorted(region['boxes']):
+            page_lines = [self.strategy.line_text(line.text) for p, line in region['lines'] if p == page_num]
+            question_text_parts.extend(page_lines)
+            markers += count_markers('\n'.join(page_lines))
+            if markers >= 4:
+                break
+
+        question_text = '\n'.join(question_text_parts)
+        if not question_text:
+            return None
+        return parse_choices(question_text)
+
+    def find_images(self):
+        """Where every image is, named p{page}_img{index} after its first occurrence; nothing is decoded"""
+        images_by_page = defaultdict(list)
+        image_refs = {}
+        pages = cached_map_pages(self.pdf_path, 'images', workers=self.workers, cache=self.cache)
+        with FITZ_LOCK:
+            page_rects = [tuple(page.rect) for page in self.doc]
+        names_by_xref = {}
+        for page_num, refs in enumerate(pages):
+            for ref in refs:
+                if not self.strategy.keeps_image(ref, page_rects[page_num]):
+                    continue
+                # Repeats of an xref share the name of its first occurrence
+                name = names_by_xref.setdefault(ref['xref'], f"p{page_num + 1}_img{ref['index'] + 1}")
+                ref['filename'] = name
+                image_refs.setdefault(name, ref)
+                images_by_page[page_num].append(ref)
+        return images_by_page, image_refs
+
+    def match_images(self, modules, regions_by_module, images_by_page):
+        """Set image_type and images on every question; returns {module: questions with images}"""
+        matches = match_images(regions_by_module, images_by_page)
+        matched = {}
+        for module_name, module in modules.items():
+            matched[module_name] = 0
+            for q_num, question in sorted(module['questions'].items()):
+                images = matches.get((module_name, q_num), [])
+                text_lower = question['text'].lower()
+
+                # Very short question text usually means the images ARE the choices
+                is_only_choices = len(question['text']) < 20
+
+                if len(images) >= 4 and ('which' in text_lower or is_only_choices):
+                    # 4 image choices (A/B/C/D options as images)
+                    question['image_type'] = 'choices'
+                    question['images'] = [img['filename'] for img in images[:4]]
+                    matched[module_name] += 1
+                elif images:
+                    # Single image - the first one in the question's part of the page
+                    question['image_type'] = 'single'
+                    question['images'] = [images[0]['filename']]
+                    matched[module_name] += 1
+                else:
+                    question['image_type'] = 'none'
+                    question['images'] = []
+        return matched
+
+    def answer_key(self, modules):
+        """read_answer_key() from where the last module starts"""
+        first_page = max((m['start_page'] for m in modules.values()), default=None)
+        with FITZ_LOCK:
+            return read_answer_key(self.doc, self.pages.text, first_page)
+
+    def extract(self, module_names=None):
+        """Modules (all, or just module_names) with their questions, choices and matched images"""
+        self.read_pages()
+        modules = self.detect_modules()
+        if module_names is not None:
+            modules = {name: module for name, module in modules.items() if name in module_names}
+
+        for module_name, module in modules.items():
+            module['questions'], self.regions[module_name] = self.module_questions(module)
+            for q_num, question in module['questions'].items():
+                question['choices'] = self.choices(self.regions[module_name][q_num]) or []
+
+        self.images_by_page, self.image_refs = self.find_images()
+        self.match_images(modules, self.regions, self.images_by_page)
+        return modules
+
+    def image_sink(self, store=None):
+        """Writes the images questions use, each decoded once (see image_sink.py)"""
+        return ImageSink(self.doc, store or ImageStore())
@@ -4,7 +4,9 @@
 Import an entire SAT test (all 4 modules) in ONE command!
 
 Usage:
-    python3 fast-import.py <pdf-file> <test-name> <date> <region> <test-number>
+    python3 fast-import.py <pdf-file> <test-name> <date> <region> <test-number> [--workers N]
+                           [--profile report.json] [--trace trace.json] [--full] [--dry-run]
+                           [--from-stage STAGE] [--layout text|bluebook|image-only] [--stage-threads N]
 
 Example:
     python3 fast-import.py march2025.pdf "2025-03 Asia Test 1" 2025-03 Asia 1
@@ -14,130 +16,141 @@ What it does:
     ✅ Auto-detects answer key from PDF
     ✅ Extracts and matches ALL images
     ✅ Extracts real answer choices
-    ✅ Adds everything to database
+    ✅ Adds everything to database - re-importing a test (e.g. a corrected
+       reprint) only re-extracts changed pages and only rewrites changed
+       questions, keeping explanations and other curated fields (--full
+       compares every question again)
+    ✅ --dry-run writes what would change to questions-database.changes.json
+       instead (review it, then apply it with changeset.py)
+    ✅ Checkpoints steps 1-6, so a failed import resumes where it stopped;
+       --from-stage (modules, answer-key, images, questions, choices,
+       match-images) redoes that step and the ones after it, e.g. after a fix
+    ✅ Reads text PDFs, Bluebook screenshots and scans alike (--layout; by
+       default it's worked out from the PDF - see extraction_engine.py)
     ✅ Verifies against answer key
+    ✅ Runs steps that don't need each other at the same time (--stage-threads;
+       1 runs them one by one, as --profile does)
+    ✅ Reports time, CPU, memory and counters per step, and the chain of steps
+       that bounded the total time (--profile also writes them as JSON with
+       each step's peak memory; --trace writes the threaded run as a Chrome
+       trace)
 
 Time: ~5 minutes per test
 """
 
-import fitz  # PyMuPDF
-import json
-import shutil
+import os
 import re
 import sys
+import threading
+from functools import partial
 from pathlib import Path
 from collections import defaultdict
+from db_format import DRY_RUN_ENV, dry_run_path, load_database, save_database
+from extraction_cache import EXTRACTORS
+from extraction_engine import LAYOUTS, MODULE_NAMES, ExtractionEngine
+from image_store import ImageStore
+from import_state import IMPORT_POLICIES, ImportState
+from merge_engine import merge_questions, question_key
+from question_store import question_hash
+from stage_checkpoints import StageCheckpoints
+from stage_profiler import StageProfiler
+from stage_scheduler import STAGE_THREADS, StageScheduler
+
+# Steps 1-6 are checkpointed, in this order: stage -> (version, attributes it sets, stages it needs).
+# Bump a version whenever its step's output changes; the steps that need it are redone too.
+# Every step also needs 'page text'; steps that don't need each other run at the same time.
+CHECKPOINT_STAGES = {
+    'modules': (1, ('modules',), ()),
+    'answer key': (2, ('answer_key',), ('modules',)),
+    'images': (1, ('images_by_page', 'image_refs'), ()),
+    'questions': (1, ('modules', 'regions'), ('modules',)),
+    'choices': (1, ('modules',), ('questions',)),
+    'match images': (1, ('modules',), ('images', 'choices')),
+}
 
 class FastSATImporter:
-    def __init__(self, pdf_path, test_name, date, region, test_number):
+    def __init__(self, pdf_path, test_name, date, region, test_number, workers=None, profile=False,
+                 incremental=True, checkpoints=True, from_stage=None, layout='auto',
+                 stage_threads=STAGE_THREADS):
+        if from_stage is not None and from_stage not in CHECKPOINT_STAGES:
+            raise ValueError(f"Unknown stage {from_stage!r} (one of: {', '.join(CHECKPOINT_STAGES)})")
+        
         self.pdf_path = pdf_path
+        self.workers = workers
+        self.incremental = incremental
         self.test_name = test_name
         self.date = date
         self.region = region
         self.test_number = test_number
         
-        self.doc = fitz.open(pdf_path)
+        # Page cache, layout strategy and the extraction steps themselves
+        self.engine = ExtractionEngine(pdf_path, layout, workers)
+        self.doc = self.engine.doc
+        self.pages = self.engine.pages
+        self.extraction_cache = self.engine.cache
         self.pdf_name = Path(pdf_path).stem
         
+        # Stage outputs of earlier runs on this PDF; restored up to from_stage
+        self.checkpoints = None
+        if checkpoints:
+            self.checkpoints = StageCheckpoints(
+                self.extraction_cache.root / "checkpoints",
+                [(name, version, needs) for name, (version, _, needs) in CHECKPOINT_STAGES.items()],
+                base=f"{layout}/layout-v{EXTRACTORS['layout'][0]}/ocr-v{EXTRACTORS['ocr'][0]}"
+                     f"/images-v{EXTRACTORS['images'][0]}")
+        self.from_stage = from_stage
+        self.restored = set()
+        
+        # Steps that don't need each other's output run on this many threads. Peak
+        # memory is process-wide, so a memory profile runs them one at a time.
+        self.stage_threads = 1 if profile else stage_threads
+        self.scheduler = None
+        self.print_lock = threading.Lock()
+        
+        # Per-stage time, memory (with profile=True) and counters
+        self.profiler = StageProfiler(memory=profile)
+        self.profiler.add_counters(lambda: {'get_text_calls': self.pages.get_text_calls,
+                                            'pages_prefilled': self.pages.prefilled,
+                                            'page_cache_hits': self.pages.hits})
+        self.profiler.add_counters(lambda: {'extraction_cache_hits': self.extraction_cache.hits,
+                                            'extraction_cache_misses': self.extraction_cache.misses})
+        self.profiler.add_counters(lambda: self.image_sink.stats() if self.image_sink else {})
+        self.image_sink = None
+        
         # Storage
         self.modules = {}
         self.answer_key = {}
+        self.regions = {}  # module -> {question number: region of the page}
         self.images_by_page = defaultdict(list)
-        self.all_text = ""
+        self.image_refs = {}  # image name -> where it is in the PDF
         
         # Folders
-        self.image_folder = Path("bulk-import/images-temp")
-        self.target_folder = Path(f"images/{date}/{region.lower()}v{test_number}")
+        self.test_id = f"{region.lower()}v{test_number}"
+        self.target_folder = Path(f"images/{date}/{self.test_id}")
+        self.image_store = ImageStore()
         
         print("=" * 80)
         print(f"🚀 FAST SAT IMPORTER - {test_name}")
         print("=" * 80)
     
-    def remove_answer_choices_from_text(self, text):
-        """Remove embedded answer choices from question text"""
-        if not text:
-            return text
-        
-        # Strategy: Find where answer choices start by looking for A) B) C) D) pattern
-        # Find the position of A) and verify B) C) D) come after it in order
-        
-        # Find all occurrences of choice markers
-        text_upper = text.upper()
-        
-        # Find the last occurrence of A) that's followed by B) C) D)
-        # We'll search backwards to find the right A)
-        a_positions = []
-        pos = 0
-        while True:
-            pos = text_upper.find('A)', pos)
-            if pos == -1:
-                break
-            a_positions.append(pos)
-            pos += 1
-        
-        # Check each A) position (starting from the end) to see if it's followed by B) C) D)
-        for a_pos in reversed(a_positions):
-            # Look for B) C) D) after this A)
-            remaining = text_upper[a_pos:]
-            
-            b_pos = remaining.find('B)')
-            if b_pos == -1:
-                continue
-            
-            c_pos = remaining.find('C)', b_pos)
-            if c_pos == -1:
-                continue
-            
-            d_pos = remaining.find('D)', c_pos)
-            if d_pos == -1:
-                continue
-            
-            # Found all 4 in order! Check if they're reasonably close together
-            # (answer choices are usually within 2000 characters)
-            if d_pos < 2000:
-                # This looks like answer choices - remove everything from A) onwards
-                return text[:a_pos].strip()
-        
-        # Fallback: Try regex patterns for edge cases
-        # Pattern: A) ... B) ... C) ... D) ... at the end
-        # Use non-greedy matching with lookahead for next choice
-        pattern = r'\s*A\)\s+.*?B\)\s+.*?C\)\s+.*?D\)\s+.*?$'
-        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-        if match:
-            matched = match.group(0)
-            # Verify all 4 are present
-            if all(marker in matched.upper() for marker in ['A)', 'B)', 'C)', 'D)']):
-                return text[:match.start()].strip()
-        
-        return text.strip()
-    
-    def run(self):
+    def run(self, profile_path=None, trace_path=None):
         """Run the complete import process"""
         try:
-            # Step 1: Detect modules
-            self.detect_modules()
-            
-            # Step 2: Extract answer key
-            self.extract_answer_key()
-            
-            # Step 3: Extract all images
-            self.extract_all_images()
-            
-            # Step 4: Extract questions for each module
-            for module_name in self.modules.keys():
-                self.extract_module_questions(module_name)
-            
-            # Step 5: Extract answer choices
-            self.extract_all_choices()
-            
-            # Step 6: Match images to questions
-            self.match_all_images()
+            self.extract()
             
             # Step 7: Add to database
-            self.add_to_database()
+            self.stage('database', self.add_to_database)
             
             # Step 8: Cleanup
-            self.cleanup()
+            self.stage('cleanup', self.cleanup)
+            
+            self.print_stage_report()
+            if profile_path:
+                self.profiler.write_json(profile_path)
+                print(f"   📄 Profile written to {profile_path}")
+            if trace_path:
+                self.profiler.write_chrome_trace(trace_path)
+                print(f"   📄 Chrome trace written to {trace_path}")
             
             print("\n" + "=" * 80)
             print("✅ IMPORT COMPLETE!")
@@ -151,425 +164,220 @@ class FastSATImporter:
             print(f"\n❌ ERROR: {e}")
             import traceback
             traceback.print_exc()
+            resume_point = self.checkpoints.resume_point() if self.checkpoints else None
+            if resume_point:
+                print(f"\n💾 Finished steps are checkpointed - run the same command again to resume "
+                      f"from '{resume_point}'")
             sys.exit(1)
     
-    def detect_modules(self):
-        """Auto-detect all modules in the PDF"""
-        print("\n📚 Step 1: Detecting modules...")
+    def extract(self):
+        """Steps 1-6: everything except writing to the database
+
+        Each step starts as soon as the steps it needs are done (see
+        stage_scheduler.py): images are found while modules, the answer key and
+        questions are worked out, and the modules' questions side by side.
+        """
+        self.restored = self.restore_checkpoints()
+        self.scheduler = StageScheduler(self.stage_threads)
+        
+        # Read every page's text up front, spread over all cores
+        self.scheduler.add('page text', lambda: self.stage('page text', self.extract_page_text))
+        
+        # Steps 1-3, 5 and 6; step 4 is added per module once the modules are known
+        for name, (_, _, needs) in CHECKPOINT_STAGES.items():
+            if name in self.restored or name == 'questions':
+                continue
+            after = ['page text'] + [need for need in needs if need not in self.restored]
+            self.scheduler.add(name, partial(self.run_checkpointed, name), after)
+        if 'modules' in self.restored and 'questions' not in self.restored:
+            self.add_question_stages()
         
-        module_patterns = {
-            'Reading and Writing Module 1': r'Reading and Writing Module 1',
-            'Reading and Writing Module 2': r'Reading and Writing Module 2',
-            'Math Module 1': r'Math Module 1',
-            'Math Module 2': r'Math Module 2'
+        self.scheduler.run()
+        self.profiler.extra['critical_path'] = self.scheduler.critical_path()
+    
+    def restore_checkpoints(self):
+        """Restore steps saved by an earlier run on this PDF; returns their names
+
+        Stops at from_stage, and skips any step whose inputs have to be redone.
+        """
+        restored = set()
+        if self.checkpoints is None:
+            return restored
+        
+        for name, (_, _, needs) in CHECKPOINT_STAGES.items():
+            if name == self.from_stage:
+                break
+            if any(need not in restored for need in needs):
+                continue
+            state = self.checkpoints.load(name)
+            if state is None:
+                continue
+            for attribute, value in state.items():
+                setattr(self, attribute, value)
+            print(f"\n💾 {name}: restored from checkpoint")
+            restored.add(name)
+        return restored
+    
+    def run_checkpointed(self, name):
+        """Run one checkpointed step and save its output for later runs"""
+        steps = {
+            'modules': self.detect_modules,
+            'answer key': self.extract_answer_key,
+            'images': self.extract_all_images,
+            'choices': self.extract_all_choices,
+            'match images': self.match_all_images,
         }
-        
-        for page_num in range(len(self.doc)):
-            page = self.doc[page_num]
-            text = page.get_text()
-            self.all_text += text + "\n"
+        self.stage(name, steps[name])
+        if name == 'modules':
+            self.add_question_stages()
+        self.save_checkpoint(name)
+    
+    def save_checkpoint(self, name):
+        if self.checkpoints is not None:
+            _, attributes, _ = CHECKPOINT_STAGES[name]
+            self.checkpoints.save(name, {attribute: getattr(self, attribute) for attribute in attributes})
+    
+    def add_question_stages(self):
+        """Step 4: one stage per module, then one checkpoint for all of them"""
+        after = ['page text'] + (['modules'] if 'modules' not in self.restored else [])
+        names = []
+        for module_name in self.modules:
+            name = f'questions: {module_name}'
+            self.scheduler.add(name, partial(self.stage, name, self.extract_module_questions, module_name), after)
+            names.append(name)
+        self.scheduler.add('questions', partial(self.save_checkpoint, 'questions'), names)
+    
+    def validate(self):
+        """Check extraction results against what an SAT test should contain"""
+        problems = []
+        stats = {'modules': len(self.modules), 'questions': 0, 'expected_questions': 0,
+                 'choices_found': 0, 'choices_expected': 0, 'answers_found': 0}
+        
+        for module_name in MODULE_NAMES:
+            expected = 27 if 'Reading' in module_name else 22
+            stats['expected_questions'] += expected
+            module = self.modules.get(module_name)
+            if module is None:
+                problems.append(f"{module_name}: not found")
+                continue
+            
+            questions = module['questions']
+            stats['questions'] += len(questions)
+            if len(questions) != expected:
+                problems.append(f"{module_name}: {len(questions)}/{expected} questions")
+            
+            if module['subject'] == 'Reading':
+                stats['choices_expected'] += len(questions)
+                stats['choices_found'] += sum(1 for q in questions.values() if len(q.get('choices') or []) == 4)
             
-            for module_name, pattern in module_patterns.items():
-                if re.search(pattern, text):
-                    if module_name not in self.modules:
-                        self.modules[module_name] = {
-                            'name': module_name,
-                            'start_page': page_num,
-                            'end_page': None,
-                            'questions': [],
-                            'subject': 'Math' if 'Math' in module_name else 'Reading'
-                        }
-                        print(f"   ✓ Found {module_name} on page {page_num + 1}")
+            answers = self.answer_key.get(module_name, {})
+            stats['answers_found'] += sum(1 for q_num in questions if q_num in answers)
+            if len(answers) < len(questions):
+                problems.append(f"{module_name}: answer key has {len(answers)}/{len(questions)} answers")
         
-        # Set end pages
-        module_list = sorted(self.modules.items(), key=lambda x: x[1]['start_page'])
-        for i, (name, module) in enumerate(module_list):
-            if i < len(module_list) - 1:
-                next_module_start = module_list[i + 1][1]['start_page']
-                # Check if there are questions on the same page as next module starts
-                # If so, include that page in current module
-                next_page = self.doc[next_module_start]
-                next_text = next_page.get_text()
-                
-                # Check if current module's questions continue onto next module's start page
-                # Look for question numbers that belong to current module
-                max_q = 27 if module['subject'] == 'Reading' else 22
-                current_module_questions_on_next_page = False
-                
-                # Check if there are question numbers on the next module's start page
-                # that belong to the current module (e.g., question 27 for Reading modules)
-                lines = next_text.split('\n')
-                for line in lines:
-                    stripped = line.strip()
-                    if re.match(r'^\d+$', stripped):
-                        q_num = int(stripped)
-                        # If it's a valid question number for current module and it's the last question
-                        if 1 <= q_num <= max_q and q_num == max_q:
-                            current_module_questions_on_next_page = True
-                            break
-                
-                if current_module_questions_on_next_page:
-                    # Include the next module's start page in current module
-                    module['end_page'] = next_module_start
-                else:
-                    module['end_page'] = next_module_start - 1
-            else:
-                # Last module ends before answer key (usually last 2 pages)
-                module['end_page'] = len(self.doc) - 3
+        return problems, stats
+    
+    def stage(self, name, step, *args):
+        """Run one import step under the profiler"""
+        return self.profiler.stage(name, step, *args)
+    
+    @property
+    def stage_report(self):
+        return self.profiler.stages
+    
+    def say(self, *lines):
+        """Print a step's lines together - steps running side by side would interleave them"""
+        with self.print_lock:
+            print('\n'.join(lines))
+    
+    def print_stage_report(self):
+        """Per-stage time, memory and counters, and which steps bounded the total time"""
+        self.profiler.print_report()
+        print(f"   Each of {self.extraction_cache.page_count} pages extracted at most once "
+              f"({self.pages.get_text_calls} get_text calls, {self.pages.prefilled} pages prefilled from the layout)")
+        print(f"   Extraction cache: {self.extraction_cache.hits} hits, {self.extraction_cache.misses} misses")
+        if self.scheduler is not None:
+            self.scheduler.print_critical_path()
+    
+    def extract_page_text(self):
+        """Read every page's lines and their positions - from the extraction cache, or in parallel"""
+        misses_before = self.extraction_cache.misses
+        self.engine.read_pages()
+        self.profiler.count('pdf_pages_read', self.extraction_cache.misses - misses_before)
+        if self.engine.strategy.name != 'text':
+            print(f"   📄 Layout: {self.engine.strategy.name}")
+    
+    def detect_modules(self):
+        """Auto-detect all modules in the PDF"""
+        lines = ["\n📚 Step 1: Detecting modules..."]
+        
+        self.modules = self.engine.detect_modules()
+        for module_name, module in self.modules.items():
+            module['questions'] = []
+            lines.append(f"   ✓ Found {module_name} on page {module['start_page'] + 1}")
+        self.say(*lines)
     
     def extract_answer_key(self):
         """Extract answer key from the end of PDF"""
-        print("\n🔑 Step 2: Extracting answer key...")
+        lines = ["\n🔑 Step 2: Extracting answer key..."]
         
-        # Answer key is usually on the last 2-3 pages
-        for page_num in range(len(self.doc) - 3, len(self.doc)):
-            page = self.doc[page_num]
-            text = page.get_text()
-            
-            if 'Answers' in text or 'Answer Key' in text:
-                print(f"   ✓ Found answer key on page {page_num + 1}")
-                
-                # Parse answer key
-                lines = text.split('\n')
-                current_module = None
-                
-                for line in lines:
-                    # Detect module headers
-                    if 'Module 1 Answers' in line:
-                        if 'Math' in line:
-                            current_module = 'Math Module 1'
-                        elif 'Reading' in line or 'Writing' in line:
-                            current_module = 'Reading and Writing Module 1'
-                    elif 'Module 2 Answers' in line:
-                        if 'Math' in line:
-                            current_module = 'Math Module 2'
-                        elif 'Reading' in line or 'Writing' in line:
-                            current_module = 'Reading and Writing Module 2'
-                    
-                    # Parse answer lines (e.g., "1. A", "2. 5780", "16. D")
-                    if current_module:
-                        match = re.match(r'^(\d+)\.\s+(.+)$', line.strip())
-                        if match:
-                            q_num = int(match.group(1))
-                            answer = match.group(2).strip()
-                            
-                            if current_module not in self.answer_key:
-                                self.answer_key[current_module] = {}
-                            
-                            self.answer_key[current_module][q_num] = answer
+        # The key comes after the last module starts: answer lines, a table, or an image of one
+        self.answer_key, sources = self.engine.answer_key(self.modules)
+        for page_num, method, count in sources:
+            if count:
+                lines.append(f"   ✓ Found answer key on page {page_num + 1}" + (f" ({method})" if method != 'lines' else ""))
         
         # Print summary
         for module_name, answers in self.answer_key.items():
-            print(f"   ✓ {module_name}: {len(answers)} answers")
+            lines.append(f"   ✓ {module_name}: {len(answers)} answers")
+        self.say(*lines)
     
     def extract_all_images(self):
         """Extract all images from PDF"""
-        print("\n📸 Step 3: Extracting images...")
-        
-        self.image_folder.mkdir(parents=True, exist_ok=True)
-        total_images = 0
+        # Only positions are collected here; nothing is decoded or written until
+        # build_questions() places the images questions actually use
+        self.images_by_page, self.image_refs = self.engine.find_images()
+        total_images = sum(len(refs) for refs in self.images_by_page.values())
         
-        for page_num in range(len(self.doc)):
-            page = self.doc[page_num]
-            image_list = page.get_images()
-            
-            for img_index, img in enumerate(image_list):
-                try:
-                    xref = img[0]
-                    pix = fitz.Pixmap(self.doc, xref)
-                    
-                    if pix.n - pix.alpha < 4:
-                        filename = f"p{page_num + 1}_img{img_index + 1}.png"
-                        filepath = self.image_folder / filename
-                        pix.save(filepath)
-                        
-                        self.images_by_page[page_num].append({
-                            'filename': filename,
-                            'filepath': filepath,
-                            'page': page_num,
-                            'index': img_index
-                        })
-                        total_images += 1
-                    
-                    pix = None
-                except:
-                    pass
-        
-        print(f"   ✓ Extracted {total_images} images")
+        self.say("\n📸 Step 3: Extracting images...",
+                 f"   ✓ Found {total_images} images ({len(self.image_refs)} unique)")
     
     def extract_module_questions(self, module_name):
         """Extract questions for a specific module"""
         module = self.modules[module_name]
-        start_page = module['start_page']
-        end_page = module['end_page']
-        
-        print(f"\n📝 Step 4: Extracting {module_name} questions (pages {start_page+1}-{end_page+1})...")
-        
-        questions = {}
-        current_q = None
-        
-        for page_num in range(start_page, end_page + 1):
-            page = self.doc[page_num]
-            text = page.get_text()
-            lines = text.split('\n')
-            
-            for i, line in enumerate(lines):
-                stripped = line.strip()
-                
-                # Find question numbers (standalone on a line)
-                if re.match(r'^\d+$', stripped):
-                    q_num = int(stripped)
-                    
-                    # Reasonable question numbers (1-27 for reading, 1-22 for math)
-                    max_q = 27 if module['subject'] == 'Reading' else 22
-                    if 1 <= q_num <= max_q:
-                        # Save previous question
-                        if current_q and current_q['number'] not in questions:
-                            questions[current_q['number']] = current_q
-                        
-                        # Start new question
-                        current_q = {
-                            'number': q_num,
-                            'text_lines': [],
-                            'page': page_num
-                        }
-                
-                elif current_q and stripped:
-                    # Skip module headers and navigation text
-                    if 'Module' not in stripped and 'CONTINUE' not in stripped and 'QUESTIONS' not in stripped:
-                        current_q['text_lines'].append(stripped)
-        
-        # Save last question
-        if current_q and current_q['number'] not in questions:
-            questions[current_q['number']] = current_q
-        
-        # Combine text and clean
-        for q_num, q in questions.items():
-            text = ' '.join(q['text_lines']).strip()
-            
-            # Remove embedded answer choices using helper function
-            text = self.remove_answer_choices_from_text(text)
-            
-            # Clean up extra whitespace
-            text = ' '.join(text.split()).strip()
-            
-            q['text'] = text
-            del q['text_lines']
         
-        module['questions'] = questions
-        print(f"   ✓ Extracted {len(questions)} questions")
+        module['questions'], self.regions[module_name] = self.engine.module_questions(module)
+        self.say(f"\n📝 Step 4: Extracting {module_name} questions "
+                 f"(pages {module['start_page']+1}-{module['end_page']+1})...",
+                 f"   ✓ Extracted {len(module['questions'])} questions")
     
     def extract_all_choices(self):
         """Extract answer choices for all questions"""
-        print("\n📋 Step 5: Extracting answer choices...")
+        lines = ["\n📋 Step 5: Extracting answer choices..."]
         
         for module_name, module in self.modules.items():
             missing_choices = []
             for q_num, question in module['questions'].items():
-                choices = self.extract_choices_for_question(module, q_num)
+                choices = self.engine.choices(self.regions.get(module_name, {}).get(q_num))
                 question['choices'] = choices if choices else []
                 if not choices and module['subject'] == 'Reading':  # Math grid-in questions don't need choices
                     missing_choices.append(q_num)
             
             if missing_choices:
-                print(f"   ⚠️  {module_name}: {len(missing_choices)} questions missing choices: {missing_choices}")
-            else:
-                print(f"   ✓ {module_name}: All questions have choices")
-    
-    def extract_choices_for_question(self, module, q_num):
-        """Extract choices for a specific question - handles multi-page questions"""
-        start_page = module['start_page']
-        end_page = module['end_page']
-        
-        # Find where the question starts
-        question_start_page = None
-        question_start_pos = None
-        
-        for page_num in range(start_page, end_page + 1):
-            page = self.doc[page_num]
-            text = page.get_text()
-            
-            # Look for question number on its own line
-            if f'\n{q_num}\n' in text:
-                question_start_page = page_num
-                # Find the position after the question number
-                lines = text.split('\n')
-                for i, line in enumerate(lines):
-                    if line.strip() == str(q_num):
-                        # Found it - collect from here
-                        question_start_pos = i
-                        break
-                break
-        
-        if question_start_page is None:
-            return None
-        
-        # Collect text across pages until we find all 4 choices OR next question
-        question_text_parts = []
-        next_q_num = q_num + 1
-        max_q = 27 if module['subject'] == 'Reading' else 22
-        
-        # Start collecting from the question start
-        found_next_question = False
-        found_module_boundary = False
-        
-        for page_num in range(question_start_page, end_page + 1):
-            page = self.doc[page_num]
-            text = page.get_text()
-            lines = text.split('\n')
-            
-            if page_num == question_start_page:
-                # Start from where we found the question
-                if question_start_pos is not None:
-                    lines = lines[question_start_pos + 1:]
-            
-            # Collect lines until we hit the next question number or module boundary
-            for line in lines:
-                stripped = line.strip()
-                
-                # Check if we hit a module boundary (e.g., "Math Module 1")
-                if 'Module' in stripped and ('Math' in stripped or 'Reading' in stripped or 'Writing' in stripped):
-                    found_module_boundary = True
-                    break
-                
-                # Check if we hit the next question number
-                if re.match(r'^\d+$', stripped):
-                    next_q = int(stripped)
-                    if 1 <= next_q <= max_q and next_q > q_num:
-                        # Hit next question, stop collecting
-                        found_next_question = True
-                        break
-                
-                question_text_parts.append(line)
-            
-            # Check if we already have all 4 choices or hit a boundary
-            combined_text = '\n'.join(question_text_parts)
-            choice_count = len(re.findall(r'[A-D]\)', combined_text))
-            if choice_count >= 4 or found_next_question or found_module_boundary:
-                # We have enough choices or hit next question/module, stop
-                break
-        
-        question_text = '\n'.join(question_text_parts)
-        
-        if not question_text:
-            return None
-        
-        # Extract A), B), C), D) choices - improved pattern to handle multi-line choices
-        choices = []
-        for letter in ['A', 'B', 'C', 'D']:
-            # Pattern: letter) followed by text until next letter) or end
-            # Handle choices that might span multiple lines
-            # Look for next choice marker (B), C), D)) or end of text
-            next_letters = ['B', 'C', 'D'] if letter == 'A' else ['C', 'D'] if letter == 'B' else ['D'] if letter == 'C' else []
-            
-            if next_letters:
-                # There's a next choice, match until we find it
-                next_pattern = '|'.join([f'{l}\\)' for l in next_letters])
-                choice_pattern = rf'{letter}\)\s+(.*?)(?=\s*(?:{next_pattern})|\Z)'
+                lines.append(f"   ⚠️  {module_name}: {len(missing_choices)} questions missing choices: {missing_choices}")
             else:
-                # Last choice (D), match until end OR until we hit a question number or module marker
-                choice_pattern = rf'{letter}\)\s+(.*?)(?=\Z|\n\s*\d+\s*\n|\n\s*Module\s+)'
-            
-            choice_match = re.search(choice_pattern, question_text, re.DOTALL | re.MULTILINE)
-            if choice_match:
-                choice_text = choice_match.group(1).strip()
-                # Clean up: remove extra whitespace, handle line breaks
-                choice_text = ' '.join(choice_text.split())
-                
-                # Remove any trailing content that looks like it's from the next question
-                # Check for patterns like "1 s = " (math equation markers)
-                if re.search(r'\d+\s+[a-z]\s*=\s*', choice_text):
-                    # Found math equation, truncate before it
-                    match = re.search(r'(\d+\s+[a-z]\s*=\s*)', choice_text)
-                    if match:
-                        choice_text = choice_text[:match.start()].strip()
-                
-                # Remove trailing numbers that might be question numbers
-                choice_text = re.sub(r'\s+\d+\s*$', '', choice_text).strip()
-                
-                choices.append(choice_text)
-        
-        return choices if len(choices) == 4 else None
+                lines.append(f"   ✓ {module_name}: All questions have choices")
+        self.say(*lines)
     
     def match_all_images(self):
-        """Match images to questions - ONLY when explicitly referenced"""
-        print("\n🔗 Step 6: Matching images to questions...")
+        """Match images to the question whose part of the page they are on"""
+        lines = ["\n🔗 Step 6: Matching images to questions..."]
         
-        # Patterns that indicate an image is needed
-        strict_image_patterns = [
-            'the graph', 'the scatterplot', 'the histogram',
-            'the chart', 'the figure', 'the diagram', 'the table',
-            'the triangle', 'the cone', 'the circle', 'the rectangle',
-            'graph shows', 'table shows', 'chart shows', 'figure shows',
-            'diagram shows', 'shown in', 'figure shown', 'graph shown',
-            'triangle shown', 'cone shown', 'circle shown',
-            'right triangle shown', 'circular cone shown',
-            'graph of', 'scatterplot of', 'histogram of',
-            'data from the graph', 'data from the table', 'data from the chart',
-            'according to the table', 'according to the graph',
-            'based on the graph', 'based on the table', 'based on the chart',
-            'uses data from', 'using data from',
-            'which table gives', 'which graph', 'which figure',
-            'shown below', 'shown above', 'shaded region',
-            'table above', 'table below', 'figure above', 'figure below'
-        ]
-        
-        for module_name, module in self.modules.items():
-            matched_count = 0
-            used_images = set()  # Track which images have been assigned
-            
-            # Sort questions by question number (not page) to maintain order
-            sorted_questions = sorted(module['questions'].items(), key=lambda x: x[0])
-            
-            for q_num, question in sorted_questions:
-                text_lower = question['text'].lower()
-                page_num = question['page']
-                
-                # STRICT CHECK: Does the question EXPLICITLY reference a visual?
-                needs_image = any(pattern in text_lower for pattern in strict_image_patterns)
-                
-                # Special case: very short question text usually means the image IS the question
-                is_only_choices = len(question['text']) < 20
-                
-                if needs_image or is_only_choices:
-                    # Get images from current page ONLY (most reliable)
-                    available_images = []
-                    
-                    if page_num in self.images_by_page:
-                        for img in self.images_by_page[page_num]:
-                            if img['filename'] not in used_images:
-                                available_images.append(img)
-                    
-                    # If no images on current page, check next page (question might span pages)
-                    if not available_images and (page_num + 1) in self.images_by_page:
-                        for img in self.images_by_page[page_num + 1]:
-                            if img['filename'] not in used_images:
-                                available_images.append(img)
-                    
-                    if available_images:
-                        # Check for 4 image choices (A/B/C/D options as images)
-                        if len(available_images) >= 4 and ('which' in text_lower or is_only_choices):
-                            question['image_type'] = 'choices'
-                            question['images'] = [img['filename'] for img in available_images[:4]]
-                            for img in available_images[:4]:
-                                used_images.add(img['filename'])
-                            matched_count += 1
-                        else:
-                            # Single image - use the first available image
-                            # Since we already prioritized same-page images, just take the first one
-                            question['image_type'] = 'single'
-                            question['images'] = [available_images[0]['filename']]
-                            used_images.add(available_images[0]['filename'])
-                            matched_count += 1
-                    else:
-                        question['image_type'] = 'none'
-                        question['images'] = []
-                else:
-                    question['image_type'] = 'none'
-                    question['images'] = []
-            
+        matched = self.engine.match_images(self.modules, self.regions, self.images_by_page)
+        for module_name, matched_count in matched.items():
             if matched_count > 0:
-                print(f"   ✓ {module_name}: {matched_count} questions with images")
+                lines.append(f"   ✓ {module_name}: {matched_count} questions with images")
+        self.say(*lines)
     
     def add_to_database(self):
         """Add all modules to the database"""
@@ -577,25 +385,72 @@ class FastSATImporter:
         
         # Load existing database
         db_path = Path('questions-database.json')
-        if db_path.exists():
-            with open(db_path, 'r') as f:
-                db = json.load(f)
-        else:
-            db = []
+        db = load_database(db_path)
         
         # Get next ID
         next_id = max([q['id'] for q in db], default=0) + 1
         
-        # Prepare target image folder
-        self.target_folder.mkdir(parents=True, exist_ok=True)
-        
-        total_added = 0
+        # Questions extracted exactly as in the last import are skipped
+        state, fingerprints, changed = self.changed_questions(db)
+        
+        new_questions = self.build_questions(next_id, only=changed)
+        result = merge_questions(db, new_questions, IMPORT_POLICIES, next_id=next_id)
+        
+        # Save database (a dry run only writes a changeset, and the next real run must redo it)
+        dry_run = dry_run_path(db_path) is not None
+        if result.changed:
+            self.image_store.save()
+            save_database(result.db, db_path)
+            if not dry_run:
+                self.profiler.count('db_bytes_written', db_path.stat().st_size)
+        if not dry_run:
+            state.save(fingerprints)
+        
+        print(f"   ✓ {'Would add' if dry_run else 'Added'} {len(result.inserted)} questions, "
+              f"{'update' if dry_run else 'updated'} {len(result.updated)}, "
+              f"{len(fingerprints) - len(changed) + result.unchanged} unchanged")
+        return result
+    
+    def changed_questions(self, db):
+        """(import state, fingerprints, (module, number) keys to rebuild) for merging into db"""
+        state = ImportState(self.test_id)
+        fingerprints = self.question_fingerprints()
+        in_db = {question_key(q) for q in db if q.get('testId') == self.test_id}
+        changed = {key for key, fingerprint in fingerprints.items()
+                   if not (self.incremental and state.unchanged(*key, fingerprint))
+                   or (self.test_id, *key) not in in_db}
+        return state, fingerprints, changed
+    
+    def question_fingerprints(self):
+        """(module, number) -> hash of everything a question's record is built from"""
+        page_hashes = self.extraction_cache.page_hashes
+        fingerprints = {}
+        for module_name, module in self.modules.items():
+            for q_num, question_data in module['questions'].items():
+                images = [self.image_refs[name] for name in question_data.get('images', [])]
+                fingerprints[(module_name, q_num)] = question_hash({
+                    'test': [self.test_name, self.date, self.region, self.test_number],
+                    'text': question_data['text'],
+                    'choices': question_data.get('choices'),
+                    'image_type': question_data.get('image_type'),
+                    # Page hashes cover the image data
+                    'images': [[page_hashes[ref['page']], ref['index']] for ref in images],
+                    'answer': self.answer_key.get(module_name, {}).get(q_num),
+                })
+        return fingerprints
+    
+    def build_questions(self, next_id, only=None):
+        """Database records for the extracted questions (all, or the (module, number) keys in only), ids from next_id on"""
+        sink = self.image_sink = self.engine.image_sink(self.image_store)
+        new_questions = []
         
         for module_name, module in self.modules.items():
             # Determine total questions for this module
             total_questions = 27 if module['subject'] == 'Reading' else 22
             
             for q_num in sorted(module['questions'].keys()):
+                if only is not None and (module_name, q_num) not in only:
+                    continue
                 question_data = module['questions'][q_num]
                 answer_str = self.answer_key.get(module_name, {}).get(q_num, "A")
                 
@@ -615,6 +470,7 @@ class FastSATImporter:
                     "region": self.region,
                     "testNumber": self.test_number,
                     "testName": self.test_name,
+                    "testId": self.test_id,
                     "questionText": question_data['text'],
                     "prompt": "",
                     "difficulty": "medium",
@@ -632,13 +488,11 @@ class FastSATImporter:
                     
                     for idx, img_filename in enumerate(question_data['images'][:4]):
                         option_letter = chr(65 + idx)
-                        src = self.image_folder / img_filename
-                        new_name = f"{module_name.lower().replace(' ', '-')}-q{q_num}-option{option_letter}.png"
-                        dst = self.target_folder / new_name
+                        stem = self.target_folder / f"{module_name.lower().replace(' ', '-')}-q{q_num}-option{option_letter}"
+                        url = sink.place(self.image_refs[img_filename], stem)
                         
-                        if src.exists():
-                            shutil.copy2(src, dst)
-                            image_choices.append(f"{self.target_folder}/{new_name}")
+                        if url:
+                            image_choices.append(url)
                     
                     q_obj['choices'] = image_choices
                 
@@ -646,15 +500,8 @@ class FastSATImporter:
                     # Single image
                     q_obj['hasImageChoices'] = False
                     img_filename = question_data['images'][0]
-                    src = self.image_folder / img_filename
-                    new_name = f"{module_name.lower().replace(' ', '-')}-q{q_num}-diagram.png"
-                    dst = self.target_folder / new_name
-                    
-                    if src.exists():
-                        shutil.copy2(src, dst)
-                        q_obj['imageUrl'] = f"{self.target_folder}/{new_name}"
-                    else:
-                        q_obj['imageUrl'] = ""
+                    stem = self.target_folder / f"{module_name.lower().replace(' ', '-')}-q{q_num}-diagram"
+                    q_obj['imageUrl'] = sink.place(self.image_refs[img_filename], stem) or ""
                     
                     q_obj['choices'] = question_data.get('choices', [])
                 
@@ -677,42 +524,85 @@ class FastSATImporter:
                     else:
                         q_obj['correctAnswer'] = 0  # Default to A if unclear
                 
-                db.append(q_obj)
+                new_questions.append(q_obj)
                 next_id += 1
-                total_added += 1
         
-        # Save database
-        with open(db_path, 'w') as f:
-            json.dump(db, f, indent=2, ensure_ascii=False)
-        
-        print(f"   ✓ Added {total_added} questions to database")
+        print(f"   ✓ Wrote {sink.stats()['images_encoded']} of {len(self.image_refs)} images")
+        return new_questions
     
     def cleanup(self):
-        """Clean up temporary files"""
+        """Release the PDF"""
         print("\n🧹 Step 8: Cleaning up...")
-        if self.image_folder.exists():
-            shutil.rmtree(self.image_folder)
-        print("   ✓ Temporary files removed")
+        self.doc.close()
+        print("   ✓ PDF closed")
 
 def main():
-    if len(sys.argv) < 6:
-        print("Usage: python3 fast-import.py <pdf-file> <test-name> <date> <region> <test-number>")
+    args = sys.argv[1:]
+    workers = None
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    profile_path = trace_path = None
+    if '--profile' in args:
+        i = args.index('--profile')
+        profile_path = args[i + 1]
+        del args[i:i + 2]
+    if '--trace' in args:
+        i = args.index('--trace')
+        trace_path = args[i + 1]
+        del args[i:i + 2]
+    from_stage = None
+    if '--from-stage' in args:
+        i = args.index('--from-stage')
+        from_stage = args[i + 1].replace('-', ' ')
+        del args[i:i + 2]
+    layout = 'auto'
+    if '--layout' in args:
+        i = args.index('--layout')
+        layout = args[i + 1]
+        del args[i:i + 2]
+    stage_threads = STAGE_THREADS
+    if '--stage-threads' in args:
+        i = args.index('--stage-threads')
+        stage_threads = int(args[i + 1])
+        del args[i:i + 2]
+    incremental = '--full' not in args
+    if '--dry-run' in args:
+        # save_database() and ImageStore pick this up
+        os.environ.setdefault(DRY_RUN_ENV, '1')
+    args = [a for a in args if a not in ('--full', '--dry-run')]
+    
+    if len(args) < 5:
+        print("Usage: python3 fast-import.py <pdf-file> <test-name> <date> <region> <test-number> "
+              "[--workers N] [--profile report.json] [--trace trace.json] [--full] [--dry-run] "
+              "[--from-stage STAGE] [--layout text|bluebook|image-only] [--stage-threads N]")
         print("\nExample:")
         print('  python3 fast-import.py march2025.pdf "2025-03 Asia Test 1" 2025-03 Asia 1')
         sys.exit(1)
     
-    pdf_path = sys.argv[1]
-    test_name = sys.argv[2]
-    date = sys.argv[3]
-    region = sys.argv[4]
-    test_number = int(sys.argv[5])
+    pdf_path = args[0]
+    test_name = args[1]
+    date = args[2]
+    region = args[3]
+    test_number = int(args[4])
     
     if not Path(pdf_path).exists():
         print(f"❌ Error: PDF file not found: {pdf_path}")
         sys.exit(1)
+    if from_stage is not None and from_stage not in CHECKPOINT_STAGES:
+        print(f"❌ Error: unknown stage '{from_stage}' (one of: {', '.join(CHECKPOINT_STAGES)})")
+        sys.exit(1)
+    if layout != 'auto' and layout not in LAYOUTS:
+        print(f"❌ Error: unknown layout '{layout}' (one of: {', '.join(LAYOUTS)})")
+        sys.exit(1)
     
-    importer = FastSATImporter(pdf_path, test_name, date, region, test_number)
-    importer.run()
+    # Memory tracking slows the import down and runs the steps one by one, so only
+    # --profile turns it on; --trace records the normal threaded run
+    importer = FastSATImporter(pdf_path, test_name, date, region, test_number, workers,
+                               profile=bool(profile_path), incremental=incremental,
+                               from_stage=from_stage, layout=layout, stage_threads=stage_threads)
+    importer.run(profile_path, trace_path)
 
 if __name__ == "__main__":
     main()
@@ -1,160 +1,69 @@
 #!/usr/bin/env python3
 """
 Final extraction: Get all Math questions with proper text and image matching
+
+Questions, choices and images come from extraction_engine.py, which finds
+Math Module 1 from its header instead of assuming pages 19-26.
 """
 
-import fitz
-import json
 import csv
-import re
 from pathlib import Path
+from extraction_engine import ExtractionEngine
 
-def extract_all_math_questions():
-    """Extract all 22 Math questions with full text"""
-    pdf_path = 'bulk-import/202503asiav1 (1).pdf'
-    doc = fitz.open(pdf_path)
-    
-    # Get text from Math pages (19-26)
-    full_text = ""
-    for page_num in range(18, min(26, len(doc))):
-        page = doc[page_num]
-        full_text += page.get_text() + "\n"
-    
-    doc.close()
-    
-    # Parse questions
-    questions = []
-    lines = [l.strip() for l in full_text.split('\n') if l.strip()]
-    
-    current_q = None
-    
-    for i, line in enumerate(lines):
-        # Check if this is a question number
-        if re.match(r'^\d+$', line) and 1 <= int(line) <= 22:
-            q_num = int(line)
-            if current_q:
-                questions.append(current_q)
-            
-            current_q = {
-                'number': q_num,
-                'text_parts': [],
-                'choices': []
-            }
-            continue
-        
-        if current_q:
-            # Check if this is a choice
-            choice_match = re.match(r'^([A-D])\)\s*(.+)$', line)
-            if choice_match:
-                current_q['choices'].append(choice_match.group(2).strip())
-            elif line and not line.startswith('Math Module') and 'QUESTIONS' not in line:
-                current_q['text_parts'].append(line)
-    
-    if current_q:
-        questions.append(current_q)
-    
-    return questions
+PDF_PATH = 'bulk-import/202503asiav1 (1).pdf'
+MODULE = 'Math Module 1'
+IMAGE_FOLDER = Path('bulk-import/images')
 
-def match_images_to_questions(questions):
-    """Match extracted images to questions"""
-    images_folder = Path('bulk-import/images')
-    images = list(images_folder.glob('*.png'))
-    
-    # Page to question mapping based on PDF structure
-    # Page 20: Q1 (buttons), Q2 (graph with 4 choices)
-    # Page 22: Q3 (scatterplot)
-    # Page 23: Q4-Q7
-    # Page 24: Q8-Q9 (with 4 graph choices for Q1)
-    # Page 25: Q10 (more graphs)
-    # Page 26: Q11-Q22
-    
-    # Group images by page
-    images_by_page = {}
-    for img in images:
-        match = re.search(r'page(\d+)_img(\d+)', img.name)
-        if match:
-            page = int(match.group(1))
-            img_num = int(match.group(2))
-            if page not in images_by_page:
-                images_by_page[page] = []
-            images_by_page[page].append({
-                'filename': img.name,
-                'path': str(img),
-                'img_num': img_num
-            })
-    
-    # Match based on known structure
-    # Q1: Has 4 graph choices on pages 24-25
-    # Q2: Has graph on page 20
-    # Q3: Has scatterplot on page 22
-    
-    for q in questions:
-        q['images'] = []
-        
-        if q['number'] == 1:
-            # Q1: 4 graph choices from pages 24-25
-            if 24 in images_by_page:
-                q['images'] = sorted(images_by_page[24][:4], key=lambda x: x['img_num'])
-            elif 25 in images_by_page:
-                q['images'] = sorted(images_by_page[25][:4], key=lambda x: x['img_num'])
-        elif q['number'] == 2:
-            # Q2: Graph on page 20
-            if 20 in images_by_page:
-                q['images'] = images_by_page[20][:1]
-        elif q['number'] == 3:
-            # Q3: Scatterplot on page 22
-            if 22 in images_by_page:
-                q['images'] = images_by_page[22][:1]
+def extract_all_math_questions():
+    """Extract all 22 Math questions with full text, writing the images they use"""
+    engine = ExtractionEngine(PDF_PATH)
+    questions = engine.extract([MODULE]).get(MODULE, {}).get('questions', {})
+    
+    # Images go where import.py looks for them
+    sink = engine.image_sink()
+    for q_num, q in questions.items():
+        if q['image_type'] == 'choices':
+            stems = [IMAGE_FOLDER / f"q{q_num}-option{letter}" for letter in 'ABCD']
         else:
-            # Other questions - match by page
-            # Rough mapping
-            if q['number'] <= 7 and 23 in images_by_page:
-                q['images'] = images_by_page[23][:1]
-            elif q['number'] >= 11 and 26 in images_by_page:
-                q['images'] = images_by_page[26][:1]
+            stems = [IMAGE_FOLDER / f"q{q_num}-graph"]
+        urls = [sink.place(engine.image_refs[name], stem) for name, stem in zip(q['images'], stems)]
+        q['images'] = [Path(url).name for url in urls if url]
+    sink.store.save()
+    engine.close()
     
-    return questions
+    return [questions[q_num] for q_num in sorted(questions)]
 
 def create_csv_for_import(questions):
     """Create CSV rows ready for import"""
     rows = []
     
     for q in questions:
-        # Combine text parts
-        text = ' '.join(q['text_parts']).strip()
-        if not text:
-            text = f"Math question {q['number']}"
-        
-        # Clean up text (remove extra spaces)
-        text = re.sub(r'\s+', ' ', text)
+        text = q['text'] or f"Math question {q['number']}"
         
         # Get choices
-        choices = q['choices']
+        choices = list(q['choices'])
         while len(choices) < 4:
             choices.append('')
         
         # Handle images
         image_name = ''
-        has_image_choices = False
+        has_image_choices = q['image_type'] == 'choices'
         
-        if q['images']:
-            if len(q['images']) == 4:
-                # Math question with 4 graph choices (like Q1)
-                has_image_choices = True
-                # Use image paths as choices
-                choices = [img['filename'] for img in sorted(q['images'], key=lambda x: x['img_num'])]
-            elif len(q['images']) == 1:
-                # Single image
-                image_name = f"q{q['number']}-graph.png"
+        if has_image_choices:
+            # Math question with 4 graph choices (like Q1): image files as choices
+            choices = q['images'] + [''] * (4 - len(q['images']))
+        elif q['images']:
+            # Single image
+            image_name = q['images'][0]
         
         row = {
             'question_number': q['number'],
             'question_text': text[:500],
             'prompt': '',
-            'choice_a': choices[0] if len(choices) > 0 else '',
-            'choice_b': choices[1] if len(choices) > 1 else '',
-            'choice_c': choices[2] if len(choices) > 2 else '',
-            'choice_d': choices[3] if len(choices) > 3 else '',
+            'choice_a': choices[0],
+            'choice_b': choices[1],
+            'choice_c': choices[2],
+            'choice_d': choices[3],
             'correct_answer': '',  # Fill manually
             'explanation': '',  # Fill manually
             'image_name': image_name,
@@ -177,18 +86,15 @@ def create_csv_for_import(questions):
 def main():
     print("🔍 Extracting Math Module 1 questions...\n")
     
-    # Extract questions
+    # Extract questions and match with images
     questions = extract_all_math_questions()
     print(f"✅ Found {len(questions)} questions")
     
-    # Match with images
-    questions = match_images_to_questions(questions)
-    
     # Show first few
     print("\nFirst 3 questions:")
     for q in questions[:3]:
         print(f"\nQuestion {q['number']}:")
-        print(f"  Text: {q['text_parts'][0] if q['text_parts'] else 'No text'}")
+        print(f"  Text: {q['text'][:80] or 'No text'}")
         print(f"  Choices: {len(q['choices'])}")
         print(f"  Images: {len(q['images'])}")
     
@@ -214,4 +120,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -3,11 +3,10 @@
 Quick fix for questions with incomplete text extraction
 """
 
-import json
+from db_format import load_database, save_database
 
 # Load database
-with open('questions-database.json', 'r') as f:
-    db = json.load(f)
+db = load_database('questions-database.json')
 
 # Fix Q14 text
 for q in db:
@@ -22,8 +21,7 @@ for q in db:
 #         q['questionText'] = 'Your correct question text here'
 
 # Save
-with open('questions-database.json', 'w') as f:
-    json.dump(db, f, indent=2, ensure_ascii=False)
+save_database(db, 'questions-database.json')
 
 print("\n✅ Question texts updated!")
 
@@ -3,17 +3,15 @@
 Complete fix for US v1 questions - extract from PDF and update database properly
 """
 
-import fitz  # PyMuPDF
-import json
 import re
 from pathlib import Path
 from collections import defaultdict
+from db_format import load_database, save_database
+from extraction_cache import cached_map_pages
+from merge_engine import merge_questions
 
-def load_database():
-    """Load database"""
-    db_path = Path("questions-database.json")
-    with open(db_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+# PDF text replaces the database text unless it is much shorter
+FIX_POLICIES = {'questionText': 'longer', 'choices': 'choices'}
 
 def find_usv1_questions(database):
     """Find all US v1 questions, grouped by module and question number"""
@@ -29,28 +27,21 @@ def find_usv1_questions(database):
 
 def extract_text_from_pdf(pdf_path):
     """Extract full text from PDF"""
-    doc = fitz.open(pdf_path)
     full_text = {}
     
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        text = page.get_text()
+    for page_num, text in enumerate(cached_map_pages(pdf_path, 'text')):
         full_text[page_num + 1] = text
     
-    doc.close()
     return full_text
 
-def update_question_from_pdf_text(db_question, pdf_text_by_page):
-    """Update a database question with complete text from PDF"""
-    updated = False
-    
+def pdf_update_for_question(db_question, pdf_text_by_page):
+    """The question's text and choices as found in the PDF, or None"""
     # Get the question's page if available, or search all pages
     # For now, we'll search all text for this question's number
     q_num = db_question.get('questionNumber')
-    module = db_question.get('module', '')
     
     if not q_num:
-        return db_question, False
+        return None
     
     # Search PDF text for this question
     for page_num, text in pdf_text_by_page.items():
@@ -60,12 +51,12 @@ def update_question_from_pdf_text(db_question, pdf_text_by_page):
         
         if match:
             pdf_text = match.group(1).strip()
-            db_text = db_question.get('questionText', '').strip()
-            
-            # If PDF text is more complete, update
-            if len(pdf_text) > len(db_text) * 0.8:
-                db_question['questionText'] = pdf_text
-                updated = True
+            update = {
+                'testId': db_question.get('testId'),
+                'module': db_question.get('module'),
+                'questionNumber': q_num,
+                'questionText': pdf_text,
+            }
             
             # Extract choices
             choices = []
@@ -76,13 +67,12 @@ def update_question_from_pdf_text(db_question, pdf_text_by_page):
                 choice_text = re.sub(r'\s+', ' ', choice_text)
                 choices.append(choice_text)
             
-            if choices and (not db_question.get('choices') or any(c == '' or c == '-' for c in db_question.get('choices', []))):
-                db_question['choices'] = choices
-                updated = True
+            if choices:
+                update['choices'] = choices
             
-            break
+            return update
     
-    return db_question, updated
+    return None
 
 def main():
     print("="*80)
@@ -106,48 +96,29 @@ def main():
     pdf_text = extract_text_from_pdf(str(pdf_path))
     print(f"   ✓ Extracted text from {len(pdf_text)} pages")
     
-    # Update each question
+    # Text from the PDF if it is more complete, choices if the database has none
     print("\n🔄 Updating questions with complete text...")
-    updated_count = 0
-    
+    incoming = []
     for (module, q_num), questions in grouped.items():
         # Use the question with the lowest ID (original)
         questions.sort(key=lambda x: x.get('id', 0))
-        q = questions[0]
-        
-        updated_q, was_updated = update_question_from_pdf_text(q, pdf_text)
-        
-        if was_updated:
-            # Update in database
-            for i, db_q in enumerate(database):
-                if db_q.get('id') == updated_q.get('id'):
-                    database[i] = updated_q
-                    updated_count += 1
-                    print(f"   ✓ Updated Q{q_num} ({module})")
-                    break
+        update = pdf_update_for_question(questions[0], pdf_text)
+        if update:
+            incoming.append(update)
     
-    # Remove duplicates (keep only the first question for each module/q_num)
+    # Duplicates (same module + question number) are folded into the original
     print(f"\n🗑️  Removing duplicates...")
-    ids_to_remove = []
-    for (module, q_num), questions in grouped.items():
-        if len(questions) > 1:
-            # Keep first, remove others
-            questions.sort(key=lambda x: x.get('id', 0))
-            for q in questions[1:]:
-                ids_to_remove.append(q.get('id'))
-    
-    database = [q for q in database if q.get('id') not in ids_to_remove]
-    print(f"   ✓ Removed {len(ids_to_remove)} duplicate questions")
+    result = merge_questions(database, incoming, FIX_POLICIES, dedupe=True, insert=False, tests={'usv1'})
+    result.print_report()
     
     # Save database
     db_path = Path("questions-database.json")
-    with open(db_path, 'w', encoding='utf-8') as f:
-        json.dump(database, f, indent=2, ensure_ascii=False)
+    save_database(result.db, db_path)
     
     print(f"\n✅ Complete!")
-    print(f"   • Updated: {updated_count} questions")
-    print(f"   • Removed: {len(ids_to_remove)} duplicates")
-    print(f"   • Total US v1 questions: {len([q for q in database if q.get('testId') == 'usv1'])}")
+    print(f"   • Updated: {len(result.updated)} questions")
+    print(f"   • Removed: {len(result.removed)} duplicates")
+    print(f"   • Total US v1 questions: {len([q for q in result.db if q.get('testId') == 'usv1'])}")
 
 if __name__ == "__main__":
     main()
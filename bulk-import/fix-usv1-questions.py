@@ -5,10 +5,12 @@ Fix missing text and images
 """
 
 import fitz  # PyMuPDF
-import json
 import re
 from pathlib import Path
-from collections import defaultdict
+from db_format import load_database, save_database
+from merge_engine import longer_than, merge_questions
+
+FIX_POLICIES = {'questionText': longer_than(1.2), 'choices': 'choices'}
 
 def extract_full_text_from_pdf(pdf_path):
     """Extract all text from PDF preserving structure"""
@@ -24,7 +26,7 @@ def extract_full_text_from_pdf(pdf_path):
     return full_text
 
 def extract_questions_from_pdf(pdf_path):
-    """Extract all questions with full text from PDF"""
+    """Extract all questions with full text from PDF, keyed by (module, number)"""
     doc = fitz.open(pdf_path)
     questions = {}
     current_module = None
@@ -97,7 +99,8 @@ def extract_questions_from_pdf(pdf_path):
                     # Check if grid-in (no choices or specific pattern)
                     is_grid_in = len(choices) == 0 or 'Enter your answer' in full_q_text.lower()
                     
-                    questions[q_num] = {
+                    # Every module has a question 1, so the module is part of the key
+                    questions[(current_module, q_num)] = {
                         'number': q_num,
                         'module': current_module,
                         'text': full_q_text,
@@ -110,126 +113,29 @@ def extract_questions_from_pdf(pdf_path):
     doc.close()
     return questions
 
-def load_database():
-    """Load current database"""
-    db_path = Path("questions-database.json")
-    if db_path.exists():
-        with open(db_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+def pdf_updates(pdf_questions):
+    """Incoming records for the merge: each PDF question's text and choices"""
+    updates = []
+    for (module, q_num), pdf_q in pdf_questions.items():
+        update = {
+            'testId': 'usv1',
+            'module': module,
+            'questionNumber': q_num,
+            'questionText': pdf_q.get('text', '').strip(),
+        }
+        if pdf_q.get('choices'):
+            update['choices'] = pdf_q['choices']
+        updates.append(update)
+    return updates
 
-def find_usv1_questions(database):
-    """Find all US v1 questions in database"""
-    usv1_questions = {}
-    for q in database:
-        if q.get('testId') == 'usv1':
-            q_num = q.get('questionNumber')
-            if q_num:
-                usv1_questions[q_num] = q
-    return usv1_questions
-
-def compare_and_fix(pdf_questions, db_questions, database):
-    """Compare PDF questions with database and fix missing text/images"""
-    fixes = []
-    
-    for q_num, pdf_q in pdf_questions.items():
-        db_q = db_questions.get(q_num)
-        
-        if not db_q:
-            print(f"⚠️  Q{q_num}: Missing from database!")
-            fixes.append({
-                'number': q_num,
-                'action': 'add',
-                'data': pdf_q
-            })
-            continue
-        
-        # Check if text is missing or incomplete
-        db_text = db_q.get('questionText', '').strip()
-        pdf_text = pdf_q.get('text', '').strip()
-        
-        if len(pdf_text) > len(db_text) * 1.2:  # PDF text is significantly longer
-            print(f"📝 Q{q_num}: Text appears incomplete")
-            fixes.append({
-                'number': q_num,
-                'action': 'update_text',
-                'old_text': db_text[:100] + '...',
-                'new_text': pdf_text[:100] + '...',
-                'id': db_q.get('id')
-            })
-        
-        # Check if choices are missing
-        db_choices = db_q.get('choices', [])
-        pdf_choices = pdf_q.get('choices', [])
-        
-        if pdf_choices and not db_choices:
-            print(f"📋 Q{q_num}: Missing choices")
-            fixes.append({
-                'number': q_num,
-                'action': 'add_choices',
-                'choices': pdf_choices,
-                'id': db_q.get('id')
-            })
-        elif pdf_choices and db_choices:
-            # Check if choices are empty strings
-            if any(c == '' or c == '-' for c in db_choices):
-                print(f"📋 Q{q_num}: Empty/invalid choices")
-                fixes.append({
-                    'number': q_num,
-                    'action': 'update_choices',
-                    'old_choices': db_choices,
-                    'new_choices': pdf_choices,
-                    'id': db_q.get('id')
-                })
-        
-        # Check if images are missing
-        db_image = db_q.get('imageUrl', '')
-        if 'shown' in pdf_text.lower() or 'figure' in pdf_text.lower() or 'graph' in pdf_text.lower():
-            if not db_image:
-                print(f"🖼️  Q{q_num}: Missing image (text suggests image needed)")
-                fixes.append({
-                    'number': q_num,
-                    'action': 'needs_image',
-                    'id': db_q.get('id')
-                })
-    
-    return fixes, database
-
-def apply_fixes(fixes, database):
-    """Apply fixes to database"""
-    print(f"\n🔧 Applying {len(fixes)} fixes...")
-    
-    for fix in fixes:
-        q_id = fix.get('id')
-        q_num = fix.get('number')
-        action = fix.get('action')
-        
-        # Find question in database
-        q_index = None
-        for i, q in enumerate(database):
-            if q.get('id') == q_id:
-                q_index = i
-                break
-        
-        if q_index is None:
-            print(f"  ⚠️  Q{q_num}: Could not find question ID {q_id}")
-            continue
-        
-        q = database[q_index]
-        
-        if action == 'update_text':
-            q['questionText'] = fix['new_text']
-            print(f"  ✓ Q{q_num}: Updated text")
-        
-        elif action == 'add_choices':
-            q['choices'] = fix['choices']
-            print(f"  ✓ Q{q_num}: Added choices")
-        
-        elif action == 'update_choices':
-            q['choices'] = fix['new_choices']
-            print(f"  ✓ Q{q_num}: Updated choices")
-    
-    return database
+def report_missing_images(pdf_questions, database):
+    """Questions whose PDF text suggests an image the database doesn't have"""
+    db_questions = {(q.get('module'), q.get('questionNumber')): q for q in database if q.get('testId') == 'usv1'}
+    for key, pdf_q in pdf_questions.items():
+        db_q = db_questions.get(key)
+        pdf_text = pdf_q.get('text', '').lower()
+        if db_q and not db_q.get('imageUrl') and ('shown' in pdf_text or 'figure' in pdf_text or 'graph' in pdf_text):
+            print(f"🖼️  {key[0]} Q{key[1]}: Missing image (text suggests image needed)")
 
 def main():
     pdf_path = "bulk-import/202503usv1.pdf"
@@ -248,22 +154,17 @@ def main():
     
     # Load database
     database = load_database()
-    db_questions = find_usv1_questions(database)
-    print(f"✅ Found {len(db_questions)} US v1 questions in database")
+    print(f"✅ Found {sum(1 for q in database if q.get('testId') == 'usv1')} US v1 questions in database")
     
-    # Compare and find fixes
-    fixes, database = compare_and_fix(pdf_questions, db_questions, database)
+    # Text if the PDF's is significantly longer (not just reflowed), choices if missing or empty/invalid
+    result = merge_questions(database, pdf_updates(pdf_questions), FIX_POLICIES, insert=False, tests={'usv1'})
+    result.print_report()
+    report_missing_images(pdf_questions, result.db)
     
-    print(f"\n📊 Found {len(fixes)} issues to fix")
-    
-    if fixes:
-        # Apply fixes
-        database = apply_fixes(fixes, database)
-        
+    if result.changed:
         # Save database
         db_path = Path("questions-database.json")
-        with open(db_path, 'w', encoding='utf-8') as f:
-            json.dump(database, f, indent=2, ensure_ascii=False)
+        save_database(result.db, db_path)
         
         print(f"\n✅ Database updated!")
     else:
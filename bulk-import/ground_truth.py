@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Ground truth for scoring the importers
+
+Collects what we know to be right about the bundled tests:
+    - every module has 27 (Reading and Writing) or 22 (Math) questions
+    - hand-checked answer keys: ANSWERS-COMPLETE.md ("SOLVED" table) and
+      answer-key.txt for asiav1 Math Module 1, asiav6-answer-key.json for asiav6
+    - the curated questions-database.json for everything else (answers,
+      which questions have choices, which have images)
+
+Answers are compared normalized: 0-3 and "A"-"D" are the same letter, other
+answers (grid-ins) compare as trimmed strings.
+
+    truth = GroundTruth(load_database())
+    truth.answer('asiav1', 'Math Module 1', 5)     # 'D'
+    truth.image_kind('usv1', 'Math Module 2', 3)   # 'none' | 'single' | 'choices'
+"""
+
+import json
+import re
+from pathlib import Path
+
+HERE = Path(__file__).parent
+
+# (testId, module) each hand-checked key belongs to
+ANSWERS_COMPLETE = (HERE / "ANSWERS-COMPLETE.md", 'asiav1', 'Math Module 1')
+ANSWER_KEY_TXT = (HERE / "answer-key.txt", 'asiav1', 'Math Module 1')
+ASIAV6_KEY = (HERE / "asiav6-answer-key.json", 'asiav6')
+
+
+def expected_questions(module_name):
+    return 22 if module_name.startswith('Math') else 27
+
+
+def normalize_answer(answer):
+    if isinstance(answer, int) and 0 <= answer <= 3:
+        return 'ABCD'[answer]
+    return str(answer).strip().upper()
+
+
+def image_kind(q):
+    if q.get('hasImageChoices'):
+        return 'choices'
+    return 'single' if q.get('imageUrl') else 'none'
+
+
+def parse_answers_complete(path):
+    """Q# -> letter from the SOLVED table (rows like '| 4 | **B** | ...')"""
+    answers = {}
+    if not path.exists():
+        return answers
+    in_solved = False
+    for line in path.read_text(encoding='utf-8').splitlines():
+        if line.startswith('## '):
+            in_solved = 'SOLVED' in line
+            continue
+        match = re.match(r'^\|\s*(\d+)\s*\|\s*\*\*([A-D])\*\*', line)
+        if in_solved and match:
+            answers[int(match.group(1))] = match.group(2)
+    return answers
+
+
+def parse_answer_key_txt(path):
+    """Q# -> letter for every 'ANSWER: X' line that gives one (not placeholders or VERIFY notes)"""
+    answers = {}
+    if not path.exists():
+        return answers
+    q_num = None
+    for line in path.read_text(encoding='utf-8').splitlines():
+        match = re.match(r'^Q(\d+):', line)
+        if match:
+            q_num = int(match.group(1))
+        match = re.match(r'^ANSWER:\s*([A-D])\b', line)
+        unsure = re.search(r'verify|placeholder', line, re.IGNORECASE)
+        if match and q_num is not None and not unsure:
+            answers[q_num] = match.group(1)
+    return answers
+
+
+class GroundTruth:
+    def __init__(self, db):
+        self.questions = {(q.get('testId'), q.get('module'), q.get('questionNumber')): q for q in db}
+
+        # Hand-checked keys win over the database
+        self.answers = {}
+        for key, q in self.questions.items():
+            if 'correctAnswer' in q:
+                self.answers[key] = normalize_answer(q['correctAnswer'])
+
+        path, test_id, module = ANSWER_KEY_TXT
+        for q_num, answer in parse_answer_key_txt(path).items():
+            self.answers[(test_id, module, q_num)] = answer
+        path, test_id, module = ANSWERS_COMPLETE
+        for q_num, answer in parse_answers_complete(path).items():
+            self.answers[(test_id, module, q_num)] = answer
+
+        path, test_id = ASIAV6_KEY
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for module, answers in json.load(f).items():
+                    for q_num, answer in answers.items():
+                        self.answers[(test_id, module, int(q_num))] = normalize_answer(answer)
+
+    def question(self, test_id, module, q_num):
+        return self.questions.get((test_id, module, q_num))
+
+    def answer(self, test_id, module, q_num):
+        return self.answers.get((test_id, module, q_num))
+
+    def image_kind(self, test_id, module, q_num):
+        q = self.question(test_id, module, q_num)
+        return image_kind(q) if q else None
+
+    def has_text_choices(self, test_id, module, q_num):
+        """Should extraction have found 4 text choices for this question?"""
+        q = self.question(test_id, module, q_num)
+        if q is None:
+            return module.startswith('Reading')
+        return q.get('questionType') != 'grid-in' and not q.get('hasImageChoices')
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Match images to questions by where they are on the page
+
+Each question region (page_layout.segment_module) owns a horizontal band of
+every page it covers: from where the question starts (or the top of the page,
+when it continues from the previous one) down to where the next question
+starts. An image belongs to the band its centre falls in. Bands are kept per
+page, sorted by their top edge, so each lookup is a binary search.
+
+    matches = match_images(regions_by_module, images_by_page)
+    matches[('Math Module 1', 7)]   # [image, ...] top to bottom
+
+Skipped: tiny images (bullets, rules), images repeated on many pages (logos,
+headers), images PyMuPDF can't place on the page, and images on pages without
+questions or above a module's first question (reference sheets, directions).
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+
+MIN_IMAGE_SIZE = 12      # points
+REPEATED_ON_PAGES = 3    # an xref on this many pages is decoration
+
+
+class RegionIndex:
+    """Per-page index of question bands along the y axis"""
+
+    def __init__(self, regions_by_module):
+        bands = defaultdict(list)
+        for module_name, regions in regions_by_module.items():
+            for q_num, region in regions.items():
+                for page_num, (y0, _) in region['boxes'].items():
+                    top = y0 if page_num == region['page'] else 0.0
+                    bands[page_num].append((top, (module_name, q_num)))
+
+        self.tops = {}
+        self.keys = {}
+        for page_num, page_bands in bands.items():
+            page_bands.sort(key=lambda band: band[0])
+            self.tops[page_num] = [top for top, _ in page_bands]
+            self.keys[page_num] = [key for _, key in page_bands]
+
+    def lookup(self, page_num, y):
+        """(module, question number) whose band contains y on the page, or None"""
+        if page_num not in self.tops:
+            # No question on the page (reference sheet, intro, directions)
+            return None
+        i = bisect_right(self.tops[page_num], y) - 1
+        if i >= 0:
+            return self.keys[page_num][i]
+        # Above the first question on the page: the previous page's last
+        # question runs onto this one - unless that's another module's
+        previous = self.keys.get(page_num - 1)
+        if previous and previous[-1][0] == self.keys[page_num][0][0]:
+            return previous[-1]
+        return None
+
+
+def match_images(regions_by_module, images_by_page):
+    """{(module, question number): [image, ...]} with images in reading order"""
+    index = RegionIndex(regions_by_module)
+
+    pages_per_xref = defaultdict(set)
+    for page_num, images in images_by_page.items():
+        for image in images:
+            pages_per_xref[image['xref']].add(page_num)
+
+    matches = defaultdict(list)
+    for page_num, images in images_by_page.items():
+        for image in images:
+            rect = image.get('rect')
+            if not rect:
+                continue
+            x0, y0, x1, y1 = rect
+            if x1 - x0 < MIN_IMAGE_SIZE or y1 - y0 < MIN_IMAGE_SIZE:
+                continue
+            if len(pages_per_xref[image['xref']]) >= REPEATED_ON_PAGES:
+                continue
+
+            key = index.lookup(page_num, (y0 + y1) / 2)
+            if key:
+                matches[key].append(image)
+
+    for images in matches.values():
+        images.sort(key=lambda image: (image['page'], image['rect'][1], image['rect'][0]))
+    return matches
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Write PDF images straight to their final, content-addressed location
+
+Importers used to save every image to a temp folder, copy the ones a question
+used into images/<date>/<test>/ and then delete the temp folder. An ImageSink
+skips all of that: extraction only records where each image is (see
+parallel_extract.page_image_refs), and when a question needs an image the sink
+decodes that xref once, stores it as an ImageStore blob and links the served
+name to it. Images no question uses are never written.
+
+    sink = ImageSink(doc, ImageStore())
+    url = sink.place(ref, "images/2025-03/asiav1/math-module-1-q3-diagram")
+    # -> "images/2025-03/asiav1/math-module-1-q3-diagram.jpeg"
+    sink.store.save()
+"""
+
+from pathlib import Path
+
+from parallel_extract import image_bytes
+
+
+class ImageSink:
+    def __init__(self, doc, store):
+        self.doc = doc
+        self.store = store
+
+        # xref -> (sha256, ext), so an image used twice is decoded once
+        self.blobs = {}
+
+    def place(self, ref, logical_stem):
+        """Serve image `ref` as logical_stem + its extension; returns that path, or None if unreadable"""
+        xref = ref['xref']
+        if xref not in self.blobs:
+            try:
+                data, ext = image_bytes(self.doc, xref, ref.get('smask', 0))
+            except Exception:
+                return None
+            self.blobs[xref] = (self.store.put_bytes(data, f".{ext}"), f".{ext}")
+
+        digest, ext = self.blobs[xref]
+        return self.store.link(Path(f"{logical_stem}{ext}"), digest, ext)
+
+    def stats(self):
+        return {'images_encoded': len(self.blobs), 'image_bytes_written': self.store.bytes_written}
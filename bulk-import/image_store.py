@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Content-addressed image store
+
+Every image is stored once under images/.store/blobs/<sha256[:2]>/<sha256>.<ext>.
+The files the site actually serves (images/2025-03/asiav1/math-module-1-q10-optionA.png,
+...) are "logical names": images/.store/manifest.json maps each one to a blob and
+the logical file itself is a hardlink (or reflink, or as a last resort a copy) of it.
+Question records keep referencing logical names, so nothing in the frontend changes.
+
+The same PNG imported under three names costs one blob, and "copying" an image
+into place is just a link.
+
+NOTE: logical files share their bytes with the blob. Replace an image by adding
+a new file (store.add), never by editing the served file in place. Files added
+from elsewhere are copied (or reflinked) into the store, never linked, so the
+caller may keep rewriting them - the extraction scripts rewrite
+bulk-import/images/*.png in place, which is why dedupe leaves that folder alone.
+For the same reason, images the store puts into bulk-import/images (the Math
+Module 1 CSV scripts) are copies (or reflinks) of their blob, never hardlinks.
+
+In a dry run (QUESTIONS_DB_DRY_RUN, see changeset.py) blobs are still stored,
+but links are only recorded in STAGED_LINKS and end up in the changeset. The
+changeset pins those blobs (images/.store/pins.json) so gc keeps them until it
+is applied or discarded; pins of changeset files that no longer exist lapse.
+
+Usage:
+    python3 bulk-import/image_store.py dedupe [folder ...]    # default: images
+    python3 bulk-import/image_store.py gc [--prune]           # --prune: forget names no question uses
+    python3 bulk-import/image_store.py stats
+"""
+
+import hashlib
+import os
+import platform
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from db_format import DB_PATH, dry_run_path, load_database, dumps, loads, write_bytes_atomic
+
+STORE_ROOT = Path("images/.store")
+MATERIALIZE_MODES = ('hardlink', 'reflink', 'copy')
+
+FICLONE = 0x40049409  # Linux ioctl for reflink copies (btrfs, xfs)
+
+# Folders scripts rewrite files in place: a hardlink there would rewrite the blob
+SCRATCH_FOLDERS = (Path("bulk-import/images"),)
+
+# Links dry-run stores would have made: {'logical', 'sha256', 'ext'}
+STAGED_LINKS = []
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def reflink(src, dst):
+    """Copy-on-write clone of src; raises OSError if the filesystem can't do it"""
+    if platform.system() == 'Darwin':
+        result = subprocess.run(['cp', '-c', str(src), str(dst)], capture_output=True)
+        if result.returncode != 0:
+            raise OSError(result.stderr.decode(errors='replace').strip())
+        return
+
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.unlink(dst)
+            raise
+
+
+def place(src, dst, mode='hardlink'):
+    """Make dst have src's bytes, trying the cheapest mechanism first"""
+    modes = MATERIALIZE_MODES[MATERIALIZE_MODES.index(mode):]
+    for m in modes:
+        try:
+            if m == 'hardlink':
+                os.link(src, dst)
+            elif m == 'reflink':
+                reflink(src, dst)
+            else:
+                shutil.copyfile(src, dst)
+            return m
+        except OSError:
+            if m == modes[-1]:
+                raise
+    return None
+
+
+def in_scratch_folder(path):
+    path = Path(path).resolve()
+    return any(folder.resolve() in path.parents for folder in SCRATCH_FOLDERS)
+
+
+def referenced_images(db):
+    """Logical image names used by any question"""
+    names = set()
+    for q in db:
+        if q.get('imageUrl'):
+            names.add(q['imageUrl'])
+        if q.get('hasImageChoices'):
+            names.update(c for c in q.get('choices', []) if c)
+    return names
+
+
+class ImageStore:
+    def __init__(self, root=STORE_ROOT, mode='hardlink', dry_run=None):
+        self.root = Path(root)
+        self.blob_root = self.root / "blobs"
+        self.manifest_path = self.root / "manifest.json"
+        self.pins_path = self.root / "pins.json"
+        self.mode = mode
+        self.dry_run = dry_run_path() is not None if dry_run is None else dry_run
+        self.bytes_written = 0
+
+        self.manifest = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'rb') as f:
+                self.manifest = loads(f.read())
+
+    def blob_path(self, digest, ext='.png'):
+        return self.blob_root / digest[:2] / f"{digest}{ext}"
+
+    def blob_for(self, logical):
+        entry = self.manifest.get(str(logical))
+        return self.blob_path(entry['sha256'], entry['ext']) if entry else None
+
+    def put_bytes(self, data, ext='.png'):
+        """Store raw image bytes; returns the SHA-256"""
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self.blob_path(digest, ext)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            write_bytes_atomic(blob, data)
+            self.bytes_written += len(data)
+        return digest
+
+    def put_file(self, src):
+        """Store a copy of an image file; returns the SHA-256"""
+        src = Path(src)
+        digest = sha256_file(src)
+        blob = self.blob_path(digest, src.suffix.lower())
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            # A hardlink would make src the blob, and rewriting src would change it
+            tmp = blob.with_name(blob.name + '.tmp')
+            if tmp.exists():
+                tmp.unlink()
+            place(src, tmp, 'reflink')
+            os.replace(tmp, blob)
+            self.bytes_written += blob.stat().st_size
+        return digest
+
+    def link(self, logical, digest, ext='.png'):
+        """Point a logical name at a blob and materialize it on disk"""
+        logical = Path(logical)
+        if self.dry_run:
+            STAGED_LINKS.append({'logical': logical.as_posix(), 'sha256': digest, 'ext': ext})
+            return logical.as_posix()
+        self.manifest[logical.as_posix()] = {'sha256': digest, 'ext': ext}
+        self.materialize(logical)
+        return logical.as_posix()
+
+    def add(self, src, logical):
+        """Replacement for shutil.copy(src, logical)"""
+        src = Path(src)
+        return self.link(logical, self.put_file(src), src.suffix.lower())
+
+    def add_bytes(self, data, logical, ext='.png'):
+        return self.link(logical, self.put_bytes(data, ext), ext)
+
+    def materialize(self, logical, mode=None):
+        """(Re)create the served file for a logical name from its blob"""
+        logical = Path(logical)
+        blob = self.blob_for(logical)
+        if blob is None:
+            raise KeyError(f"{logical} is not in the image store")
+
+        if logical.exists():
+            if os.path.samefile(logical, blob):
+                return None
+        if mode is None:
+            mode = 'reflink' if in_scratch_folder(logical) else self.mode
+        logical.parent.mkdir(parents=True, exist_ok=True)
+        tmp = logical.with_name(logical.name + '.tmp')
+        if tmp.exists():
+            tmp.unlink()
+        used = place(blob, tmp, mode)
+        os.replace(tmp, logical)
+        return used
+
+    def save(self):
+        if self.dry_run:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(self.manifest_path, dumps(self.manifest, 'review'))
+
+    def load_pins(self):
+        """changeset path -> [[sha256, ext], ...] of the blobs it will link"""
+        if not self.pins_path.exists():
+            return {}
+        with open(self.pins_path, 'rb') as f:
+            return loads(f.read())
+
+    def save_pins(self, pins):
+        # Written even in a dry run: pinning is what a dry run needs
+        self.root.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(self.pins_path, dumps(pins, 'review'))
+
+    def pin(self, owner, images):
+        """Keep the blobs of images ({'sha256', 'ext'}) through gc until unpin(owner)"""
+        pins = self.load_pins()
+        pins[str(Path(owner).resolve())] = sorted({(i['sha256'], i['ext']) for i in images})
+        self.save_pins(pins)
+
+    def unpin(self, owner):
+        pins = self.load_pins()
+        if pins.pop(str(Path(owner).resolve()), None) is not None:
+            self.save_pins(pins)
+
+    def dedupe(self, folders):
+        """Ingest existing image folders and replace duplicates with links"""
+        before = 0
+        for folder in folders:
+            for path in sorted(Path(folder).rglob('*')):
+                if not path.is_file() or self.root in path.parents:
+                    continue
+                if path.suffix.lower() not in ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp'):
+                    continue
+                before += path.stat().st_size
+                self.add(path, path)
+        self.save()
+        return before
+
+    def gc(self, referenced=None):
+        """Delete blobs no logical name points at (and, with `referenced`, unused names)"""
+        forgotten = 0
+        if referenced is not None:
+            for logical in [k for k in self.manifest if k not in referenced]:
+                del self.manifest[logical]
+                forgotten += 1
+            self.save()
+
+        live = {self.blob_path(e['sha256'], e['ext']) for e in self.manifest.values()}
+        pins = self.load_pins()
+        lapsed = [owner for owner in pins if not Path(owner).exists()]
+        for owner in lapsed:
+            del pins[owner]
+        if lapsed:
+            self.save_pins(pins)
+        live |= {self.blob_path(digest, ext) for blobs in pins.values() for digest, ext in blobs}
+        removed = 0
+        freed = 0
+        if self.blob_root.exists():
+            for blob in self.blob_root.rglob('*'):
+                if blob.is_file() and blob not in live:
+                    freed += blob.stat().st_size
+                    blob.unlink()
+                    removed += 1
+        return forgotten, removed, freed
+
+    def stats(self):
+        blobs = {(e['sha256'], e['ext']) for e in self.manifest.values()}
+        stored = sum(self.blob_path(d, ext).stat().st_size
+                     for d, ext in blobs if self.blob_path(d, ext).exists())
+        return len(self.manifest), len(blobs), stored
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('dedupe', 'gc', 'stats'):
+        print("Usage: python3 bulk-import/image_store.py <dedupe|gc|stats> [args]")
+        sys.exit(1)
+
+    store = ImageStore()
+    command = sys.argv[1]
+
+    if command == 'dedupe':
+        folders = sys.argv[2:] or ['images']
+        print(f"🔗 Deduplicating {', '.join(folders)}...")
+        before = store.dedupe(folders)
+        names, blobs, stored = store.stats()
+        print(f"   ✓ {names} images → {blobs} unique blobs")
+        print(f"   ✓ {before / 1e6:.1f} MB of files now use {stored / 1e6:.1f} MB on disk")
+    elif command == 'gc':
+        referenced = referenced_images(load_database(DB_PATH)) if '--prune' in sys.argv else None
+        forgotten, removed, freed = store.gc(referenced)
+        if referenced is not None:
+            print(f"   ✓ Forgot {forgotten} image names no question references")
+        print(f"🧹 Removed {removed} unreferenced blobs ({freed / 1e6:.1f} MB)")
+    else:
+        names, blobs, stored = store.stats()
+        print(f"📦 {names} image names, {blobs} blobs, {stored / 1e6:.1f} MB stored")
+
+
+if __name__ == "__main__":
+    main()
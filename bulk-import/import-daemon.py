@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+📥 IMPORT DAEMON
+Watch an inbox folder and import every PDF dropped into it, in the background.
+
+Usage:
+    python3 bulk-import/import-daemon.py [--inbox bulk-import/inbox] [--workers N] [--interval SECONDS] [--once]
+
+Drop a PDF and a sidecar JSON with its test details into the inbox:
+
+    bulk-import/inbox/202504usv1.pdf
+    bulk-import/inbox/202504usv1.json   {"name": "2025-04 US Test 1", "date": "2025-04",
+                                         "region": "US", "number": 1}
+
+What it does:
+    ✅ Queues a PDF once its sidecar is there and it has finished copying
+    ✅ Extracts up to N PDFs at once (--workers, default 2), each in its own
+       process, logging to inbox/logs/<job>.log
+    ✅ Writes finished extractions to the database one at a time, exactly like
+       fast-import.py (re-imports only rewrite what changed)
+    ✅ The running server (every worker) picks up the new database on its
+       next request, since it checks the database's mtime
+    ✅ Keeps inbox/status.json up to date (queue depth, per-job state and
+       timings) - also at http://localhost:8000/api/imports
+    ✅ Moves each PDF to inbox/done/ or inbox/failed/ afterwards
+
+--once imports whatever is in the inbox and exits instead of watching it.
+Jobs interrupted by stopping the daemon are picked up again on its next start.
+"""
+
+import importlib.util
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from import_queue import INBOX, ImportQueue
+
+
+def load_importer_class():
+    """fast-import.py has a dash in its name, so load it by path"""
+    spec = importlib.util.spec_from_file_location("fast_import", Path(__file__).parent / "fast-import.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.FastSATImporter
+
+
+def make_importer(job):
+    FastSATImporter = load_importer_class()
+    return FastSATImporter(job['pdf'], job['name'], job['date'], job['region'], int(job['number']), workers=1)
+
+
+def extract_job(job, log_path):
+    """Worker: run extraction steps 1-6 for one PDF; they're checkpointed for commit_job"""
+    start = time.perf_counter()
+    with open(log_path, 'a', encoding='utf-8') as log, redirect_stdout(log), redirect_stderr(log):
+        try:
+            importer = make_importer(job)
+            importer.extract()
+            problems, stats = importer.validate()
+            importer.cleanup()
+            return {
+                # Missing modules are fatal; count mismatches are only reported
+                'ok': stats['questions'] > 0 and not any(p.endswith('not found') for p in problems),
+                'problems': problems,
+                'questions': stats['questions'],
+                'extract_seconds': round(time.perf_counter() - start, 3),
+            }
+        except Exception as e:
+            traceback.print_exc()
+            return {'ok': False, 'error': f"extraction failed: {e}",
+                    'extract_seconds': round(time.perf_counter() - start, 3)}
+
+
+def commit_job(job, log_path):
+    """Write one extracted PDF to the database (in the daemon, so writes never overlap)"""
+    start = time.perf_counter()
+    with open(log_path, 'a', encoding='utf-8') as log, redirect_stdout(log), redirect_stderr(log):
+        importer = make_importer(job)
+        # Every step comes back from the checkpoints extract_job saved
+        importer.extract()
+        result = importer.add_to_database()
+        importer.cleanup()
+    return {
+        'test_id': importer.test_id,
+        'added': len(result.inserted),
+        'updated': len(result.updated),
+        'database_seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def finish_job(queue, name, job, log_path, extracted):
+    extracted = dict(extracted)
+    if not extracted.pop('ok'):
+        queue.finish(name, False, **extracted)
+        print(f"   ❌ {name}: {extracted.get('error') or '; '.join(extracted['problems'])} (log: {log_path})")
+        return
+
+    try:
+        committed = commit_job(job, log_path)
+    except Exception as e:
+        with open(log_path, 'a', encoding='utf-8') as log:
+            traceback.print_exc(file=log)
+        queue.finish(name, False, **extracted, error=f"database update failed: {e}")
+        print(f"   ❌ {name}: database update failed: {e} (log: {log_path})")
+        return
+
+    queue.finish(name, True, **extracted, **committed)
+    print(f"   ✅ {name}: {committed['added']} added, {committed['updated']} updated in "
+          f"{extracted['extract_seconds'] + committed['database_seconds']:.1f}s")
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--inbox': str(INBOX), '--workers': '2', '--interval': '2'}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    once = '--once' in args
+    args = [a for a in args if a != '--once']
+
+    if args:
+        print("Usage: python3 bulk-import/import-daemon.py [--inbox DIR] [--workers N] [--interval SECONDS] "
+              "[--once]")
+        sys.exit(1)
+
+    workers = int(options['--workers'])
+    interval = float(options['--interval'])
+    queue = ImportQueue(options['--inbox'])
+    queue.recover()
+
+    print("=" * 80)
+    print(f"📥 IMPORT DAEMON - watching {queue.inbox}/ with {workers} workers")
+    print("=" * 80)
+
+    running = {}  # future -> (job name, manifest entry, log path)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            while True:
+                queue.scan()
+
+                # Only hand the pool what it can start, so the rest shows as queued
+                while queue.waiting and len(running) < workers:
+                    name, job, log_path = queue.next()
+                    print(f"   ⏳ {name}: importing {job['name']}")
+                    running[pool.submit(extract_job, job, log_path)] = (name, job, log_path)
+
+                for future in [f for f in running if f.done()]:
+                    name, job, log_path = running.pop(future)
+                    try:
+                        extracted = future.result()
+                    except Exception as e:
+                        # The worker process died
+                        extracted = {'ok': False, 'error': f"worker failed: {e}"}
+                    finish_job(queue, name, job, log_path, extracted)
+
+                queue.write_status()
+                # PDFs without a sidecar are never imported, so --once doesn't wait for them
+                copying = [pdf for pdf in queue.pending if pdf.with_suffix('.json').exists()]
+                if once and not (running or queue.waiting or copying):
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            print("\n\n👋 Daemon stopped - unfinished jobs are picked up on the next start")
+
+
+if __name__ == "__main__":
+    main()
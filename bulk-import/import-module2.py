@@ -4,11 +4,8 @@ Import Math Module 2 from PDF
 """
 
 import fitz
-import json
-import shutil
 import re
-from pathlib import Path
-from collections import defaultdict
+from db_format import load_database, save_database
 
 # Answer key from PDF page 34 for Math Module 2
 ANSWER_KEY = {
@@ -86,8 +83,7 @@ def extract_module2_questions():
 
 def add_to_database():
     # Load database
-    with open('questions-database.json', 'r') as f:
-        db = json.load(f)
+    db = load_database('questions-database.json')
     
     # Get next ID
     next_id = max(q['id'] for q in db) + 1
@@ -142,8 +138,7 @@ def add_to_database():
         print(f"✅ Q{q_num:2d} [{status}]: Answer = {answer_display}")
     
     # Save
-    with open('questions-database.json', 'w') as f:
-        json.dump(db, f, indent=2, ensure_ascii=False)
+    save_database(db, 'questions-database.json')
     
     print(f"\n✅ Added {added} Math Module 2 questions!")
 
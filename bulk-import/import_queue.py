@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Inbox of PDFs waiting to be imported, and the status the import daemon reports
+
+Drop a PDF into bulk-import/inbox/ with a sidecar JSON of the same name holding
+its test details (the fields of a batch manifest entry, without "pdf"):
+
+    bulk-import/inbox/202504usv1.pdf
+    bulk-import/inbox/202504usv1.json   {"name": "2025-04 US Test 1", "date": "2025-04",
+                                         "region": "US", "number": 1}
+
+A PDF is queued once its sidecar is there and its size stopped changing between
+two scans (it may still be copying). While queued or running its files sit in
+inbox/processing/, afterwards in inbox/done/ or inbox/failed/, and each job
+logs to inbox/logs/<job>.log.
+
+inbox/status.json (served by server.py at /api/imports) has the queue depth and
+the state and timings of every job:
+
+    {"updated": "...", "queued": 1, "running": 2, "pending": 0,
+     "jobs": [{"job": "202504usv1", "state": "done", "wait_seconds": 0.4,
+               "extract_seconds": 41.2, "database_seconds": 1.3, "total_seconds": 42.9, ...}]}
+"""
+
+import os
+import time
+from pathlib import Path
+
+from db_format import dumps, loads, write_bytes_atomic
+
+INBOX = Path("bulk-import/inbox")
+JOB_FIELDS = ('name', 'date', 'region', 'number')
+
+# Finished jobs kept in the status file
+MAX_FINISHED_JOBS = 50
+
+
+def status_path(inbox=INBOX):
+    return Path(inbox) / "status.json"
+
+
+def load_status(inbox=INBOX):
+    """The daemon's last status, or {} if it never ran"""
+    path = status_path(inbox)
+    return loads(path.read_bytes()) if path.exists() else {}
+
+
+def read_sidecar(path):
+    """Test details of a queued PDF; ValueError if they're unusable"""
+    try:
+        job = loads(Path(path).read_bytes())
+    except ValueError as e:
+        raise ValueError(f"{Path(path).name} is not valid JSON: {e}")
+    if not isinstance(job, dict):
+        raise ValueError(f"{Path(path).name} must be a JSON object")
+    missing = [field for field in JOB_FIELDS if field not in job]
+    if missing:
+        raise ValueError(f"{Path(path).name} is missing {', '.join(missing)}")
+    return job
+
+
+def now():
+    return time.strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ImportQueue:
+    def __init__(self, inbox=INBOX):
+        self.inbox = Path(inbox)
+        self.processing = self.inbox / "processing"
+        self.logs = self.inbox / "logs"
+        for folder in (self.processing, self.inbox / "done", self.inbox / "failed", self.logs):
+            folder.mkdir(parents=True, exist_ok=True)
+
+        self.sizes = {}        # PDF -> (size, mtime) at the last scan
+        self.jobs = {}         # job name -> status row, oldest first
+        self.waiting = []      # job names in queue order
+        self.details = {}      # job name -> test details from its sidecar
+        self.queued_at = {}    # job name -> time.time() it was queued
+
+    @property
+    def running(self):
+        return [name for name, row in self.jobs.items() if row['state'] == 'running']
+
+    @property
+    def pending(self):
+        """PDFs in the inbox that aren't queued yet (sidecar missing or still copying)"""
+        return list(self.inbox.glob('*.pdf'))
+
+    def recover(self):
+        """Queue jobs left in processing/ by a daemon that stopped"""
+        for pdf in sorted(self.processing.glob('*.pdf')):
+            self.add(pdf, pdf.with_suffix('.json'))
+
+    def scan(self):
+        """Queue every PDF whose sidecar is there and whose size didn't change since the last scan"""
+        sizes = {}
+        for pdf in sorted(self.inbox.glob('*.pdf')):
+            sidecar = pdf.with_suffix('.json')
+            if not sidecar.exists() or self.jobs.get(pdf.stem, {}).get('state') in ('queued', 'running'):
+                continue
+            stat = pdf.stat()
+            sizes[pdf] = (stat.st_size, stat.st_mtime)
+            if self.sizes.get(pdf) != sizes[pdf]:
+                continue
+
+            del sizes[pdf]
+            moved = self.processing / pdf.name
+            os.replace(pdf, moved)
+            os.replace(sidecar, moved.with_suffix('.json'))
+            self.add(moved, moved.with_suffix('.json'))
+        self.sizes = sizes
+
+    def add(self, pdf, sidecar):
+        name = pdf.stem
+        log_path = self.logs / f"{name}.log"
+        row = {'job': name, 'state': 'queued', 'pdf': str(pdf), 'log': str(log_path), 'queued_at': now()}
+        self.jobs.pop(name, None)
+        self.jobs[name] = row
+        self.queued_at[name] = time.time()
+        log_path.write_text(f"[{row['queued_at']}] queued {pdf.name}\n", encoding='utf-8')
+
+        try:
+            self.details[name] = read_sidecar(sidecar)
+        except (OSError, ValueError) as e:
+            self.finish(name, False, error=str(e))
+            return
+        row['test'] = self.details[name]['name']
+        self.waiting.append(name)
+
+    def next(self):
+        """Start the oldest queued job; returns its manifest entry and log path"""
+        name = self.waiting.pop(0)
+        row = self.jobs[name]
+        row['state'] = 'running'
+        row['started_at'] = now()
+        row['wait_seconds'] = round(time.time() - self.queued_at[name], 3)
+        return name, {**self.details[name], 'pdf': row['pdf']}, row['log']
+
+    def finish(self, name, ok, **fields):
+        """Record a finished job and move its files to done/ or failed/"""
+        row = self.jobs[name]
+        row.update(fields)
+        row['state'] = 'done' if ok else 'failed'
+        row['finished_at'] = now()
+        row['total_seconds'] = round(time.time() - self.queued_at.pop(name), 3)
+        self.details.pop(name, None)
+
+        folder = self.inbox / row['state']
+        pdf = Path(row['pdf'])
+        for path in (pdf, pdf.with_suffix('.json')):
+            if path.exists():
+                os.replace(path, folder / path.name)
+        row['pdf'] = str(folder / pdf.name)
+
+        with open(row['log'], 'a', encoding='utf-8') as log:
+            log.write(f"[{row['finished_at']}] {row['state']}"
+                      f"{': ' + row['error'] if row.get('error') else ''}\n")
+
+        # Keep only the most recent finished jobs
+        finished = [n for n, r in self.jobs.items() if r['state'] in ('done', 'failed')]
+        for old in finished[:-MAX_FINISHED_JOBS]:
+            del self.jobs[old]
+
+    def write_status(self):
+        status = {
+            'updated': now(),
+            'queued': len(self.waiting),
+            'running': len(self.running),
+            'pending': len(self.pending),
+            'jobs': list(self.jobs.values()),
+        }
+        write_bytes_atomic(status_path(self.inbox), dumps(status, 'review'))
+        return status
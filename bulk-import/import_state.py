@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Incremental re-import: only questions whose extraction changed are written
+
+When a test gets a corrected reprint, fast-import runs again on the new PDF.
+The extraction cache already re-extracts only the pages whose content changed
+(see extraction_cache.page_hash). This handles the database side:
+
+    - every extracted question gets a fingerprint of everything its record is
+      built from (text, choices, answer, image content, test details)
+    - the fingerprints from the last import of each test are kept in
+      bulk-import/.cache/imports/<testId>.json
+    - a question with the same fingerprint as last time is skipped (its
+      images aren't even decoded)
+    - a changed question is matched to the database by
+      (testId, module, questionNumber) and only its extracted fields are
+      rewritten - id, explanation, difficulty, topic and prompt are kept
+
+Without a saved state (first import, after `extraction_cache.py clear`, or
+fast-import --full) every question is rebuilt and compared field by field with
+the database, which gives the same result, just slower.
+
+    state = ImportState('usv1')
+    changed = {key for key, fp in fingerprints.items() if not state.unchanged(*key, fp)}
+    result = merge_questions(db, records, IMPORT_POLICIES)
+    state.save(fingerprints)
+"""
+
+from pathlib import Path
+
+from db_format import dumps, loads, write_bytes_atomic
+from merge_engine import EXTRACTED_FIELDS
+
+STATE_ROOT = Path("bulk-import/.cache/imports")
+
+# Re-imports rewrite what comes from the PDF and keep everything else
+IMPORT_POLICIES = dict.fromkeys(EXTRACTED_FIELDS, 'incoming')
+
+
+class ImportState:
+    def __init__(self, test_id, root=STATE_ROOT):
+        self.path = Path(root) / f"{test_id}.json"
+
+        # "module|number" -> fingerprint from the last import
+        self.fingerprints = {}
+        if self.path.exists():
+            self.fingerprints = loads(self.path.read_bytes()).get('questions', {})
+
+    @staticmethod
+    def key(module_name, q_num):
+        return f"{module_name}|{q_num}"
+
+    def unchanged(self, module_name, q_num, fingerprint):
+        return self.fingerprints.get(self.key(module_name, q_num)) == fingerprint
+
+    def save(self, fingerprints):
+        """fingerprints: {(module, number): fingerprint} of this import"""
+        self.fingerprints = {self.key(*key): fp for key, fp in fingerprints.items()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(self.path, dumps({'questions': self.fingerprints}))
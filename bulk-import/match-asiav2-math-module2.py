@@ -3,15 +3,13 @@
 Match extracted images to asiav2 Math Module 2 questions
 """
 
-import json
-import re
 from pathlib import Path
-import shutil
+from db_format import load_database
+from image_store import ImageStore
 
 def match_images_to_questions():
     # Load questions
-    with open('questions-database.json', 'r', encoding='utf-8') as f:
-        questions = json.load(f)
+    questions = load_database('questions-database.json')
     
     # Filter for asiav2 Math Module 2 questions
     math_module2_questions = [
@@ -51,6 +49,7 @@ def match_images_to_questions():
     # Typical SAT layout: 2-3 questions per page in Math Module 2
     # Images are usually in order with questions
     
+    image_store = ImageStore()
     matches = []
     img_idx = 0
     
@@ -77,8 +76,8 @@ def match_images_to_questions():
             new_name = f"math-module-2-q{q_num}-{img_type}.png"
             new_path = images_folder / new_name
             
-            # Copy/rename the image
-            shutil.copy2(old_path, new_path)
+            # Link the image under its new name
+            image_store.add(old_path, new_path)
             matches.append({
                 'question': q_num,
                 'old_file': old_path.name,
@@ -88,6 +87,7 @@ def match_images_to_questions():
             print(f"✅ Q{q_num}: {old_path.name} → {new_name}")
             img_idx += 1
     
+    image_store.save()
     print(f"\n📝 Matched {len(matches)} images")
     print(f"\n💡 Update the database with these image paths:")
     for match in matches:
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Upsert questions by natural key, with per-field merge policies
+
+Every merge script had its own "find the question with the same module and
+number, then decide field by field which one wins" (merge-usv1-updates.py,
+fix-usv1-questions.py, fix-usv1-complete.py), each filtering the database by
+test and searching it again for every question. merge_questions() does it for
+any test with one hash join:
+
+    existing = {(testId, module, questionNumber): question}   # one pass over the database
+    for each incoming question: look up its key, merge field by field
+
+Each field is merged by the policy configured for its name:
+    incoming    take the incoming value
+    existing    keep the existing value
+    fill        take the incoming value only where the existing one is empty
+    set         take the incoming value when it is non-empty (never clears a field)
+    longer      take incoming text unless it is much shorter (80% or less) than the existing
+    choices     take incoming choices where the existing ones are missing or blank ('' / '-')
+A policy can also be a function (existing, incoming) -> (value, conflict),
+e.g. longer_than(1.2).
+
+When a policy keeps the existing value although the incoming one is different
+and non-empty, the merge records a conflict (key, field, kept, dropped)
+instead of losing it silently. Questions that share a key in the database
+(duplicate imports) are folded into the one with the lowest id using the same
+policies, and the others are removed.
+
+    result = merge_questions(db, incoming)     # DEFAULT_POLICIES
+    result = merge_questions(db, [], {'questionText': 'longer'}, dedupe=True, tests={'usv1'})
+    result.db, result.inserted, result.updated, result.removed, result.conflicts
+
+Usage:
+    python3 bulk-import/merge_engine.py <incoming.json> [--test usv1] [--dedupe] [--dry-run] [db-file]
+
+    --dry-run writes the merge as a changeset (see changeset.py) instead
+"""
+
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+from db_format import DB_PATH, changes_path, load_database, save_database
+
+# Record fields that come from the PDF; CURATED_FIELDS are edited by hand
+EXTRACTED_FIELDS = (
+    'module', 'questionNumber', 'totalQuestions', 'date', 'region', 'testNumber', 'testName', 'testId',
+    'questionText', 'subject', 'choices', 'hasImageChoices', 'imageUrl', 'questionType', 'correctAnswer',
+)
+CURATED_FIELDS = ('explanation', 'difficulty', 'topic', 'prompt')
+
+Conflict = namedtuple('Conflict', 'key field kept dropped')
+
+MAX_REPORTED_CONFLICTS = 20
+
+
+def question_key(q):
+    return (q.get('testId'), q.get('module'), q.get('questionNumber'))
+
+
+def is_empty(value):
+    return value is None or value is False or value == '' or value == [] or value == {}
+
+
+def blank_choices(choices):
+    return not choices or any(c == '' or c == '-' for c in choices)
+
+
+def normalize_text(text):
+    """Text with line breaks and runs of spaces (incl. non-breaking) collapsed"""
+    return ' '.join(str(text or '').split())
+
+
+def longer_than(ratio):
+    """Policy: take incoming text if it is longer than ratio x the existing text
+
+    Texts that only differ in line breaks and spacing (a reflowed PDF) are the
+    same text: the existing one is kept and it isn't a conflict.
+    """
+    def policy(old, new):
+        old_text, new_text = normalize_text(old), normalize_text(new)
+        if new_text == old_text:
+            return old, False
+        if len(new_text) > len(old_text) * ratio:
+            return new, False
+        return old, not is_empty(new)
+    return policy
+
+
+POLICIES = {
+    'incoming': lambda old, new: (new, False),
+    'existing': lambda old, new: (old, False),
+    'fill': lambda old, new: (new, False) if is_empty(old) else (old, False),
+    'set': lambda old, new: (old, False) if is_empty(new) else (new, False),
+    'longer': longer_than(0.8),
+    'choices': lambda old, new: (new, False) if blank_choices(old) and new else (old, not blank_choices(new)),
+}
+
+# Fresh extraction wins, hand-edited fields are only filled in
+DEFAULT_POLICIES = {**dict.fromkeys(EXTRACTED_FIELDS, 'incoming'), **dict.fromkeys(CURATED_FIELDS, 'fill')}
+
+
+class MergeResult:
+    def __init__(self):
+        self.db = []
+        self.inserted = []      # new questions
+        self.updated = []       # (key, [fields changed])
+        self.unchanged = 0
+        self.unmatched = []     # incoming keys with no question to update (insert=False)
+        self.removed = []       # ids of folded duplicates
+        self.conflicts = []     # Conflict per value a policy dropped
+
+    @property
+    def changed(self):
+        return bool(self.inserted or self.updated or self.removed)
+
+    def print_report(self):
+        print(f"   ✓ {len(self.inserted)} inserted, {len(self.updated)} updated, {self.unchanged} unchanged, "
+              f"{len(self.removed)} duplicates removed")
+        if self.unmatched:
+            print(f"   ⚠️  {len(self.unmatched)} incoming questions matched nothing")
+        if self.conflicts:
+            print(f"   ⚠️  {len(self.conflicts)} conflicts (existing value kept):")
+            for conflict in self.conflicts[:MAX_REPORTED_CONFLICTS]:
+                test_id, module, q_num = conflict.key
+                print(f"      {test_id} {module} Q{q_num} {conflict.field}: "
+                      f"kept {str(conflict.kept)[:40]!r}, dropped {str(conflict.dropped)[:40]!r}")
+            if len(self.conflicts) > MAX_REPORTED_CONFLICTS:
+                print(f"      ... and {len(self.conflicts) - MAX_REPORTED_CONFLICTS} more")
+
+
+def merge_fields(key, target, source, policies, default, result):
+    """Merge source into target in place; returns the fields that changed"""
+    changed = []
+    for field, new in source.items():
+        if field == 'id':
+            continue
+        old = target.get(field)
+        policy = policies.get(field, default)
+        value, conflict = (POLICIES[policy] if isinstance(policy, str) else policy)(old, new)
+        if conflict and old != new:
+            result.conflicts.append(Conflict(key, field, old, new))
+        if value != old or (field not in target and value is not None):
+            target[field] = value
+            changed.append(field)
+    return changed
+
+
+def merge_questions(db, incoming, policies=None, default='existing', dedupe=False, insert=True,
+                    tests=None, next_id=None):
+    """Upsert incoming questions into db by (testId, module, questionNumber); db is not modified, see result.db"""
+    policies = DEFAULT_POLICIES if policies is None else policies
+    result = MergeResult()
+
+    # One pass over the database: key index, duplicates and the next free id
+    index = {}
+    duplicates = {}
+    max_id = 0
+    for q in db:
+        max_id = max(max_id, q.get('id') or 0)
+        key = question_key(q)
+        if not all(key) or (tests is not None and key[0] not in tests):
+            continue
+        if key in index:
+            duplicates.setdefault(key, [index[key]]).append(q)
+        else:
+            index[key] = q
+    next_id = max_id + 1 if next_id is None else next_id
+
+    # Work on copies of the questions that can change, so db stays as it was
+    touched = {}
+
+    def copy_of(key):
+        if key not in touched:
+            touched[key] = dict(index[key])
+        return touched[key]
+
+    removed = set()
+    if dedupe:
+        for key, group in duplicates.items():
+            group = sorted(group, key=lambda q: q.get('id') or 0)
+            index[key] = group[0]
+            base = copy_of(key)
+            fields = set()
+            for other in group[1:]:
+                fields.update(merge_fields(key, base, other, policies, default, result))
+                removed.add(id(other))
+                result.removed.append(other.get('id'))
+            if fields:
+                result.updated.append((key, sorted(fields)))
+
+    updated = {key for key, _ in result.updated}
+    for q in incoming:
+        key = question_key(q)
+        if not all(key) or (tests is not None and key[0] not in tests):
+            result.unmatched.append(key)
+            continue
+        if key not in index:
+            if not insert:
+                result.unmatched.append(key)
+                continue
+            new = dict(q, id=next_id)
+            next_id += 1
+            result.inserted.append(new)
+            index[key] = new
+            touched[key] = new
+            continue
+
+        fields = merge_fields(key, copy_of(key), q, policies, default, result)
+        if fields and key not in updated:
+            result.updated.append((key, fields))
+            updated.add(key)
+        elif not fields and key not in updated:
+            result.unchanged += 1
+
+    # Second pass writes the merged questions back in their original order
+    for q in db:
+        if id(q) in removed:
+            continue
+        key = question_key(q)
+        result.db.append(touched[key] if key in touched and index.get(key) is q else q)
+    result.db.extend(result.inserted)
+    return result
+
+
+def main():
+    args = sys.argv[1:]
+    tests = None
+    if '--test' in args:
+        i = args.index('--test')
+        tests = {args[i + 1]}
+        del args[i:i + 2]
+    dedupe = '--dedupe' in args
+    dry_run = '--dry-run' in args
+    args = [a for a in args if a not in ('--dedupe', '--dry-run')]
+
+    if not args:
+        print("Usage: python3 bulk-import/merge_engine.py <incoming.json> [--test usv1] [--dedupe] [--dry-run] [db-file]")
+        sys.exit(1)
+
+    incoming = load_database(Path(args[0]))
+    db_path = Path(args[1]) if len(args) > 1 else DB_PATH
+    db = load_database(db_path)
+
+    print(f"🔄 Merging {len(incoming)} questions into {db_path} ({len(db)} questions)")
+    result = merge_questions(db, incoming, dedupe=dedupe, tests=tests)
+    result.print_report()
+
+    if dry_run:
+        save_database(result.db, db_path, changes=changes_path(db_path))
+    elif result.changed:
+        save_database(result.db, db_path, snapshot_label=f"merge: {Path(args[0]).name}")
+        print(f"✅ Saved {len(result.db)} questions")
+    else:
+        print("✅ Nothing to change")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import re
 from pathlib import Path
 from PIL import Image
 import pytesseract
+from db_format import load_database, save_database
 
 # Set tesseract path (common locations)
 import subprocess
@@ -35,8 +36,7 @@ class AsiaV6OCR:
             self.mapping = json.load(f)
         
         # Load database
-        with open(self.db_path, 'r', encoding='utf-8') as f:
-            self.database = json.load(f)
+        self.database = load_database(self.db_path)
         
         self.questions = {q['id']: q for q in self.database if q.get('testId') == 'asiav6'}
         
@@ -437,8 +437,7 @@ class AsiaV6OCR:
             if q.get('id') in self.questions:
                 q.update(self.questions[q['id']])
         
-        with open(self.db_path, 'w', encoding='utf-8') as f:
-            json.dump(self.database, f, indent=2, ensure_ascii=False)
+        save_database(self.database, self.db_path)
         
         print(f"   ✓ Saved {len(self.database)} questions to database")
     
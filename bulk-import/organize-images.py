@@ -3,9 +3,8 @@
 Organize and rename images to match questions
 """
 
-import shutil
 from pathlib import Path
-import re
+from image_store import ImageStore
 
 def organize_images():
     """Copy and rename images from bulk-import to proper location"""
@@ -38,6 +37,7 @@ def organize_images():
         {'source': '202503asiav1 (1)_page23_img1.png', 'target': 'q4-graph.png', 'question': 4},
     ]
     
+    image_store = ImageStore()
     copied = 0
     skipped = 0
     
@@ -48,13 +48,14 @@ def organize_images():
         target = target_folder / mapping['target']
         
         if source.exists():
-            shutil.copy(source, target)
+            image_store.add(source, target)
             print(f"✅ Q{mapping['question']}: {mapping['source']} → {mapping['target']}")
             copied += 1
         else:
             print(f"⚠️  Not found: {mapping['source']}")
             skipped += 1
     
+    image_store.save()
     print(f"\n✅ Copied {copied} images")
     if skipped > 0:
         print(f"⚠️  Skipped {skipped} (not found)")
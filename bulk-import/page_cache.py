@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Per-document page text cache
+
+PyMuPDF's page.get_text() is the slowest thing the importers do, and the old
+code called it again for every question on every page of the module. A
+PageCache extracts each page once and keeps its lines (raw and stripped).
+
+    cache = PageCache(doc)
+    cache.text(3)                     # extracted on first use only
+    cache.lines(3), cache.stripped(3)
+"""
+
+import re
+
+# A line that is just a question number ("12")
+NUMBER_LINE = re.compile(r'^\d+$')
+
+
+class PageCache:
+    def __init__(self, doc):
+        self.doc = doc
+        self.page_count = len(doc)
+
+        self._text = {}
+        self._lines = {}
+        self._stripped = {}
+
+        # Counters for the import report
+        self.get_text_calls = 0
+        self.prefilled = 0
+        self.hits = 0
+
+    def __len__(self):
+        return self.page_count
+
+    def prefill(self, texts, first_page=0):
+        """Seed the cache with text extracted elsewhere (e.g. by parallel_extract)"""
+        for offset, text in enumerate(texts):
+            if first_page + offset not in self._text:
+                self._text[first_page + offset] = text
+                self.prefilled += 1
+
+    def text(self, page_num):
+        if page_num in self._text:
+            self.hits += 1
+        else:
+            self._text[page_num] = self.doc[page_num].get_text()
+            self.get_text_calls += 1
+        return self._text[page_num]
+
+    def lines(self, page_num):
+        if page_num not in self._lines:
+            self._lines[page_num] = self.text(page_num).split('\n')
+        else:
+            self.hits += 1
+        return self._lines[page_num]
+
+    def stripped(self, page_num):
+        if page_num not in self._stripped:
+            self._stripped[page_num] = [line.strip() for line in self.lines(page_num)]
+        else:
+            self.hits += 1
+        return self._stripped[page_num]
+
+    def stats(self):
+        return {'get_text_calls': self.get_text_calls, 'prefilled': self.prefilled, 'cache_hits': self.hits}
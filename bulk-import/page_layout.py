@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Layout-aware question segmentation
+
+Plain get_text() loses where a line is on the page, so a "12" in a passage or
+a table looks exactly like the start of question 12. page_lines() keeps each
+line's bounding box and the size of the text block it belongs to (from
+page.get_text("dict")), and segment_module() walks a module's pages once,
+splitting them into question regions:
+
+    layout = map_pages(pdf_path, page_lines)          # one pass over the PDF
+    regions = segment_module(layout, "Math Module 1", 18, 26, max_q=22)
+    regions[3]['lines']     # [(page, Line), ...] from question 3's number to question 4's
+    regions[3]['boxes']     # {page: [y0, y1]} - vertical extent on each page
+
+A line is a question number when it is only digits, sits in its own text
+block (the numbered box) or at the left edge of the text column, and is the
+next number in sequence. Segmentation starts after the module's header and
+stops at the next module's header.
+
+The regions are shared by question text, choice and image extraction.
+
+Pages without a text layer (scans, app screenshots) get the same Line list
+from page_ocr_lines(): the rendered page is OCR'd and tesseract's lines and
+blocks stand in for PyMuPDF's. It needs pytesseract and the tesseract binary
+(ocr_available()).
+"""
+
+import re
+import shutil
+from collections import Counter, namedtuple
+
+import fitz  # PyMuPDF
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+Line = namedtuple('Line', 'x0 y0 x1 y1 text block_size')
+
+NUMBER_LINE = re.compile(r'^\d+$')
+MODULE_HEADER = re.compile(r'(?:Reading and Writing|Math) Module \d')
+
+MARGIN_TOLERANCE = 3  # points
+MAX_SKIP = 3          # a question number may skip at most 2 unreadable ones
+
+# Rendering scale for OCR (3 = 216 dpi)
+OCR_ZOOM = 3
+
+
+def page_lines(doc, page_num):
+    """Every text line of a page with its box, in reading order"""
+    lines = []
+    # TEXTFLAGS_TEXT: same text as get_text(), and no image data in the dict
+    for block in doc[page_num].get_text("dict", flags=fitz.TEXTFLAGS_TEXT)['blocks']:
+        if block.get('type', 0) != 0:
+            continue
+        for line in block['lines']:
+            x0, y0, x1, y1 = line['bbox']
+            text = ''.join(span['text'] for span in line['spans'])
+            lines.append(Line(x0, y0, x1, y1, text, len(block['lines'])))
+    return lines
+
+
+def ocr_available():
+    return pytesseract is not None and shutil.which('tesseract') is not None
+
+
+def page_ocr_lines(doc, page_num):
+    """page_lines() of a page without text: OCR of the rendered page, in page coordinates"""
+    from PIL import Image
+
+    pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(OCR_ZOOM, OCR_ZOOM), alpha=False)
+    image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+
+    # Words grouped into tesseract's lines, which come in reading order
+    words = {}
+    for i, text in enumerate(data['text']):
+        if text.strip():
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            words.setdefault(key, []).append(i)
+    block_sizes = Counter(block for block, _, _ in words)
+
+    lines = []
+    for (block, _, _), indexes in words.items():
+        x0 = min(data['left'][i] for i in indexes)
+        y0 = min(data['top'][i] for i in indexes)
+        x1 = max(data['left'][i] + data['width'][i] for i in indexes)
+        y1 = max(data['top'][i] + data['height'][i] for i in indexes)
+        text = ' '.join(data['text'][i].strip() for i in indexes)
+        lines.append(Line(x0 / OCR_ZOOM, y0 / OCR_ZOOM, x1 / OCR_ZOOM, y1 / OCR_ZOOM, text, block_sizes[block]))
+    return lines
+
+
+def layout_text(lines):
+    """The page text get_text() would have returned"""
+    return ''.join(line.text + '\n' for line in lines)
+
+
+def is_number_box(line, left_margin):
+    return bool(NUMBER_LINE.match(line.text.strip())) and (
+        line.block_size == 1 or line.x0 <= left_margin + MARGIN_TOLERANCE)
+
+
+def segment_module(layout, module_name, start_page, end_page, max_q):
+    """Split a module's pages into question regions in a single pass; {q_num: region}"""
+    regions = {}
+    current = None
+
+    # Text above the module's own header (e.g. the last question of the
+    # previous module) is not part of it
+    started = not any(module_name in line.text for line in layout[start_page])
+
+    for page_num in range(start_page, end_page + 1):
+        lines = layout[page_num]
+        left_margin = min((line.x0 for line in lines), default=0)
+
+        for line in lines:
+            stripped = line.text.strip()
+
+            header = MODULE_HEADER.search(stripped)
+            if header:
+                if header.group(0) == module_name:
+                    started = True
+                    continue
+                if started:
+                    return regions
+                continue
+            if not started:
+                continue
+
+            if is_number_box(line, left_margin):
+                q_num = int(stripped)
+                last = current['number'] if current else 0
+                if last < q_num <= min(last + MAX_SKIP, max_q):
+                    current = {
+                        'number': q_num,
+                        'page': page_num,
+                        'lines': [],
+                        'boxes': {page_num: [line.y0, line.y1]}
+                    }
+                    regions[q_num] = current
+                    continue
+
+            if current:
+                current['lines'].append((page_num, line))
+                box = current['boxes'].setdefault(page_num, [line.y0, line.y1])
+                box[0] = min(box[0], line.y0)
+                box[1] = max(box[1], line.y1)
+
+    return regions
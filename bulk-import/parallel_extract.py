@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Parallel page extraction for large PDFs
+
+Splits a PDF's pages into contiguous ranges and runs a per-page job in a
+pool of worker processes. Each worker opens its own fitz document (PyMuPDF
+documents can't be shared across processes), and results are merged back
+in page order, so the output is identical to a serial run.
+
+Short PDFs are processed serially - starting processes costs more than
+it saves below MIN_PARALLEL_PAGES pages.
+
+    texts = map_pages(pdf_path, page_text)                # [str, ...]
+    refs = map_pages(pdf_path, page_image_refs)           # [[image ref, ...], ...]
+
+Jobs are module-level functions job(doc, item, *job_args) so they can be
+pickled to the (spawned) workers. Items are usually page numbers, but any
+picklable work item works.
+
+Images are only located here (page_image_refs) and read with image_bytes();
+writing them is image_sink.ImageSink's job, which stores them in the image
+store.
+
+PyMuPDF isn't thread-safe either, and import stages run on threads (see
+stage_scheduler.py): MuPDF work done in this process rather than in worker
+processes - serial runs here, the shared documents elsewhere - holds FITZ_LOCK.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+MIN_PARALLEL_PAGES = 16
+
+# Held around every MuPDF call made in this process; reentrant, as jobs may nest
+FITZ_LOCK = threading.RLock()
+
+# Image formats browsers show as-is; anything else is converted to PNG
+WEB_FORMATS = ('png', 'jpeg', 'jpg', 'gif')
+
+
+def worker_count(workers=None):
+    return max(1, workers or os.cpu_count() or 1)
+
+
+def page_ranges(pages, workers):
+    """Split a list of page numbers into `workers` contiguous chunks"""
+    size = -(-len(pages) // workers)
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+
+def run_range(pdf_path, pages, job, job_args):
+    """Worker entry point: open the PDF and run the job on each page"""
+    doc = fitz.open(pdf_path)
+    try:
+        return [job(doc, page_num, *job_args) for page_num in pages]
+    finally:
+        doc.close()
+
+
+def map_pages(pdf_path, job, pages=None, workers=None, job_args=(), min_pages=MIN_PARALLEL_PAGES):
+    """Run job on every page (or `pages`), in parallel when worthwhile; results in page order"""
+    if pages is None:
+        with FITZ_LOCK:
+            doc = fitz.open(pdf_path)
+            pages = list(range(len(doc)))
+            doc.close()
+    else:
+        pages = list(pages)
+
+    workers = min(worker_count(workers), len(pages) or 1)
+    if workers == 1 or len(pages) < min_pages:
+        # Only here: worker processes have their own MuPDF (and a forked copy of
+        # the lock may be held by a thread that doesn't exist there)
+        with FITZ_LOCK:
+            return run_range(pdf_path, pages, job, job_args)
+
+    results = []
+    # Spawned, not forked: other threads may be inside MuPDF right now, and a
+    # forked worker would inherit its global state halfway through that call
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(run_range, str(pdf_path), chunk, job, job_args)
+                   for chunk in page_ranges(pages, workers)]
+        # Collect in submission order = page order
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def page_text(doc, page_num):
+    return doc[page_num].get_text()
+
+
+def page_image_refs(doc, page_num):
+    """Where the images on a page are - nothing is decoded here"""
+    page = doc[page_num]
+    refs = []
+    for img_index, img in enumerate(page.get_images()):
+        xref, smask = img[0], img[1]
+        img_rects = page.get_image_rects(xref)
+        refs.append({
+            'xref': xref,
+            'smask': smask,
+            'page': page_num,
+            'index': img_index,
+            'rect': tuple(img_rects[0]) if img_rects else None,
+            'y_position': img_rects[0].y0 if img_rects else 0
+        })
+    return refs
+
+
+def image_bytes(doc, xref, smask=0):
+    """(data, ext) of an image: the original stream when a browser can show it, else PNG"""
+    info = doc.extract_image(xref)
+    if info and info['ext'] in WEB_FORMATS and not smask and info.get('colorspace') in (1, 3):
+        return info['image'], info['ext']
+
+    # CMYK, JPX, soft masks, ... - decode once and convert
+    pix = fitz.Pixmap(doc, xref)
+    if pix.colorspace and pix.colorspace.n >= 4:
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    if smask and not pix.alpha:
+        pix = fitz.Pixmap(pix, fitz.Pixmap(doc, smask))
+    return pix.tobytes('png'), 'png'
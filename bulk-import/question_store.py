@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Question revision tracking for the delta feed
+
+Every question gets a monotonically increasing revision number whenever its
+content changes. Deletes are kept as tombstones so clients can drop them.
+The log lives next to the database:
+
+    questions-database.json            <- the questions (db_format)
+    questions-database.revisions.json  <- {id: {rev, hash}}, tombstones
+
+The server answers /api/changes?since=<rev> from this log, so a client
+that already has revision N only downloads what changed after N.
+
+Tombstones older than the retention window are compacted away. A client
+asking for a revision older than the compaction floor gets a full reset.
+
+Usage:
+    python3 bulk-import/question_store.py sync [db-file]
+    python3 bulk-import/question_store.py changes <since> [db-file]
+    python3 bulk-import/question_store.py compact [retention-days] [db-file]
+"""
+
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+from db_format import DB_PATH, load_database, dumps, loads, write_bytes_atomic
+
+RETENTION_DAYS = 30
+
+
+def question_hash(question):
+    """Stable content hash of a question (key order doesn't matter)"""
+    canonical = json.dumps(question, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def revisions_path(db_path=DB_PATH):
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.stem + '.revisions.json')
+
+
+class RevisionLog:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = Path(db_path)
+        self.path = revisions_path(db_path)
+
+        # Storage
+        self.revision = 0
+        self.floor = 0
+        self.questions = {}
+        self.tombstones = {}
+
+        if self.path.exists():
+            with open(self.path, 'rb') as f:
+                data = loads(f.read())
+            self.revision = data.get('revision', 0)
+            self.floor = data.get('floor', 0)
+            self.questions = data.get('questions', {})
+            self.tombstones = data.get('tombstones', {})
+
+    def save(self):
+        write_bytes_atomic(self.path, dumps({
+            'revision': self.revision,
+            'floor': self.floor,
+            'questions': self.questions,
+            'tombstones': self.tombstones,
+        }))
+
+    def sync(self, db):
+        """Bump revisions for new/changed questions and tombstone removed ones"""
+        changed = 0
+        seen = set()
+
+        for q in db:
+            key = str(q.get('id'))
+            seen.add(key)
+            digest = question_hash(q)
+            entry = self.questions.get(key)
+            if entry is None or entry['hash'] != digest:
+                self.revision += 1
+                self.questions[key] = {'rev': self.revision, 'hash': digest}
+                self.tombstones.pop(key, None)
+                changed += 1
+
+        for key in [k for k in self.questions if k not in seen]:
+            self.revision += 1
+            del self.questions[key]
+            self.tombstones[key] = {'rev': self.revision, 'time': int(time.time())}
+            changed += 1
+
+        if changed:
+            self.save()
+        return changed
+
+    def changes_since(self, db, since):
+        """Upserts and deletes after revision `since` (full reset if too old)"""
+        # A revision from the future means the log was rebuilt - start over
+        reset = since < self.floor or since > self.revision
+        if reset:
+            since = 0
+
+        if hasattr(db, 'questions_by_id'):
+            # BinaryIndex: only decode the questions that actually changed
+            upserts = db.questions_by_id({k for k, e in self.questions.items() if e['rev'] > since})
+        else:
+            upserts = []
+            for q in db:
+                entry = self.questions.get(str(q.get('id')))
+                if entry and entry['rev'] > since:
+                    upserts.append(q)
+
+        deletes = [] if reset else [
+            int(key) if key.isdigit() else key
+            for key, tomb in self.tombstones.items() if tomb['rev'] > since
+        ]
+
+        return {
+            'revision': self.revision,
+            'since': since,
+            'reset': reset,
+            'upserts': upserts,
+            'deletes': deletes,
+        }
+
+    def compact(self, retention_days=RETENTION_DAYS):
+        """Drop tombstones older than the retention window and raise the floor"""
+        cutoff = time.time() - retention_days * 86400
+        expired = [k for k, tomb in self.tombstones.items() if tomb['time'] < cutoff]
+        for key in expired:
+            self.floor = max(self.floor, self.tombstones.pop(key)['rev'])
+        if expired:
+            self.save()
+        return len(expired)
+
+
+def record_changes(db, db_path=DB_PATH):
+    """Hook for writers: update the revision log after the database is saved"""
+    log = RevisionLog(db_path)
+    changed = log.sync(db)
+    log.compact()
+    return changed
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('sync', 'changes', 'compact'):
+        print("Usage: python3 bulk-import/question_store.py <sync|changes|compact> [args] [db-file]")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == 'sync':
+        db_path = Path(sys.argv[2]) if len(sys.argv) > 2 else DB_PATH
+        log = RevisionLog(db_path)
+        changed = log.sync(load_database(db_path))
+        print(f"✅ {changed} changes recorded, revision is now {log.revision}")
+    elif command == 'changes':
+        since = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+        db_path = Path(sys.argv[3]) if len(sys.argv) > 3 else DB_PATH
+        log = RevisionLog(db_path)
+        delta = log.changes_since(load_database(db_path), since)
+        print(f"📦 Revision {delta['revision']}: {len(delta['upserts'])} upserts, "
+              f"{len(delta['deletes'])} deletes since {delta['since']}"
+              f"{' (full reset)' if delta['reset'] else ''}")
+    else:
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else RETENTION_DAYS
+        db_path = Path(sys.argv[3]) if len(sys.argv) > 3 else DB_PATH
+        dropped = RevisionLog(db_path).compact(days)
+        print(f"🧹 Compacted {dropped} tombstones older than {days} days")
+
+
+if __name__ == "__main__":
+    main()
@@ -70,6 +70,9 @@ if [ $? -eq 0 ]; then
     echo "   2. Refresh your browser"
     echo "   3. Select your new test from the date picker"
     echo ""
+    echo "💡 Importing several tests? Run bulk-import/import-daemon.py and drop"
+    echo "   the PDFs into bulk-import/inbox/ instead (see bulk-import/README.md)"
+    echo ""
 else
     echo ""
     echo "❌ Import failed. Check the error messages above."
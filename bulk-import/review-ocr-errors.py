@@ -4,15 +4,14 @@ Review and correct OCR errors in Asia v6 questions
 Shows questions with potential OCR errors and allows easy correction
 """
 
-import json
 import re
 from pathlib import Path
+from db_format import load_database, save_database
 
 class OCRReviewer:
     def __init__(self):
         self.db_path = Path("questions-database.json")
-        with open(self.db_path, 'r', encoding='utf-8') as f:
-            self.database = json.load(f)
+        self.database = load_database(self.db_path)
         
         self.questions = [q for q in self.database if q.get('testId') == 'asiav6']
         
@@ -152,8 +151,7 @@ class OCRReviewer:
     
     def save_database(self):
         """Save updated database"""
-        with open(self.db_path, 'w', encoding='utf-8') as f:
-            json.dump(self.database, f, indent=2, ensure_ascii=False)
+        save_database(self.database, self.db_path)
         print(f"   ✓ Saved database")
 
 if __name__ == "__main__":
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Incremental snapshots of the question database
+
+A snapshot is taken automatically every time the database is saved through
+db_format.save_database(). Each question is one content-hashed chunk; a
+snapshot only writes the chunks that didn't exist yet (into one pack file
+under .snapshots/packs/) plus the ordered list of chunk hashes. A snapshot
+that changed 5 questions costs 5 chunks and a small index, so 100 snapshots
+cost little more than one.
+
+Usage:
+    python3 bulk-import/snapshots.py list
+    python3 bulk-import/snapshots.py take [label]
+    python3 bulk-import/snapshots.py diff <snapshot> [<snapshot>]   # default: vs current database
+    python3 bulk-import/snapshots.py rollback <snapshot>
+    python3 bulk-import/snapshots.py prune <keep-count>
+"""
+
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+from db_format import DB_PATH, load_database, save_database, dumps, loads, write_bytes_atomic
+
+
+def chunk_bytes(question):
+    return json.dumps(question, sort_keys=True, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class SnapshotStore:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = Path(db_path)
+        self.root = self.db_path.parent / ".snapshots"
+        self.pack_root = self.root / "packs"
+        self.index_root = self.root / "snapshots"
+        self.chunk_index_path = self.root / "chunks.json"
+
+        # chunk hash -> [pack name, offset, length]
+        self.chunk_index = {}
+        if self.chunk_index_path.exists():
+            with open(self.chunk_index_path, 'rb') as f:
+                self.chunk_index = loads(f.read())
+
+    def write_pack(self, name, chunks):
+        """Append-only pack of new chunks; one pack per snapshot keeps file count low"""
+        self.pack_root.mkdir(parents=True, exist_ok=True)
+        offset = 0
+        payload = bytearray()
+        for digest, data in chunks.items():
+            self.chunk_index[digest] = [name, offset, len(data)]
+            payload += data
+            offset += len(data)
+        write_bytes_atomic(self.pack_root / name, bytes(payload))
+        write_bytes_atomic(self.chunk_index_path, dumps(self.chunk_index))
+
+    def read_chunk(self, digest, open_packs):
+        name, offset, length = self.chunk_index[digest]
+        if name not in open_packs:
+            open_packs[name] = (self.pack_root / name).read_bytes()
+        return open_packs[name][offset:offset + length]
+
+    def list(self):
+        """All snapshot indexes, oldest first"""
+        if not self.index_root.exists():
+            return []
+        snapshots = []
+        for path in sorted(self.index_root.glob('*.json')):
+            with open(path, 'rb') as f:
+                snapshots.append(loads(f.read()))
+        return snapshots
+
+    def latest(self):
+        """Newest snapshot index, or None; reads only that one file"""
+        if not self.index_root.exists():
+            return None
+        paths = sorted(self.index_root.glob('*.json'))
+        if not paths:
+            return None
+        with open(paths[-1], 'rb') as f:
+            return loads(f.read())
+
+    def get(self, snapshot_id):
+        path = self.index_root / f"{int(snapshot_id):06d}.json"
+        if not path.exists():
+            raise KeyError(f"No snapshot {snapshot_id}")
+        with open(path, 'rb') as f:
+            return loads(f.read())
+
+    def take(self, db, label=""):
+        """Store a snapshot of db; skipped if nothing changed since the last one"""
+        chunks = []
+        new_chunks = {}
+        for q in db:
+            data = chunk_bytes(q)
+            digest = hashlib.sha256(data).hexdigest()[:32]
+            chunks.append(digest)
+            if digest not in self.chunk_index:
+                new_chunks[digest] = data
+
+        previous = self.latest()
+        if previous and previous['chunks'] == chunks:
+            return None
+
+        snapshot_id = previous['id'] + 1 if previous else 1
+        if new_chunks:
+            self.write_pack(f"{snapshot_id:06d}.pack", new_chunks)
+
+        snapshot = {
+            'id': snapshot_id,
+            'time': int(time.time()),
+            'label': label,
+            'count': len(chunks),
+            'chunks': chunks,
+        }
+        self.index_root.mkdir(parents=True, exist_ok=True)
+        write_bytes_atomic(self.index_root / f"{snapshot_id:06d}.json", dumps(snapshot))
+        return snapshot
+
+    def load(self, snapshot_id):
+        """Rebuild the full question list of a snapshot"""
+        open_packs = {}
+        return [loads(self.read_chunk(digest, open_packs)) for digest in self.get(snapshot_id)['chunks']]
+
+    def rollback(self, snapshot_id):
+        db = self.load(snapshot_id)
+        # save_database takes a new snapshot too, so a rollback can itself be undone
+        save_database(db, self.db_path, snapshot_label=f"rollback to #{snapshot_id}")
+        return db
+
+    def prune(self, keep):
+        """Keep the newest `keep` snapshots and repack only the chunks they use"""
+        snapshots = self.list()
+        remaining = snapshots[-keep:] if keep else []
+        for snapshot in snapshots[:len(snapshots) - len(remaining)]:
+            (self.index_root / f"{snapshot['id']:06d}.json").unlink()
+
+        live = {digest for s in remaining for digest in s['chunks']}
+        dropped = len(self.chunk_index) - len(live)
+
+        open_packs = {}
+        live_chunks = {digest: self.read_chunk(digest, open_packs) for digest in sorted(live)}
+        old_packs = set(p.name for p in self.pack_root.glob('*.pack')) if self.pack_root.exists() else set()
+
+        self.chunk_index = {}
+        pack_name = f"{remaining[-1]['id']:06d}-repacked.pack" if remaining else None
+        if pack_name:
+            self.write_pack(pack_name, live_chunks)
+        else:
+            write_bytes_atomic(self.chunk_index_path, dumps(self.chunk_index))
+        for name in old_packs - {pack_name}:
+            (self.pack_root / name).unlink()
+        return dropped
+
+
+def diff_questions(old_db, new_db):
+    """Questions added, removed and changed (with changed field names), by id"""
+    old_by_id = {q.get('id'): q for q in old_db}
+    new_by_id = {q.get('id'): q for q in new_db}
+
+    added = [i for i in new_by_id if i not in old_by_id]
+    removed = [i for i in old_by_id if i not in new_by_id]
+    changed = {}
+    for i in new_by_id.keys() & old_by_id.keys():
+        old_q, new_q = old_by_id[i], new_by_id[i]
+        if old_q != new_q:
+            changed[i] = sorted(k for k in old_q.keys() | new_q.keys() if old_q.get(k) != new_q.get(k))
+    return added, removed, changed
+
+
+def take_snapshot(db, db_path=DB_PATH, label=""):
+    """Hook for writers: snapshot the database after it was saved"""
+    return SnapshotStore(db_path).take(db, label)
+
+
+def describe(question):
+    return f"#{question.get('id')} {question.get('testId', '?')} {question.get('module', '')} Q{question.get('questionNumber')}"
+
+
+def main():
+    commands = ('list', 'take', 'diff', 'rollback', 'prune')
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print(f"Usage: python3 bulk-import/snapshots.py <{'|'.join(commands)}> [args]")
+        sys.exit(1)
+
+    store = SnapshotStore()
+    command = sys.argv[1]
+
+    if command == 'list':
+        for s in store.list():
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(s['time']))
+            print(f"   #{s['id']:<5} {when}  {s['count']:>5} questions  {s['label']}")
+
+    elif command == 'take':
+        snapshot = store.take(load_database(store.db_path), ' '.join(sys.argv[2:]) or "manual")
+        print(f"📸 Snapshot #{snapshot['id']} taken" if snapshot else "✓ No changes since the last snapshot")
+
+    elif command == 'diff':
+        if len(sys.argv) < 3:
+            print("Usage: python3 bulk-import/snapshots.py diff <snapshot> [<snapshot>]")
+            sys.exit(1)
+        old_db = store.load(sys.argv[2])
+        new_db = store.load(sys.argv[3]) if len(sys.argv) > 3 else load_database(store.db_path)
+        added, removed, changed = diff_questions(old_db, new_db)
+        new_by_id = {q.get('id'): q for q in new_db}
+        old_by_id = {q.get('id'): q for q in old_db}
+
+        print(f"🔍 {len(added)} added, {len(removed)} removed, {len(changed)} changed")
+        for i in added:
+            print(f"   + {describe(new_by_id[i])}")
+        for i in removed:
+            print(f"   - {describe(old_by_id[i])}")
+        for i, fields in sorted(changed.items()):
+            print(f"   ~ {describe(new_by_id[i])}: {', '.join(fields)}")
+
+    elif command == 'rollback':
+        if len(sys.argv) < 3:
+            print("Usage: python3 bulk-import/snapshots.py rollback <snapshot>")
+            sys.exit(1)
+        db = store.rollback(sys.argv[2])
+        print(f"⏪ Rolled back to snapshot #{sys.argv[2]} ({len(db)} questions)")
+
+    else:
+        keep = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+        removed = store.prune(keep)
+        print(f"🧹 Kept {keep} newest snapshots, removed {removed} unused chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Checkpoints of import stages, so a failed or re-run import resumes
+
+An import that failed in step 6 used to throw away everything steps 1-5 had
+worked out. Each checkpointed stage now saves its output next to the PDF's
+extraction cache (bulk-import/.cache/<sha256>/checkpoints/), keyed by:
+
+    - the PDF's SHA-256 (a different PDF never sees them)
+    - the stage's version and the keys of the stages it needs, so bumping
+      one version redoes that stage and the stages that depend on it, and
+      nothing else
+
+A rerun restores stages from their checkpoints up to the one asked for with
+from_stage, except those whose inputs have to be redone, and runs the rest
+(fast-import.py knows which stages need which).
+
+    checkpoints = StageCheckpoints(cache.root / "checkpoints", [('modules', 1, ()), ('choices', 2, ('modules',))])
+    checkpoints.load('modules')            # saved output, or None
+    checkpoints.save('modules', {'modules': modules})
+    checkpoints.resume_point()             # first stage without a checkpoint
+
+Checkpoints are pickles of the stage's own data: only read ones this machine
+wrote. `extraction_cache.py clear` removes them along with the cache.
+"""
+
+import hashlib
+import pickle
+from pathlib import Path
+
+from db_format import write_bytes_atomic
+
+
+class StageCheckpoints:
+    def __init__(self, root, stages, base=''):
+        """stages: [(name, version, names of the stages it needs), ...] in run order;
+        base: anything else every stage depends on"""
+        self.root = Path(root)
+        self.names = [name for name, _, _ in stages]
+
+        # Each key covers the stage's version and the keys of the stages it needs
+        self.keys = {}
+        for name, version, needs in stages:
+            chain = '/'.join([base, f"{name}-v{version}"] + [self.keys[need] for need in needs])
+            self.keys[name] = hashlib.sha256(chain.encode('utf-8')).hexdigest()[:16]
+
+    def prefix(self, name):
+        return f"{self.names.index(name):02d}-{name.replace(' ', '-')}"
+
+    def path(self, name):
+        return self.root / f"{self.prefix(name)}-{self.keys[name]}.pickle"
+
+    def load(self, name):
+        path = self.path(name)
+        if not path.exists():
+            return None
+        return pickle.loads(path.read_bytes())
+
+    def save(self, name, state):
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Checkpoints of older versions of this stage are dead now
+        for old in self.root.glob(f"{self.prefix(name)}-*.pickle"):
+            old.unlink()
+        write_bytes_atomic(self.path(name), pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def resume_point(self):
+        """First stage a rerun would have to run, or None if every stage is checkpointed"""
+        for name in self.names:
+            if not self.path(name).exists():
+                return name
+        return None
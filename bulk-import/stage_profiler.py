@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Per-stage profiling for the import pipelines
+
+Wrap each step of a pipeline in profiler.stage(name, step, *args) and every
+stage records:
+    - wall time and CPU time of its thread (CPU < wall means it waited on
+      workers, disk or stages running beside it)
+    - peak Python memory, when tracemalloc is on (it slows things down, so
+      only with memory=True); tracemalloc is process-wide, so this is only the
+      stage's own peak when no other stage runs at the same time
+    - how much each counter moved: counters come from providers (callables
+      returning {name: number}, polled before and after the stage) or from
+      profiler.count(name, n) calls; stages running at the same time (see
+      stage_scheduler.py) also see each other's counters move
+
+    profiler = StageProfiler(memory=True)
+    profiler.add_counters(lambda: {'get_text_calls': pages.get_text_calls})
+    profiler.stage('modules', detect_modules)
+    profiler.print_report()
+    profiler.extra['critical_path'] = scheduler.critical_path()   # more sections for the JSON
+    profiler.write_json('import-profile.json')
+    profiler.write_chrome_trace('import-trace.json')   # open in chrome://tracing or ui.perfetto.dev
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+class StageProfiler:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.stages = []
+        self.providers = []
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.extra = {}
+        self.started = time.perf_counter()
+
+    def add_counters(self, provider):
+        self.providers.append(provider)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counts[name] += n
+
+    def snapshot(self):
+        with self.lock:
+            values = Counter(self.counts)
+        for provider in self.providers:
+            values.update(provider())
+        return values
+
+    def stage(self, name, step, *args):
+        """Run one step and record its cost"""
+        before = self.snapshot()
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            return step(*args)
+        finally:
+            row = {
+                'stage': name,
+                'start': start - self.started,
+                'seconds': time.perf_counter() - start,
+                'cpu_seconds': time.thread_time() - cpu_start,
+                'peak_bytes': None,
+                'thread': threading.get_ident(),
+            }
+            if self.memory:
+                row['peak_bytes'] = tracemalloc.get_traced_memory()[1] - memory_before
+            after = self.snapshot()
+            row['counters'] = {key: after[key] - before.get(key, 0)
+                               for key in sorted(after) if after[key] != before.get(key, 0)}
+            with self.lock:
+                self.stages.append(row)
+
+    def report(self):
+        totals = Counter()
+        for row in self.stages:
+            totals.update(row['counters'])
+        peaks = [row['peak_bytes'] for row in self.stages if row['peak_bytes'] is not None]
+        return {
+            'wall_seconds': time.perf_counter() - self.started,
+            'stage_seconds': sum(row['seconds'] for row in self.stages),
+            'cpu_seconds': sum(row['cpu_seconds'] for row in self.stages),
+            'peak_bytes': max(peaks) if peaks else None,
+            'counters': dict(totals),
+            'stages': self.stages,
+            **self.extra,
+        }
+
+    def print_report(self):
+        print("\n⏱️  Stage profile:")
+        print(f"   {'stage':<40} {'wall':>8} {'cpu':>8} {'peak MB':>8}  counters")
+        for row in self.stages:
+            peak = f"{row['peak_bytes'] / 1e6:8.1f}" if row['peak_bytes'] is not None else f"{'-':>8}"
+            counters = ', '.join(f"{key} {value}" for key, value in row['counters'].items())
+            print(f"   {row['stage']:<40} {row['seconds']:>7.2f}s {row['cpu_seconds']:>7.2f}s {peak}  {counters}")
+        report = self.report()
+        print(f"   {'total':<40} {report['stage_seconds']:>7.2f}s {report['cpu_seconds']:>7.2f}s")
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_chrome_trace(self, path):
+        """Trace Event Format: one complete ("X") event per stage"""
+        events = []
+        for row in self.stages:
+            args = dict(row['counters'], cpu_seconds=round(row['cpu_seconds'], 4))
+            if row['peak_bytes'] is not None:
+                args['peak_bytes'] = row['peak_bytes']
+            events.append({
+                'name': row['stage'],
+                'cat': 'stage',
+                'ph': 'X',
+                'ts': round(row['start'] * 1e6),
+                'dur': round(row['seconds'] * 1e6),
+                'pid': os.getpid(),
+                'tid': row['thread'],
+                'args': args,
+            })
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
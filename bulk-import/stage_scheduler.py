@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Run import stages as a dependency graph, independent ones at the same time
+
+fast-import ran its steps one after another although most of them don't need
+each other: image positions don't depend on the modules or the answer key,
+and the four modules' questions don't depend on each other. Each stage now
+names the stages it needs, and a stage starts as soon as those are done, on a
+pool of threads (stages share the importer's state; the heavy page work
+inside them already runs in worker processes).
+
+    scheduler = StageScheduler(threads=4)
+    scheduler.add('page text', read_pages)
+    scheduler.add('modules', detect_modules, after=['page text'])
+    scheduler.add('images', find_images, after=['page text'])
+    scheduler.run()                  # re-raises the first stage that failed
+    scheduler.critical_path()        # which chain of stages bounds the total time
+    scheduler.print_critical_path()
+
+A running stage may add() more stages (e.g. one per module it found), and a
+stage may wait on one that isn't added yet. With threads=1 stages run one at
+a time, in the order they were added, in the calling thread.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+STAGE_THREADS = 4
+
+# Slack below this is rounding: the stage is on the critical path
+SLACK_EPSILON = 0.0005  # seconds
+
+
+class StageScheduler:
+    def __init__(self, threads=STAGE_THREADS):
+        self.threads = max(1, threads or STAGE_THREADS)
+        self.stages = {}     # name -> (run, names it needs)
+        self.order = []      # names in the order they were added
+        self.timings = {}    # name -> {'start', 'seconds', 'thread'}, in the order stages finished
+        self.lock = threading.Lock()
+        self.started = None
+
+    def add(self, name, run, after=()):
+        with self.lock:
+            if name in self.stages:
+                raise ValueError(f"Stage {name!r} added twice")
+            self.stages[name] = (run, tuple(after))
+            self.order.append(name)
+
+    def ready(self, done, running):
+        with self.lock:
+            return [name for name in self.order
+                    if name not in done and name not in running
+                    and all(need in done for need in self.stages[name][1])]
+
+    def timed(self, name):
+        start = time.perf_counter()
+        self.stages[name][0]()
+        self.timings[name] = {
+            'start': start - self.started,
+            'seconds': time.perf_counter() - start,
+            'thread': threading.get_ident(),
+        }
+
+    def run(self):
+        """Run every stage once its dependencies are done; re-raises the first failure"""
+        self.started = time.perf_counter()
+        done = set()
+
+        if self.threads == 1:
+            ready = self.ready(done, ())
+            while ready:
+                self.timed(ready[0])
+                done.add(ready[0])
+                ready = self.ready(done, ())
+        else:
+            running = {}  # future -> name
+            with ThreadPoolExecutor(max_workers=self.threads) as pool:
+                while True:
+                    # Only hand the pool what it can start, so earlier-added stages go first
+                    for name in self.ready(done, set(running.values()))[:self.threads - len(running)]:
+                        running[pool.submit(self.timed, name)] = name
+                    if not running:
+                        break
+
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        name = running.pop(future)
+                        if future.exception() is not None:
+                            # Let the other running stages finish; start nothing new
+                            wait(running)
+                            raise future.exception()
+                        done.add(name)
+
+        waiting = [name for name in self.order if name not in done]
+        if waiting:
+            missing = sorted({need for name in waiting for need in self.stages[name][1]} - set(self.stages))
+            raise RuntimeError(f"Stages {', '.join(waiting)} never became ready"
+                               + (f" (waiting for unknown stages {', '.join(missing)})" if missing else ""))
+
+    def critical_path(self):
+        """The longest chain of stage times through the graph - the time no number of threads gets below
+
+        Each stage's slack is how much longer it could have taken without making
+        the whole run longer; stages on the critical path have none.
+        """
+        if not self.timings:
+            return {'seconds': 0.0, 'wall_seconds': 0.0, 'path': [], 'stages': []}
+
+        # Stages finish after everything they need, so timings are in topological order
+        seconds = {name: row['seconds'] for name, row in self.timings.items()}
+        needs = {name: [need for need in self.stages[name][1] if need in seconds] for name in seconds}
+        finish = {}
+        via = {}
+        for name in seconds:
+            via[name] = max(needs[name], key=finish.get, default=None)
+            finish[name] = (finish[via[name]] if via[name] else 0.0) + seconds[name]
+
+        total = max(finish.values())
+        latest = dict.fromkeys(seconds, total)
+        for name in reversed(list(seconds)):
+            for need in needs[name]:
+                latest[need] = min(latest[need], latest[name] - seconds[name])
+
+        path = []
+        name = max(finish, key=finish.get)
+        while name:
+            path.append(name)
+            name = via[name]
+        path.reverse()
+
+        wall = max(row['start'] + row['seconds'] for row in self.timings.values())
+        rows = [{'stage': name, 'start': round(row['start'], 4), 'seconds': round(row['seconds'], 4),
+                 'slack': round(max(0.0, latest[name] - finish[name]), 4), 'critical': name in path}
+                for name, row in sorted(self.timings.items(), key=lambda item: item[1]['start'])]
+        return {'seconds': round(total, 4), 'wall_seconds': round(wall, 4), 'path': path, 'stages': rows}
+
+    def print_critical_path(self):
+        report = self.critical_path()
+        if not report['path']:
+            return
+        print(f"\n🧭 Critical path: {report['seconds']:.2f}s of {report['wall_seconds']:.2f}s wall "
+              f"({self.threads} thread{'s' if self.threads > 1 else ''})")
+        print(f"   {'stage':<40} {'start':>8} {'time':>8} {'slack':>8}")
+        for row in report['stages']:
+            slack = f"{'-':>8}" if row['slack'] < SLACK_EPSILON else f"{row['slack']:>7.2f}s"
+            marker = '  ◀' if row['critical'] else ''
+            print(f"   {row['stage']:<40} {row['start']:>7.2f}s {row['seconds']:>7.2f}s {slack}{marker}")
+        print(f"   {' → '.join(report['path'])}")
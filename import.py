@@ -1,19 +1,22 @@
-import json
 import csv
-import shutil
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / "bulk-import"))
+from db_format import load_database, save_database
+from image_store import ImageStore
+
 print("🚀 Starting bulk import...")
 
 # Load existing questions
-try:
-    with open('questions-database.json', 'r', encoding='utf-8') as f:
-        all_questions = json.load(f)
+all_questions = load_database('questions-database.json')
+if all_questions:
     print(f"📚 Loaded {len(all_questions)} existing questions")
-except FileNotFoundError:
-    all_questions = []
+else:
     print("📚 Starting with empty database")
 
+image_store = ImageStore()
+
 # Read CSV file
 new_questions = []
 csv_path = 'bulk-import/questions.csv'
@@ -39,7 +42,7 @@ try:
                     
                     # Copy image to correct location
                     if source_image.exists():
-                        shutil.copy(source_image, target_image)
+                        image_store.add(source_image, target_image)
                         image_path = f"images/2025-03/asiav1/{image_name}"
                         print(f"  ✅ Copied image: {image_name}")
                     else:
@@ -122,8 +125,8 @@ all_questions.extend(new_questions)
 
 # Save everything
 try:
-    with open('questions-database.json', 'w', encoding='utf-8') as f:
-        json.dump(all_questions, f, indent=2, ensure_ascii=False)
+    image_store.save()
+    save_database(all_questions, 'questions-database.json')
     print(f"\n✅ Successfully added {len(new_questions)} questions!")
     print(f"📊 Total questions in database: {len(all_questions)}")
 except Exception as e:
@@ -5,10 +5,52 @@ Simple HTTP server with better error handling for serving SAT practice questions
 import http.server
 import socketserver
 import os
+import sys
 from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, str(Path(__file__).parent / "bulk-import"))
+from db_format import DB_PATH, database_lock, dumps
+from question_store import RevisionLog, revisions_path
+from binary_index import BinaryIndex, ensure_index
+from import_queue import load_status
 
 PORT = 8000
 
+class QuestionCache:
+    """mmaps the binary question index, reopening it when the database changes
+
+    Pre-forked workers all notice a change at once; under database_lock the
+    first one rebuilds a stale index or revision log, the others find them fresh.
+    """
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = Path(db_path)
+        self.mtime = None
+        self.index = None
+        self.log = None
+
+    def get(self):
+        if not self.db_path.exists():
+            return [], RevisionLog(self.db_path)
+
+        mtime = self.db_path.stat().st_mtime
+        if mtime != self.mtime:
+            if self.index is not None:
+                self.index.close()
+            with database_lock(self.db_path):
+                self.index = BinaryIndex(ensure_index(self.db_path))
+                self.log = RevisionLog(self.db_path)
+                log_path = revisions_path(self.db_path)
+                if not log_path.exists() or log_path.stat().st_mtime < mtime:
+                    # Edited without db_format (or while the server was down); saved even
+                    # if nothing changed, so the other workers see the log is up to date
+                    self.log.sync(list(self.index))
+                    self.log.save()
+            self.mtime = mtime
+        return self.index, self.log
+
+questions = QuestionCache()
+
 class SATServer(http.server.SimpleHTTPRequestHandler):
     def end_headers(self):
         # Add CORS headers
@@ -24,6 +66,47 @@ class SATServer(http.server.SimpleHTTPRequestHandler):
         self.send_response(200)
         self.end_headers()
     
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/api/changes':
+            self.send_changes(parse_qs(url.query))
+        elif url.path == '/api/questions':
+            self.send_questions(parse_qs(url.query))
+        elif url.path == '/api/imports':
+            self.send_json(load_status())
+        else:
+            super().do_GET()
+    
+    def send_changes(self, params):
+        """Only the questions added/changed/deleted since the client's revision"""
+        try:
+            since = int(params.get('since', ['0'])[0])
+        except ValueError:
+            self.send_error(400, "since must be an integer revision")
+            return
+        
+        db, log = questions.get()
+        self.send_json(log.changes_since(db, since))
+    
+    def send_questions(self, params):
+        """Questions of one test (?test=asiav1), straight from the shared index"""
+        index, _ = questions.get()
+        test_id = params.get('test', [None])[0]
+        if test_id is None:
+            self.send_json(list(index))
+        elif hasattr(index, 'questions_for_test'):
+            self.send_json(index.questions_for_test(test_id))
+        else:
+            self.send_json([])
+    
+    def send_json(self, data):
+        body = dumps(data)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def log_message(self, format, *args):
         # Custom logging
         print(f"[{self.address_string()}] {args[0]}")
@@ -31,11 +114,23 @@ class SATServer(http.server.SimpleHTTPRequestHandler):
 if __name__ == "__main__":
     os.chdir(Path(__file__).parent)
     
+    # python3 server.py --workers 4  -> pre-forked workers sharing one socket
+    workers = 1
+    if '--workers' in sys.argv:
+        workers = int(sys.argv[sys.argv.index('--workers') + 1])
+    if not hasattr(os, 'fork'):
+        workers = 1
+    
     with socketserver.TCPServer(("", PORT), SATServer) as httpd:
         print(f"🚀 Server starting on http://localhost:{PORT}")
         print(f"📁 Serving directory: {os.getcwd()}")
+        if workers > 1:
+            print(f"👷 Workers: {workers}")
         print(f"💡 Press Ctrl+C to stop the server")
         print()
+        for _ in range(workers - 1):
+            if os.fork() == 0:
+                break
         try:
             httpd.serve_forever()
         except KeyboardInterrupt: